@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.user import User
 from models.expense import Expense
@@ -7,11 +7,24 @@ from models.budget import Budget
 from models.financial_goal import FinancialGoal
 from services.financial_advice_service import FinancialAdviceService
 from services.ai_response_service import AIResponseService
+from services.snapshot_cache import SnapshotCache
+from services.financial_context_builder import FinancialContextBuilder
+from utils.request_utils import parse_bool
+from models.transaction import Transaction
 import datetime
+import json
 
 advice_bp = Blueprint('advice', __name__)
 financial_advice_service = FinancialAdviceService()
-ai_response_service = AIResponseService()
+ai_response_service = AIResponseService(advice_service=financial_advice_service)
+financial_context_builder = FinancialContextBuilder()
+
+# Finansal sağlık anlık görüntüleri: ilgili veriler değişene kadar tekrar hesaplanmaz
+health_snapshot_cache = SnapshotCache('financial-health')
+for model in (Expense, Income, Budget, FinancialGoal, Transaction):
+    health_snapshot_cache.watch(model)
+# Bakiye kullanıcı kaydında tutulur
+health_snapshot_cache.watch(User, user_id_attr='id')
 
 @advice_bp.route('/financial-health', methods=['GET'])
 @jwt_required()
@@ -20,103 +33,54 @@ def get_financial_health():
     Kullanıcının finansal sağlık durumunu ve kişiselleştirilmiş tavsiyeleri döndürür
     """
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user:
-        return jsonify({"error": "Kullanıcı bulunamadı"}), 404
     
-    # Son 12 ayın gelir ve gider verilerini al
-    end_date = datetime.datetime.now()
-    start_date = end_date - datetime.timedelta(days=365)
-    
-    expenses = Expense.query.filter_by(user_id=user_id).filter(
-        Expense.date >= start_date.date(),
-        Expense.date <= end_date.date()
-    ).all()
-    
-    incomes = Income.query.filter_by(user_id=user_id).filter(
-        Income.date >= start_date.date(),
-        Income.date <= end_date.date()
-    ).all()
+    # Son 12 aylık pencere her gün kaydığı için anlık görüntü güne göre de ayrılır
+    result = health_snapshot_cache.get_or_compute(
+        user_id,
+        lambda: _compute_financial_health(user_id),
+        scope=datetime.date.today().isoformat()
+    )
     
-    # Verileri aylık olarak gruplandır
-    expense_data = {}
-    income_data = {}
+    if result is None:
+        return jsonify({"error": "Kullanıcı bulunamadı"}), 404
     
-    for expense in expenses:
-        month_key = expense.date.strftime('%Y-%m')
-        if month_key in expense_data:
-            expense_data[month_key] += expense.amount
-        else:
-            expense_data[month_key] = expense.amount
+    return jsonify(result), 200
+
+def _compute_financial_health(user_id):
+    """
+    Finansal sağlık anlık görüntüsünü kullanıcının finansal bağlamından hesaplar
     
-    for income in incomes:
-        month_key = income.date.strftime('%Y-%m')
-        if month_key in income_data:
-            income_data[month_key] += income.amount
-        else:
-            income_data[month_key] = income.amount
+    Returns:
+        dict: Finansal sağlık, tavsiyeler, kategoriler, bütçeler ve hedefler (kullanıcı yoksa None)
+    """
+    context = financial_context_builder.get(user_id)
     
-    # Mevcut bakiye ve borç verilerini hesapla
-    balance = user.current_balance
+    if context is None:
+        return None
     
-    debts = {}  # TODO: Borç verilerini getir
+    # Borç verisi henüz tutulmuyor
+    debts = None
     
-    # Finansal sağlık analizi
+    # Son 12 ayın aylık gelir ve giderleri üzerinden finansal sağlık analizi
     financial_health = financial_advice_service.analyze_financial_health(
-        income_data, expense_data, balance, debts
+        context['monthly_income'], context['monthly_expenses'], context['current_balance'], debts
     )
     
-    # Kategori bazlı gider analizini hazırla
-    expense_categories = {}
-    for expense in expenses:
-        if expense.category in expense_categories:
-            expense_categories[expense.category] += expense.amount
-        else:
-            expense_categories[expense.category] = expense.amount
-    
-    # Finansal hedefleri al
-    goals = FinancialGoal.query.filter_by(user_id=user_id).all()
-    user_goals = [
-        {
-            'id': goal.id,
-            'name': goal.name,
-            'target_amount': goal.target_amount,
-            'current_amount': goal.current_amount,
-            'deadline': goal.deadline.strftime('%Y-%m-%d') if goal.deadline else None,
-            'priority': goal.priority
-        }
-        for goal in goals
-    ]
-    
     # Finansal tavsiyeler
     advice = financial_advice_service.generate_financial_advice(
         financial_health,
-        expense_categories=expense_categories,
-        goals=user_goals
+        expense_categories=context['expense_categories'],
+        goals=context['goals']
     )
     
-    # Bütçeleri getir
-    budgets = Budget.query.filter_by(user_id=user_id).all()
-    budget_data = [
-        {
-            'category': budget.category,
-            'amount': budget.amount,
-            'period': budget.period
-        }
-        for budget in budgets
-    ]
-    
     # Sonuçları birleştir
-    result = {
+    return {
         'financial_health': financial_health,
         'advice': advice,
-        'expense_categories': expense_categories,
-        'budgets': budget_data,
-        'goals': user_goals
+        'expense_categories': context['expense_categories'],
+        'budgets': context['budgets'],
+        'goals': context['goals']
     }
-    
-    return jsonify(result), 200
 
 @advice_bp.route('/ai-response', methods=['POST'])
 @jwt_required()
@@ -125,10 +89,6 @@ def get_ai_response():
     Kullanıcı sorusuna OpenAI API üzerinden yanıt üretir
     """
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user:
-        return jsonify({"error": "Kullanıcı bulunamadı"}), 404
     
     # İstek gövdesinden kullanıcı mesajını al
     data = request.get_json()
@@ -136,90 +96,79 @@ def get_ai_response():
         return jsonify({"error": "Mesaj sağlanmadı"}), 400
     
     user_message = data['message']
+    # Önbelleği atlamak için istemci açıkça force_refresh göndermelidir
+    force_refresh = parse_bool(data.get('force_refresh'))
     
-    # Kullanıcının finansal verilerini hazırla
-    financial_data = {}
+    # Kullanıcının finansal verilerini hazırla (son 30 gün, bütçeler ve hedefler)
+    context = financial_context_builder.get(user_id)
     
-    # Son 30 günlük giderleri al
-    end_date = datetime.datetime.now()
-    start_date = end_date - datetime.timedelta(days=30)
+    if context is None:
+        return jsonify({"error": "Kullanıcı bulunamadı"}), 404
     
-    expenses = Expense.query.filter_by(user_id=user_id).filter(
-        Expense.date >= start_date.date(),
-        Expense.date <= end_date.date()
-    ).all()
+    financial_data = financial_context_builder.ai_financial_data(context)
     
-    # Kategori bazlı giderleri grupla
-    expense_categories = {}
-    total_expenses = 0
-    for expense in expenses:
-        total_expenses += expense.amount
-        if expense.category in expense_categories:
-            expense_categories[expense.category] += expense.amount
-        else:
-            expense_categories[expense.category] = expense.amount
+    # AI yanıtını al
+    ai_response = ai_response_service.get_response(
+        user_message, financial_data, force_refresh=force_refresh, user_id=user_id
+    )
     
-    # Gelir verilerini al
-    incomes = Income.query.filter_by(user_id=user_id).filter(
-        Income.date >= start_date.date(),
-        Income.date <= end_date.date()
-    ).all()
+    return jsonify({
+        'response': ai_response
+    }), 200
+
+@advice_bp.route('/ai-response/stream', methods=['POST'])
+@jwt_required()
+def stream_ai_response():
+    """
+    Kullanıcı sorusunun yanıtını OpenAI API'den geldikçe Server-Sent Events olarak iletir
     
-    total_income = sum(income.amount for income in incomes)
+    Olaylar: her parça için {"token": ...}, sonunda "done" olayıyla
+    {"response": tam yanıt}. İstemci bağlantıyı keserse API akışı da kapatılır.
+    """
+    user_id = get_jwt_identity()
     
-    # Bütçe verilerini al
-    budgets = Budget.query.filter_by(user_id=user_id).all()
-    budget_data = {}
-    for budget in budgets:
-        # Bütçenin ne kadarının kullanıldığını hesapla
-        used_amount = expense_categories.get(budget.category, 0)
-        remaining = budget.amount - used_amount
-        budget_data[budget.category] = {
-            'limit': budget.amount,
-            'used': used_amount,
-            'remaining': remaining,
-            'status': 'İyi' if remaining > (budget.amount * 0.2) else 'Dikkat'
-        }
+    data = request.get_json()
+    if not data or 'message' not in data:
+        return jsonify({"error": "Mesaj sağlanmadı"}), 400
     
-    # Finansal hedefleri al
-    goals = FinancialGoal.query.filter_by(user_id=user_id).all()
-    goals_data = []
-    for goal in goals:
-        progress = (goal.current_amount / goal.target_amount * 100) if goal.target_amount > 0 else 0
-        goals_data.append({
-            'name': goal.name,
-            'target': goal.target_amount,
-            'current': goal.current_amount,
-            'progress': progress,
-            'deadline': goal.deadline.strftime('%Y-%m-%d') if goal.deadline else None
-        })
+    user_message = data['message']
+    force_refresh = parse_bool(data.get('force_refresh'))
     
-    # Mevcut bakiye
-    current_balance = user.current_balance
+    # Finansal bağlam istek bağlamı içinde, akış başlamadan hazırlanır
+    context = financial_context_builder.get(user_id)
     
-    # Tüm finansal verileri bir araya getir
-    financial_data = {
-        'user': {
-            'name': user.full_name,
-            'company': user.company_name
-        },
-        'current_month': end_date.strftime('%B %Y'),  # Örn: "Mart 2023"
-        'monthly_income': total_income,
-        'monthly_expenses': total_expenses,
-        'savings': max(0, total_income - total_expenses),
-        'savings_rate': (max(0, total_income - total_expenses) / total_income * 100) if total_income > 0 else 0,
-        'current_balance': current_balance,
-        'expense_categories': expense_categories,
-        'budgets': budget_data,
-        'goals': goals_data
-    }
+    if context is None:
+        return jsonify({"error": "Kullanıcı bulunamadı"}), 404
     
-    # AI yanıtını al
-    ai_response = ai_response_service.get_response(user_message, financial_data)
+    financial_data = financial_context_builder.ai_financial_data(context)
     
-    return jsonify({
-        'response': ai_response
-    }), 200
+    tokens = ai_response_service.stream_response(
+        user_message, financial_data, force_refresh=force_refresh, user_id=user_id
+    )
+    
+    def generate():
+        parts = []
+        try:
+            for token in tokens:
+                parts.append(token)
+                yield _sse_event({'token': token})
+            yield _sse_event({'response': ''.join(parts)}, event='done')
+        finally:
+            # İstemci bağlantıyı kestiğinde sunucu bu üreteci kapatır; API akışı da kapanır
+            tokens.close()
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Ters vekil sunucuların akışı tamponlamasını engelle
+        'X-Accel-Buffering': 'no'
+    })
+
+def _sse_event(payload, event=None):
+    """Tek bir Server-Sent Events mesajı oluşturur"""
+    message = f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
 
 # Kimlik doğrulama gerektirmeyen basit AI yanıt endpointi
 @advice_bp.route('/public-ai-response', methods=['POST'])
@@ -233,7 +182,7 @@ def get_public_ai_response():
         return jsonify({"error": "Mesaj sağlanmadı"}), 400
     
     user_message = data['message']
-    force_refresh = data.get('force_refresh', True)
+    force_refresh = parse_bool(data.get('force_refresh'))
     
     # Demo finansal veriler
     financial_data = {
@@ -5,6 +5,7 @@ import datetime
 from app import db
 from models.transaction import Transaction
 from services.expense_categorization_service import ExpenseCategorizationService
+from services.tax_position_service import TaxPositionService
 
 # Gider işlemleri Blueprint'i
 expenses_bp = Blueprint('expenses', __name__)
@@ -12,6 +13,9 @@ expenses_bp = Blueprint('expenses', __name__)
 # Gider kategorilendirme servisi örneği oluştur
 expense_service = ExpenseCategorizationService()
 
+# Yıl içi vergi pozisyonlarının artımlı güncellenmesi
+tax_position_service = TaxPositionService()
+
 @expenses_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_expenses():
@@ -205,6 +209,9 @@ def categorize_expenses():
     # Kategorize edilecek işlemleri hazırla
     categorized_transactions = []
     
+    # Vergi pozisyonuna uygulanacak değişiklikler: (yeni hali, önceki hali)
+    tax_changes = []
+    
     for transaction in transactions:
         # İşlemi kategorize et
         transaction_data = {
@@ -216,12 +223,15 @@ def categorize_expenses():
         # AI modeli ile kategori tahmin et
         category_result = expense_service.categorize_transaction(transaction_data)
         
+        previous = tax_position_service.snapshot(transaction)
+        
         # İşlem verilerini güncelle
         transaction.category_id = category_result['category']
         transaction.is_tax_deductible = category_result['is_tax_deductible']
         transaction.prediction_confidence = category_result['confidence']
         
         db.session.add(transaction)
+        tax_changes.append((transaction, previous))
         
         # Sonucu hazırla
         categorized_transactions.append({
@@ -233,6 +243,7 @@ def categorize_expenses():
         })
     
     # Değişiklikleri kaydet
+    tax_position_service.apply_transactions(current_user_id, tax_changes)
     db.session.commit()
     
     return jsonify({
@@ -288,12 +299,15 @@ def update_expense_category(transaction_id):
     if new_category not in expense_service.categories:
         return jsonify({"error": "Geçersiz kategori"}), 400
     
+    previous = tax_position_service.snapshot(transaction)
+    
     # İşlemi güncelle
     transaction.category_id = new_category
     transaction.custom_category = new_category  # Kullanıcı tarafından belirlendiğini işaretle
     transaction.is_tax_deductible = new_category in expense_service.tax_deductible_categories
     
     # Değişiklikleri kaydet
+    tax_position_service.apply_transaction(transaction, previous)
     db.session.commit()
     
     return jsonify({
@@ -0,0 +1,157 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.transaction import Transaction
+from services.income_prediction_service import IncomePredictionService
+from services.forecast_job_service import ForecastJobService
+
+# Gelir işlemleri Blueprint'i
+income_bp = Blueprint('income', __name__)
+
+# Gelir tahmin servisi örneği oluştur
+income_prediction_service = IncomePredictionService()
+
+# Uzun süren tahmin işleri için arka plan iş servisi (modeller `flask train-income-models` ile eğitilir)
+forecast_job_service = ForecastJobService(income_prediction_service)
+
+# Bir istekte tahmin edilebilecek en fazla ay sayısı
+MAX_FORECAST_MONTHS = 24
+
+def _get_monthly_income(user_id):
+    """Kullanıcının gelir işlemlerini aylık olarak toplar (gelirler amount < 0)"""
+    incomes = Transaction.query.filter_by(user_id=user_id).filter(Transaction.amount < 0).all()
+
+    income_data = {}
+    for income in incomes:
+        month_key = income.transaction_month
+        income_data[month_key] = income_data.get(month_key, 0) + abs(income.amount)
+
+    return income_data
+
+def _parse_months(value, default=6):
+    """
+    Tahmin süresini doğrular ve 1 ile MAX_FORECAST_MONTHS arasına sınırlar
+
+    Returns:
+        int: Ay sayısı (değer sayı değilse None)
+    """
+    if value is None or value == '':
+        return default
+
+    try:
+        months = int(value)
+    except (TypeError, ValueError):
+        return None
+
+    return min(max(months, 1), MAX_FORECAST_MONTHS)
+
+@income_bp.route('/predict', methods=['GET'])
+@jwt_required()
+def predict_income():
+    """Kullanıcının gelecek aylardaki gelirini tahmin eder"""
+    current_user_id = get_jwt_identity()
+
+    months = _parse_months(request.args.get('months'))
+    if months is None:
+        return jsonify({"error": "months bir tam sayı olmalı"}), 400
+
+    include_chart = request.args.get('include_chart', 'false').lower() == 'true'
+
+    income_data = _get_monthly_income(current_user_id)
+
+    if len(income_data) < 2:
+        return jsonify({"error": "Tahmin için yeterli gelir verisi yok"}), 400
+
+    result = income_prediction_service.predict_future_income(
+        income_data, months=months, include_chart=include_chart, user_id=current_user_id
+    )
+
+    if result['status'] != 'success':
+        return jsonify(result), 503
+
+    return jsonify(result), 200
+
+@income_bp.route('/predict/<forecast_id>/chart', methods=['GET'])
+@jwt_required()
+def get_income_prediction_chart(forecast_id):
+    """Daha önce yapılmış bir gelir tahmininin grafiğini döndürür"""
+    current_user_id = get_jwt_identity()
+
+    chart = income_prediction_service.get_prediction_chart(forecast_id, user_id=current_user_id)
+
+    if chart is None:
+        return jsonify({"error": "Tahmin bulunamadı. Önce tahmin oluşturun."}), 404
+
+    return jsonify({
+        "forecast_id": forecast_id,
+        "chart": chart
+    }), 200
+
+@income_bp.route('/forecast-jobs', methods=['POST'])
+@jwt_required()
+def submit_forecast_job():
+    """Gelir tahmini işini arka planda başlatır (sonuç depodaysa hemen döndürür)"""
+    current_user_id = get_jwt_identity()
+
+    data = request.get_json() or {}
+    months = _parse_months(data.get('months'))
+    if months is None:
+        return jsonify({"error": "months bir tam sayı olmalı"}), 400
+
+    income_data = _get_monthly_income(current_user_id)
+
+    if len(income_data) < 2:
+        return jsonify({"error": "Tahmin için yeterli gelir verisi yok"}), 400
+
+    submission = forecast_job_service.submit(
+        current_user_id, income_data, months=months
+    )
+
+    # Depodaki sonuç varsa hemen döndür; yenileme (varsa) arka planda sürer
+    status_code = 200 if submission['result'] is not None else 202
+
+    return jsonify(submission), status_code
+
+@income_bp.route('/forecast-jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_forecast_job(job_id):
+    """Tahmin işinin durumunu döndürür"""
+    current_user_id = get_jwt_identity()
+
+    job = forecast_job_service.get_job(job_id, user_id=current_user_id)
+
+    if not job:
+        return jsonify({"error": "İş bulunamadı"}), 404
+
+    return jsonify({"job": job}), 200
+
+@income_bp.route('/forecast-jobs/<job_id>/result', methods=['GET'])
+@jwt_required()
+def get_forecast_job_result(job_id):
+    """Tamamlanmış tahmin işinin sonucunu döndürür"""
+    current_user_id = get_jwt_identity()
+
+    job, result = forecast_job_service.get_result(job_id, user_id=current_user_id)
+
+    if not job:
+        return jsonify({"error": "İş bulunamadı"}), 404
+
+    if job['status'] in ('queued', 'running'):
+        return jsonify({"job": job}), 202
+
+    if job['status'] != 'completed':
+        return jsonify({"error": "İş tamamlanamadı", "job": job}), 409
+
+    return jsonify({"job": job, "result": result}), 200
+
+@income_bp.route('/forecast-jobs/<job_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_forecast_job(job_id):
+    """Tahmin işini iptal eder"""
+    current_user_id = get_jwt_identity()
+
+    job = forecast_job_service.cancel(job_id, user_id=current_user_id)
+
+    if not job:
+        return jsonify({"error": "İş bulunamadı"}), 404
+
+    return jsonify({"job": job}), 200
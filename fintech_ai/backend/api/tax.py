@@ -0,0 +1,95 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+import datetime
+from models.transaction import Transaction
+from services.tax_estimation_service import TaxEstimationService
+from services.tax_position_service import TaxPositionService
+
+# Vergi işlemleri Blueprint'i
+tax_bp = Blueprint('tax', __name__)
+
+# Vergi tahmin servisi örneği oluştur
+tax_service = TaxEstimationService()
+
+# Yıl içi vergi pozisyonları
+tax_position_service = TaxPositionService()
+
+# HTTP isteğinde değerlendirilecek en fazla senaryo (yanıt tüm yüzeyleri içerir)
+WHAT_IF_MAX_GRID_POINTS = 10000
+
+def _get_tax_inputs(user_id, tax_year):
+    """Kullanıcının vergi yılındaki aylık gelirlerini ve gider listesini hazırlar"""
+    transactions = Transaction.query.filter(
+        Transaction.user_id == user_id,
+        Transaction.date >= datetime.date(tax_year, 1, 1),
+        Transaction.date <= datetime.date(tax_year, 12, 31)
+    ).all()
+
+    income_data = {}
+    expenses_data = []
+    for transaction in transactions:
+        if transaction.amount < 0:
+            month_key = transaction.transaction_month
+            income_data[month_key] = income_data.get(month_key, 0) + abs(transaction.amount)
+        else:
+            expenses_data.append({
+                'category': tax_position_service.expense_category(transaction),
+                'amount': transaction.amount
+            })
+
+    return income_data, expenses_data
+
+@tax_bp.route('/estimate', methods=['GET'])
+@jwt_required()
+def get_tax_estimate():
+    """Kullanıcının vergi yılı tahminini saklanan vergi pozisyonundan hesaplar"""
+    current_user_id = get_jwt_identity()
+
+    tax_year = request.args.get('tax_year', datetime.datetime.now().year, type=int)
+
+    if tax_position_service.needs_rebuild(current_user_id, tax_year):
+        # Pozisyon yok veya önceden kayıtlı işlemleri içermiyor: işlemlerden bir kez oluştur
+        tax_position_service.rebuild(user_id=current_user_id, tax_year=tax_year)
+
+    position = tax_position_service.get_position(current_user_id, tax_year)
+
+    if position is None:
+        return jsonify({"error": "Vergi yılı için işlem bulunamadı"}), 404
+
+    result = tax_service.estimate_annual_tax(position=position)
+    result['position_updated_at'] = position['updated_at']
+
+    return jsonify(result), 200
+
+@tax_bp.route('/what-if', methods=['POST'])
+@jwt_required()
+def tax_what_if():
+    """Kesinti, gelir kaydırma ve KDV dağılımı senaryolarının vergi yüzeyini döndürür"""
+    current_user_id = get_jwt_identity()
+
+    data = request.get_json() or {}
+    try:
+        tax_year = int(data.get('tax_year', datetime.datetime.now().year))
+    except (ValueError, TypeError):
+        return jsonify({"error": "tax_year bir tam sayı olmalı"}), 400
+
+    income_data, expenses_data = _get_tax_inputs(current_user_id, tax_year)
+
+    if not income_data:
+        return jsonify({"error": "Vergi yılı için gelir verisi bulunamadı"}), 400
+
+    try:
+        result = tax_service.sweep_tax_scenarios(
+            income_data,
+            expenses_data,
+            deduction_grid=data.get('deductions'),
+            income_shifts=data.get('income_shifts'),
+            vat_mixes=data.get('vat_mixes'),
+            max_grid_points=WHAT_IF_MAX_GRID_POINTS
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    result['tax_year'] = tax_year
+
+    return jsonify(result), 200
@@ -2,10 +2,13 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import json
 import datetime
+import traceback
 from models.transaction import Transaction
 from models.user import User
 from app import db
 from services.plaid_service import PlaidService
+from services.cashflow_alert_stream import CashflowAlertStream
+from services.tax_position_service import TaxPositionService
 
 # İşlemler Blueprint'i
 transactions_bp = Blueprint('transactions', __name__)
@@ -13,6 +16,15 @@ transactions_bp = Blueprint('transactions', __name__)
 # Plaid servisi örneği oluştur
 plaid_service = PlaidService()
 
+# Yeni işlemlerle artımlı nakit akışı uyarı değerlendirmesi; durum işlemler veya
+# bakiye başka bir yoldan değişince veritabanından yeniden yüklenir
+cashflow_alert_stream = CashflowAlertStream()
+cashflow_alert_stream.state_cache.watch(Transaction)
+cashflow_alert_stream.state_cache.watch(User, user_id_attr='id')
+
+# Yıl içi vergi pozisyonlarının artımlı güncellenmesi
+tax_position_service = TaxPositionService()
+
 @transactions_bp.route('/link-token', methods=['POST'])
 @jwt_required()
 def create_link_token():
@@ -79,6 +91,12 @@ def sync_transactions():
         
         transactions = plaid_service.get_transactions(user.plaid_access_token, start_date, end_date)
         
+        # Uyarı akışı durumu değişikliklerden önce alınır (önbellekte yoksa veritabanından)
+        alert_state, alert_state_version = cashflow_alert_stream.get_state(user.id)
+        
+        # Uyarı akışına ve vergi pozisyonuna verilecek değişiklikler: (yeni hali, önceki hali)
+        changes = []
+        
         # Veritabanına kaydet
         for transaction in transactions:
             # İşlem zaten var mı kontrol et
@@ -88,6 +106,8 @@ def sync_transactions():
             ).first()
             
             if existing:
+                previous = tax_position_service.snapshot(existing)
+                
                 # İşlem varsa güncelle
                 existing.amount = transaction['amount']
                 existing.date = datetime.datetime.strptime(transaction['date'], '%Y-%m-%d').date()
@@ -95,6 +115,9 @@ def sync_transactions():
                 existing.category = json.dumps(transaction['category'])
                 existing.category_id = transaction['category_id']
                 existing.pending = transaction['pending']
+                
+                if previous != tax_position_service.snapshot(existing):
+                    changes.append((existing, previous))
             else:
                 # Yeni işlem oluştur
                 new_transaction = Transaction(
@@ -111,13 +134,49 @@ def sync_transactions():
                     payment_channel=transaction['payment_channel']
                 )
                 db.session.add(new_transaction)
+                changes.append((new_transaction, None))
+        
+        tax_position_service.apply_transactions(user.id, changes)
         
+        # Sadece yeni aşılan eşikler için uyarı üret (durum O(1) güncellenir)
+        alerts = []
+        alert_error = None
+        try:
+            alerts = cashflow_alert_stream.process_transactions(user.id, changes, state=alert_state)
+        except Exception as e:
+            alert_state = None
+            alert_error = f"Nakit akışı uyarıları değerlendirilemedi: {str(e)}"
+            print(f"Nakit akışı uyarı değerlendirme hatası: {str(e)}")
+            print(f"Hata ayrıntıları: {traceback.format_exc()}")
+        
+        db.session.flush()
+        alert_state_version = cashflow_alert_stream.expected_version(db.session, user.id, alert_state_version)
         db.session.commit()
         
-        return jsonify({
+        if alert_state is not None:
+            # Arada başka bir yazma olduysa saklanmaz; durum sonraki senkronizasyonda yeniden yüklenir
+            cashflow_alert_stream.save_state(user.id, alert_state, alert_state_version)
+            try:
+                cashflow_alert_stream.save_alerts(user.id, alerts)
+            except Exception as e:
+                # İşlemler kaydedildi; uyarı hatası yanıtta bildirilir
+                db.session.rollback()
+                # Saklanan durum kaydedilmeyen uyarıları açık sayar; sonraki senkronizasyonda yeniden yüklensin
+                cashflow_alert_stream.state_cache.invalidate(user.id)
+                alerts = []
+                alert_error = f"Nakit akışı uyarıları kaydedilemedi: {str(e)}"
+                print(f"Nakit akışı uyarı kaydetme hatası: {str(e)}")
+                print(f"Hata ayrıntıları: {traceback.format_exc()}")
+        
+        response = {
             "message": f"{len(transactions)} işlem başarıyla senkronize edildi",
-            "sync_date": datetime.datetime.now().isoformat()
-        }), 200
+            "sync_date": datetime.datetime.now().isoformat(),
+            "alerts": alerts
+        }
+        if alert_error:
+            response["alert_error"] = alert_error
+        
+        return jsonify(response), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -239,11 +298,14 @@ def update_transaction_category(transaction_id):
     if not data or 'category_id' not in data:
         return jsonify({"error": "category_id alanı gereklidir"}), 400
     
+    previous = tax_position_service.snapshot(transaction)
+    
     # Kategoriyi güncelle
     transaction.category_id = data['category_id']
     if 'category' in data:
         transaction.category = json.dumps(data['category'])
     
+    tax_position_service.apply_transaction(transaction, previous)
     db.session.commit()
     
     return jsonify({
@@ -3,6 +3,8 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 from services.ai_response_service import AIResponseService
+from commands import register_commands
+from utils.request_utils import parse_bool
 
 # .env dosyasından çevre değişkenlerini yükle
 load_dotenv()
@@ -16,6 +18,9 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'gelistirme-modu-gizli-a
 # CORS yapılandırması
 CORS(app)
 
+# CLI komutları (flask cashflow-scan vb.)
+register_commands(app)
+
 # AI Yanıt servisi başlat
 ai_service = AIResponseService()
 
@@ -40,7 +45,7 @@ def get_public_ai_response():
         return jsonify({"error": "Mesaj sağlanmadı"}), 400
     
     user_message = data['message']
-    force_refresh = data.get('force_refresh', True)
+    force_refresh = parse_bool(data.get('force_refresh'))
     timestamp = data.get('timestamp', '')
     
     # Demo finansal veriler
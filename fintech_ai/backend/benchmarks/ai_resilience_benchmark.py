@@ -0,0 +1,75 @@
+"""
+API kesintisinde AI yanıt gecikmesi: zaman aşımı, devre kesici ve yerel yedek yanıt
+
+Yerel sahte OpenAI sunucusu yanıt vermeden askıda kalırken (kesinti) eş
+zamanlı oturumların gecikmesi ölçülür: ilk çağrılar zaman aşımına uğrar,
+devre açıldıktan sonra istekler API'yi beklemeden yerel yanıt alır. Kesinti
+bitince devrenin yarı açık denemeyle kapandığı doğrulanır.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.ai_resilience_benchmark
+"""
+import os
+import time
+import copy
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from benchmarks.prompt_size_benchmark import DEMO_DATA
+
+def _measure(service, n_sessions, messages_per_session, stream=False):
+    def session(session_id):
+        latencies = []
+        for i in range(messages_per_session):
+            message = f"Oturum {session_id} soru {i}"
+            start = time.perf_counter()
+            if stream:
+                next(iter(service.stream_response(message, copy.deepcopy(DEMO_DATA))))
+            else:
+                service.get_response(message, copy.deepcopy(DEMO_DATA), user_id=session_id)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=n_sessions) as executor:
+        latencies = [latency for result in executor.map(session, range(n_sessions)) for latency in result]
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), max(latencies)
+
+def run(n_sessions=20, messages_per_session=10, timeout=1.0, outage_delay=30.0, reset_timeout=2.0):
+    os.environ['AI_CACHE_ENABLED'] = 'false'
+    os.environ.setdefault('OPENAI_API_KEY', 'test')
+    os.environ['AI_TIMEOUT'] = str(timeout)
+    os.environ['AI_BREAKER_RESET'] = str(reset_timeout)
+    from services.ai_response_service import AIResponseService
+    from services.financial_advice_service import FinancialAdviceService
+
+    with FakeOpenAIServer(first_token_delay=0.2, token_interval=0.0) as server:
+        # api/advice.py'deki gibi tavsiye servisi uygulama açılışında oluşturulur
+        service = AIResponseService(base_url=server.base_url, advice_service=FinancialAdviceService())
+
+        p50, p99, worst = _measure(service, n_sessions, 1)
+        print(f"Normal: p50 {p50:.2f} sn, p99 {p99:.2f} sn")
+
+        # Kesinti: API {outage_delay} sn boyunca yanıt vermez
+        server.first_token_delay = outage_delay
+        print(f"Kesinti (API {outage_delay:.0f} sn askıda, zaman aşımı {timeout:.1f} sn, "
+              f"{n_sessions} oturum x {messages_per_session} mesaj):")
+        for label, stream in (('tam yanıt', False), ('akış, ilk parça', True)):
+            stats_before = service.cache_stats()
+            p50, p99, worst = _measure(service, n_sessions, messages_per_session, stream=stream)
+            stats = service.cache_stats()
+            print(f"  {label}: p50 {p50 * 1000:.0f} ms, p99 {p99:.2f} sn, en kötü {worst:.2f} sn, "
+                  f"API hatası {stats['api_failures'] - stats_before['api_failures']}, "
+                  f"yedek yanıt {stats['fallbacks'] - stats_before['fallbacks']}")
+        print(f"  Devre kesici: {service.circuit_breaker.stats()}")
+
+        # Kesinti biter; yarı açık deneme başarılı olunca devre kapanır
+        server.first_token_delay = 0.2
+        time.sleep(reset_timeout)
+        response = service.get_response('Kesinti sonrası soru', copy.deepcopy(DEMO_DATA))
+        print(f"Kesinti sonrası: devre {service.circuit_breaker.state}, yanıt: {response[:45]}...")
+
+    print("Örnek yedek yanıt:")
+    print(service._fallback_response(copy.deepcopy(DEMO_DATA), '14:05:09'))
+
+if __name__ == '__main__':
+    run()
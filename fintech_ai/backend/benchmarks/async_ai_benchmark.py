@@ -0,0 +1,70 @@
+"""
+200 eş zamanlı sohbet oturumunda AI yanıt yolu verimi
+
+Yerel sahte OpenAI sunucusuna karşı üç durum ölçülür:
+- Senkron gunicorn işçileri: her istek bir işçiyi API çağrısı boyunca
+  bloklar (eş zamanlılık işçi sayısıyla sınırlı)
+- gthread + AsyncAIClient: istek iş parçacıkları paylaşılan olay döngüsündeki
+  çağrıları bekler (eş zamanlılık semaforla sınırlı)
+- Aynı anda sorulan aynı soru: birleştirme sayesinde üst çağrı sayısı
+
+Kullanım (backend dizininden):
+    python -m benchmarks.async_ai_benchmark
+"""
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+def _run_sessions(service, n_sessions, messages_per_session, workers, same_question=False):
+    def session(session_id):
+        latencies = []
+        for i in range(messages_per_session):
+            message = 'Bu ay ne kadar harcadım?' if same_question else f"Oturum {session_id} soru {i}"
+            start = time.perf_counter()
+            service.get_response(message, user_id=None if same_question else session_id)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = [latency for result in executor.map(session, range(n_sessions)) for latency in result]
+    elapsed = time.perf_counter() - start
+
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def run(n_sessions=200, messages_per_session=3, sync_workers=4, threads=200,
+        first_token_delay=0.3, token_interval=0.005):
+    # Önbellek ölçümü etkilemesin; her istek API'ye gitmeli
+    os.environ['AI_CACHE_ENABLED'] = 'false'
+    os.environ.setdefault('OPENAI_API_KEY', 'test')
+    from services.ai_response_service import AIResponseService
+
+    with FakeOpenAIServer(first_token_delay=first_token_delay, token_interval=token_interval) as server:
+        os.environ['AI_ASYNC_ENABLED'] = 'false'
+        sync_service = AIResponseService(base_url=server.base_url)
+
+        os.environ['AI_ASYNC_ENABLED'] = 'true'
+        os.environ.setdefault('AI_MAX_CONCURRENCY', '64')
+        async_service = AIResponseService(base_url=server.base_url)
+
+        api_s = first_token_delay + token_interval * (len(server.tokens()) - 1)
+        print(f"{n_sessions} oturum x {messages_per_session} mesaj, sahte API süresi {api_s * 1000:.0f} ms")
+
+        throughput, p50, p99 = _run_sessions(sync_service, n_sessions, messages_per_session, sync_workers)
+        print(f"  Senkron ({sync_workers} işçi): {throughput:6.1f} yanıt/sn, p50 {p50:.2f} sn, p99 {p99:.2f} sn")
+
+        throughput, p50, p99 = _run_sessions(async_service, n_sessions, messages_per_session, threads)
+        print(f"  gthread + AsyncAIClient ({threads} iş parçacığı, semafor "
+              f"{async_service.async_client.max_concurrency}): {throughput:6.1f} yanıt/sn, "
+              f"p50 {p50:.2f} sn, p99 {p99:.2f} sn")
+
+        calls_before = async_service.async_client.upstream_calls
+        _run_sessions(async_service, n_sessions, 1, threads, same_question=True)
+        upstream = async_service.async_client.upstream_calls - calls_before
+        print(f"  Aynı anda {n_sessions} kez sorulan aynı soru: {upstream} üst çağrı "
+              f"({async_service.async_client.coalesced_calls} birleştirildi)")
+
+if __name__ == '__main__':
+    run()
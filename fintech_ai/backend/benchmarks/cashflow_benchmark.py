@@ -0,0 +1,61 @@
+"""
+CashflowService.analyze_cashflow performans ölçümü
+
+Kullanım (backend dizininden):
+    python -m benchmarks.cashflow_benchmark
+"""
+import time
+import numpy as np
+import pandas as pd
+from services.cashflow_service import CashflowService
+
+def _make_monthly_data(n_months, rng):
+    """Rastgele aylık gelir/gider sözlükleri üretir"""
+    months = [f"{2000 + i // 12}-{i % 12 + 1:02d}" for i in range(n_months)]
+    income = rng.normal(20000, 4000, n_months).round(2)
+    expense = rng.normal(15000, 3000, n_months).round(2)
+    return dict(zip(months, income.tolist())), dict(zip(months, expense.tolist()))
+
+def _loc_fill_frame(income_data, expense_data):
+    """Eski yöntem: boş object DataFrame'i ay ay .loc ile doldurma (karşılaştırma için)"""
+    months = sorted(list(set(income_data.keys()) | set(expense_data.keys())))
+    cashflow_df = pd.DataFrame(index=months, columns=['income', 'expense', 'net', 'cumulative'])
+    for month in months:
+        cashflow_df.loc[month, 'income'] = income_data.get(month, 0)
+        cashflow_df.loc[month, 'expense'] = expense_data.get(month, 0)
+    cashflow_df['net'] = cashflow_df['income'] - cashflow_df['expense']
+    cashflow_df['cumulative'] = cashflow_df['net'].cumsum()
+    return cashflow_df
+
+def _timeit(func, repeat):
+    """Fonksiyonun çağrı başına ortalama süresini (ms) döndürür"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def run():
+    service = CashflowService()
+    rng = np.random.default_rng(42)
+
+    print("Ay sayısı | .loc ile doldurma (ms) | analyze_cashflow (ms)")
+    for n_months in (12, 120, 1200):
+        income_data, expense_data = _make_monthly_data(n_months, rng)
+        repeat = max(3, 3000 // n_months)
+
+        loc_ms = _timeit(lambda: _loc_fill_frame(income_data, expense_data), repeat)
+        analyze_ms = _timeit(lambda: service.analyze_cashflow(income_data, expense_data, 10000), repeat)
+
+        print(f"{n_months:9d} | {loc_ms:22.3f} | {analyze_ms:21.3f}")
+
+    # 10.000 kullanıcı x 12 ay (gece çalışan toplu analiz senaryosu)
+    users = [_make_monthly_data(12, rng) for _ in range(10000)]
+    start = time.perf_counter()
+    for income_data, expense_data in users:
+        service.analyze_cashflow(income_data, expense_data, 10000)
+    elapsed = time.perf_counter() - start
+
+    print(f"10.000 kullanıcı x 12 ay: {elapsed:.2f} sn ({elapsed / len(users) * 1e6:.1f} µs/kullanıcı)")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,37 @@
+"""
+CashflowRiskEngine toplu risk taraması performans ölçümü
+
+Kullanım (backend dizininden):
+    python -m benchmarks.cashflow_risk_benchmark
+"""
+import time
+import numpy as np
+from services.cashflow_risk_engine import CashflowRiskEngine
+
+def run(n_users=100000, n_months=12):
+    rng = np.random.default_rng(42)
+    engine = CashflowRiskEngine()
+
+    income = rng.normal(20000, 6000, (n_users, n_months)).clip(min=0)
+    expense = rng.normal(18000, 5000, (n_users, n_months)).clip(min=0)
+    income_mask = rng.random((n_users, n_months)) < 0.95
+    expense_mask = rng.random((n_users, n_months)) < 0.95
+    balances = rng.normal(15000, 10000, n_users)
+    user_ids = np.arange(n_users)
+
+    start = time.perf_counter()
+    evaluation = engine.evaluate(income, expense, balances, income_mask=income_mask, expense_mask=expense_mask)
+    evaluate_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = engine.build_alerts(user_ids, evaluation)
+    build_s = time.perf_counter() - start
+
+    print(f"{n_users} kullanıcı x {n_months} ay")
+    print(f"  Kural değerlendirme: {evaluate_s:.3f} sn")
+    print(f"  Uyarı satırları ({len(rows)} adet): {build_s:.3f} sn")
+    for risk_type in engine.RISK_TYPES:
+        print(f"  {risk_type}: {int(evaluation[risk_type]['flags'].sum())}")
+
+if __name__ == '__main__':
+    run()
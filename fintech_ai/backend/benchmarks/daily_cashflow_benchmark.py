@@ -0,0 +1,97 @@
+"""
+DailyCashflowService toplu günlük bakiye özetlerinin performans ölçümü
+
+Sentetik işlemler (her kullanıcı için aylık maaş, kira ve fatura ile
+rastgele günlere dağılmış harcamalar) üzerinde kullanıcı başına günlük
+bakiye özetleri; pandas ile kullanıcı başına yeniden örnekleme
+(resample + cumsum) yapan yaklaşımla karşılaştırılır.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.daily_cashflow_benchmark
+"""
+import time
+import datetime
+import numpy as np
+import pandas as pd
+from services.daily_cashflow_service import DailyCashflowService
+
+def _synthetic_transactions(rng, n_users, start, n_days, spend_per_month=12):
+    """Kullanıcı, tarih ve tutar paralel dizileri"""
+    n_months = n_days // 30
+    users = []
+    offsets = []
+    amounts = []
+
+    for day, amount in ((0, -20000.0), (4, 7000.0), (14, 1500.0)):
+        # Maaş (giriş), kira ve fatura: her ay aynı gün, kullanıcıya göre ölçeklenmiş
+        scale = rng.lognormal(0, 0.3, n_users)
+        month_days = np.arange(n_months) * 30 + day
+        users.append(np.repeat(np.arange(n_users), n_months))
+        offsets.append(np.tile(month_days, n_users))
+        amounts.append(np.repeat(scale * amount, n_months))
+
+    n_spend = n_users * n_months * spend_per_month
+    users.append(rng.integers(0, n_users, n_spend))
+    offsets.append(rng.integers(0, n_days, n_spend))
+    amounts.append(rng.lognormal(5, 1, n_spend))
+
+    dates = np.datetime64(start, 'D') + np.concatenate(offsets).astype('timedelta64[D]')
+    return np.concatenate(users), dates, np.concatenate(amounts)
+
+def _pandas_summaries(user_ids, dates, amounts, start, end, opening_balances, threshold):
+    """Kullanıcı başına pandas ile günlük bakiye ve özet (karşılaştırma için)"""
+    df = pd.DataFrame({'user_id': user_ids, 'date': dates, 'amount': amounts})
+    days = pd.date_range(start, end, freq='D')
+    summaries = {}
+    for user_id, group in df.groupby('user_id'):
+        daily = (-group.set_index('date')['amount']).resample('D').sum().reindex(days, fill_value=0)
+        balance = opening_balances.get(user_id, 0) + daily.cumsum()
+        summaries[user_id] = {
+            'min_balance': float(balance.min()),
+            'days_below_threshold': int((balance < threshold).sum())
+        }
+    return summaries
+
+def run(n_users=10000, years=5, pandas_users=500):
+    rng = np.random.default_rng(42)
+    service = DailyCashflowService()
+
+    start = datetime.date(2020, 1, 1)
+    end = start + datetime.timedelta(days=365 * years - 1)
+    n_days = (end - start).days + 1
+
+    user_ids, dates, amounts = _synthetic_transactions(rng, n_users, start, n_days)
+    opening_balances = dict(enumerate(rng.normal(15000, 10000, n_users).tolist()))
+
+    print(f"{n_users} kullanıcı x {years} yıl ({n_days} gün), {len(amounts)} işlem")
+
+    start_time = time.perf_counter()
+    summaries = service.summarize_daily_balances_batch(
+        user_ids, dates, amounts, start, end, opening_balances=opening_balances
+    )
+    batch_s = time.perf_counter() - start_time
+    print(f"  Toplu (bincount + cumsum, 2000 kullanıcılık parçalar): {batch_s:.2f} sn")
+
+    # pandas yaklaşımı kullanıcıların bir alt kümesinde ölçülüp ölçeklenir
+    subset = user_ids < pandas_users
+    start_time = time.perf_counter()
+    reference = _pandas_summaries(
+        user_ids[subset], dates[subset], amounts[subset], start, end,
+        opening_balances, service.low_balance_threshold
+    )
+    pandas_s = (time.perf_counter() - start_time) * n_users / pandas_users
+    print(f"  Kullanıcı başına pandas (tahmini, {pandas_users} kullanıcıdan ölçeklenmiş): {pandas_s:.2f} sn")
+    print(f"  Hızlanma: {pandas_s / batch_s:.0f}x")
+
+    mismatches = sum(
+        1 for user_id, expected in reference.items()
+        if abs(summaries[user_id]['min_balance'] - expected['min_balance']) > 1e-6
+        or summaries[user_id]['days_below_threshold'] != expected['days_below_threshold']
+    )
+    print(f"  Sonuç farkı olan kullanıcı: {mismatches} / {len(reference)}")
+
+    negative = sum(1 for summary in summaries.values() if summary['first_negative_date'])
+    print(f"  Bakiyesi negatife düşen kullanıcı: {negative}")
+
+if __name__ == '__main__':
+    run()
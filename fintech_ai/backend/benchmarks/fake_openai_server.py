@@ -0,0 +1,173 @@
+"""
+Yerel, OpenAI uyumlu sahte sohbet API sunucusu
+
+/v1/chat/completions isteğine sabit bir Türkçe yanıtı normal (tek JSON)
+veya akışlı (Server-Sent Events) olarak döndürür. İlk parçadan önceki
+gecikme ve parçalar arası süre ayarlanabilir; istemci akışı yarıda
+keserse iptal sayısı artar. Ağ erişimi ve API anahtarı gerektirmez.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.fake_openai_server --port 8001
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=test flask run
+"""
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = (
+    "Bu ay toplam harcamanız gelirinizin altında kaldı. En yüksek gider kalemi market "
+    "harcamaları; market bütçenizin %92'sini kullandınız. Ay sonuna kadar market "
+    "harcamalarınızı haftalık 800 TL ile sınırlamanızı ve tasarruf oranınızı %30 "
+    "hedefine yaklaştırmak için faturalarınızı gözden geçirmenizi öneririm."
+)
+
+class FakeOpenAIServer:
+    """Arka planda çalışan sahte OpenAI sohbet API sunucusu"""
+
+    def __init__(self, host='127.0.0.1', port=0, response_text=DEFAULT_RESPONSE,
+                 first_token_delay=0.4, token_interval=0.02):
+        """
+        Args:
+            host (str): Dinlenecek adres
+            port (int): Dinlenecek port (0: boş port seçilir)
+            response_text (str): Döndürülecek yanıt
+            first_token_delay (float): İlk parçadan önceki bekleme (saniye)
+            token_interval (float): Parçalar arası bekleme (saniye)
+        """
+        self.response_text = response_text
+        self.first_token_delay = first_token_delay
+        self.token_interval = token_interval
+
+        self.requests = 0
+        self.cancelled_streams = 0
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def tokens(self):
+        """Yanıtı kelime parçalarına böler (boşluklar parçada kalır)"""
+        words = self.response_text.split(' ')
+        return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self.send_error(404)
+                    return
+
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                server._count('requests')
+
+                if body.get('stream'):
+                    self._stream(body)
+                else:
+                    self._complete(body)
+
+            def _complete(self, body):
+                tokens = server.tokens()
+                time.sleep(server.first_token_delay + server.token_interval * (len(tokens) - 1))
+
+                payload = json.dumps({
+                    'id': 'chatcmpl-fake',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': body.get('model', 'fake'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': server.response_text},
+                        'finish_reason': 'stop'
+                    }],
+                    'usage': {'prompt_tokens': 0, 'completion_tokens': len(tokens), 'total_tokens': len(tokens)}
+                }, ensure_ascii=False).encode('utf-8')
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+
+                try:
+                    time.sleep(server.first_token_delay)
+                    for i, token in enumerate(server.tokens()):
+                        if i:
+                            time.sleep(server.token_interval)
+                        self._send_chunk(body, {'content': token}, None)
+                    self._send_chunk(body, {}, 'stop')
+                    self.wfile.write(b'data: [DONE]\n\n')
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    server._count('cancelled_streams')
+
+            def _send_chunk(self, body, delta, finish_reason):
+                chunk = {
+                    'id': 'chatcmpl-fake',
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': body.get('model', 'fake'),
+                    'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+
+        return Handler
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sahte OpenAI sohbet API sunucusu')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--first-token-delay', type=float, default=0.4)
+    parser.add_argument('--token-interval', type=float, default=0.02)
+    args = parser.parse_args()
+
+    fake_server = FakeOpenAIServer(
+        port=args.port, first_token_delay=args.first_token_delay, token_interval=args.token_interval
+    )
+    print(f"Sahte OpenAI sunucusu: {fake_server.base_url}")
+    try:
+        fake_server._server.serve_forever()
+    except KeyboardInterrupt:
+        fake_server.stop()
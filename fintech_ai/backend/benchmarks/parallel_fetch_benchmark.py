@@ -0,0 +1,58 @@
+"""
+Tavsiye endpointlerindeki bağımsız sorguların sıralı ve paralel çalıştırılması
+
+Uzak PostgreSQL'i taklit etmek için her sorgu ağ gidiş-dönüş süresi (RTT)
+ve sunucu süresi kadar bekler; FinancialContextBuilder'ın beş sorgusu
+(kullanıcı, gider ve gelir toplamları, bütçeler, hedefler) sıralı ve
+run_parallel ile çalıştırılarak istek süresinin p50/p99 değerleri ölçülür.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.parallel_fetch_benchmark
+"""
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from utils.concurrency import run_parallel
+
+QUERIES = ['user', 'expenses', 'incomes', 'budgets', 'goals']
+
+# Sorgu başına sunucu süresi (ms): gruplanmış toplamlar diğerlerinden yavaş
+SERVER_MS = {'user': 0.5, 'expenses': 4.0, 'incomes': 2.0, 'budgets': 0.5, 'goals': 0.5}
+
+def _make_tasks(rng, rtt_ms):
+    delays = {
+        name: (rtt_ms + SERVER_MS[name]) * rng.lognormal(0, 0.25) / 1000
+        for name in QUERIES
+    }
+    return {name: (lambda delay=delay: time.sleep(delay)) for name, delay in delays.items()}
+
+def _sequential(tasks):
+    return {name: task() for name, task in tasks.items()}
+
+def _measure(fetch, rtt_ms, n_requests, clients, seed=42):
+    rng = np.random.default_rng(seed)
+    task_sets = [_make_tasks(rng, rtt_ms) for _ in range(n_requests)]
+
+    def timed(tasks):
+        start = time.perf_counter()
+        fetch(tasks)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        latencies = np.array(list(executor.map(timed, task_sets)))
+
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def run(rtts_ms=(1, 10, 25), n_requests=300, clients=(1, 4)):
+    for n_clients in clients:
+        print(f"{n_clients} eşzamanlı istemci, {n_requests} istek")
+        for rtt_ms in rtts_ms:
+            seq_p50, seq_p99 = _measure(_sequential, rtt_ms, n_requests, n_clients)
+            par_p50, par_p99 = _measure(run_parallel, rtt_ms, n_requests, n_clients)
+            print(
+                f"  RTT {rtt_ms:>3} ms | sıralı p50 {seq_p50:6.1f} ms p99 {seq_p99:6.1f} ms"
+                f" | paralel p50 {par_p50:6.1f} ms p99 {par_p99:6.1f} ms"
+            )
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,119 @@
+"""
+Prompt boyutu ölçümü: eski girintili JSON prompt'u ile PromptBuilder karşılaştırması
+
+Demo finansal veri ve çok kategorili bir kullanıcı için istek başına giriş
+token sayısı, iki farklı saatte oluşturulan prompt'ların ortak (sağlayıcı
+tarafında önbelleğe alınabilir) önek uzunluğu ve prompt oluşturma süresi
+raporlanır. tiktoken kurulu değilse token sayısı karakter/4 ile tahmin edilir.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.prompt_size_benchmark
+"""
+import json
+import time
+from services.prompt_builder import PromptBuilder
+
+SYSTEM_MESSAGE = """
+        Sen Fintech AI asistanısın. Kullanıcıların finansal sorularına yardımcı olmak için bulunan, bilgili ve 
+        profesyonel bir finansal danışmansın. Türkçe yanıt verirsin. Kullanıcıların finansal verilerini analiz eder, 
+        mali kararlarında onlara yardımcı olursun ve finansal durumlarını iyileştirmek için kişiselleştirilmiş 
+        öneriler sunarsın. Kısa ve öz yanıtlar vermeye çalış ancak gerektiğinde detaylı bilgi de sağla.
+        
+        Şu konularda bilgi verebilirsin:
+        - Bütçe planlama ve yönetimi
+        - Harcama analizi ve kategorizasyonu
+        - Tasarruf stratejileri ve hedefleri
+        - Borç yönetimi ve azaltma
+        - Vergi planlaması ve optimizasyonu
+        - Yatırım stratejileri ve portföy çeşitlendirme
+        - Finansal sağlık değerlendirmesi
+        - Nakit akışı yönetimi
+        - Emeklilik planlaması
+        - İşletme finansmanı (KOBİ'ler için)
+        
+        Eğer kesin bir cevap veremiyorsan ya da daha fazla bilgiye ihtiyacın varsa, bunu belirt ve 
+        kullanıcıdan ek bilgi iste.
+        """
+
+DEMO_DATA = {
+    'user': {'name': 'Demo Kullanıcı', 'company': 'Demo Şirket'},
+    'current_month': 'Mart 2023',
+    'monthly_income': 13500,
+    'monthly_expenses': 10000,
+    'savings': 3500,
+    'savings_rate': 25.925925925925927,
+    'current_balance': 25000,
+    'expense_categories': {'Market': 3500, 'Faturalar': 2200, 'Ulaşım': 1800, 'Eğlence': 1500, 'Sağlık': 1000},
+    'budgets': {
+        'Market': {'limit': 3800, 'used': 3500, 'remaining': 300, 'status': 'Dikkat'},
+        'Faturalar': {'limit': 2500, 'used': 2200, 'remaining': 300, 'status': 'İyi'},
+        'Ulaşım': {'limit': 2000, 'used': 1800, 'remaining': 200, 'status': 'İyi'}
+    },
+    'goals': [
+        {'name': 'Acil Durum Fonu', 'target': 15000, 'current': 10000, 'progress': 66.66666666666667, 'deadline': None},
+        {'name': 'Tatil Fonu', 'target': 6000, 'current': 2500, 'progress': 41.666666666666664, 'deadline': '2023-07-01'}
+    ]
+}
+
+def many_categories_data(n_categories=25):
+    data = json.loads(json.dumps(DEMO_DATA))
+    data['expense_categories'] = {
+        f"Kategori {i:02d}": round(4000 / (i + 1) + 0.37 * i, 4) for i in range(n_categories)
+    }
+    return data
+
+def legacy_messages(message, financial_data, current_time):
+    """Önceki _build_messages çıktısı"""
+    messages = [
+        {"role": "system", "content": SYSTEM_MESSAGE + f"\n\nYanıtını oluştururken şu anki zamanı kullan: {current_time}"}
+    ]
+    financial_context = f"""
+            Kullanıcının finansal verileri aşağıdadır:
+            {json.dumps(financial_data, ensure_ascii=False, indent=2)}
+            
+            Bu verileri kullanarak yanıtını kişiselleştir. Her yanıtında finansal verilerin güncel olduğunu belirt.
+            """
+    messages.append({"role": "system", "content": financial_context})
+    messages.append({"role": "user", "content": message})
+    return messages
+
+def with_volatile(data, current_time):
+    data = dict(data, last_updated=current_time, last_expense_time='3 dakika önce')
+    return data
+
+def common_prefix(a, b):
+    a, b = json.dumps(a, ensure_ascii=False), json.dumps(b, ensure_ascii=False)
+    n = 0
+    while n < min(len(a), len(b)) and a[n] == b[n]:
+        n += 1
+    return n, len(a)
+
+def run(n_builds=2000):
+    builder = PromptBuilder(SYSTEM_MESSAGE)
+    message = 'Bu ay ne kadar harcadım?'
+    counter = 'tiktoken' if builder.encoding is not None else 'karakter/4 tahmini'
+    print(f"Token sayımı: {counter}")
+
+    for label, data in (('Demo veri (5 kategori)', DEMO_DATA), ('25 kategorili kullanıcı', many_categories_data())):
+        first, second = with_volatile(data, '14:05:09'), with_volatile(data, '14:05:41')
+
+        old = builder.count_tokens(legacy_messages(message, first, '14:05:09'))
+        new = builder.count_tokens(builder.build(message, first, '14:05:09'))
+
+        old_prefix, old_len = common_prefix(
+            legacy_messages(message, first, '14:05:09'), legacy_messages(message, second, '14:05:41')
+        )
+        new_prefix, new_len = common_prefix(
+            builder.build(message, first, '14:05:09'), builder.build(message, second, '14:05:41')
+        )
+
+        print(f"  {label}: {old} -> {new} token ({1 - new / old:.0%} daha az)")
+        print(f"    İki istek arasında ortak önek: eski {old_prefix / old_len:.0%}, yeni {new_prefix / new_len:.0%}")
+
+    start = time.perf_counter()
+    for _ in range(n_builds):
+        builder.count_tokens(builder.build(message, with_volatile(DEMO_DATA, '14:05:09'), '14:05:09'))
+    print(f"  Prompt oluşturma + sayım süresi: {(time.perf_counter() - start) / n_builds * 1e6:.0f} µs")
+
+if __name__ == '__main__':
+    run()
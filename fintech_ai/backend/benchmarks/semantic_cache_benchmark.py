@@ -0,0 +1,184 @@
+"""
+Anlamsal önbellek eşik ayarı ve isabet oranı ölçümü
+
+Her niyet için bir soru önbelleğe yazılır; aynı niyetin farklı ifadeleri
+doğru yanıtı bulmalı, başka niyetlerin soruları ise eşiği geçmemelidir.
+Ayrıca sadece dönem, kategori veya olumsuzluk bakımından farklı, kelimeleri
+neredeyse aynı soru çiftleri (yakın ıskalar) hiçbir eşikte eşleşmemelidir.
+Eşik taraması yanlış isabet vermeyen en düşük eşiği ve bu eşikteki isabet
+oranını, arama süresini ve kazanılan API süresini raporlar.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.semantic_cache_benchmark
+"""
+import time
+import numpy as np
+from services.semantic_cache import SemanticCache
+
+# niyet -> [önbelleğe yazılan soru, aynı anlamdaki ifadeler...]
+INTENTS = {
+    'monthly_spending': [
+        'bu ay ne kadar harcadım',
+        'bu ayki harcamalarım ne kadar',
+        'bu ay toplam harcamam ne kadar?',
+        'Bu ay ne kadar para harcadım',
+        'bu ayın harcamaları ne kadar tuttu',
+    ],
+    'monthly_income': [
+        'bu ay ne kadar gelir elde ettim',
+        'bu ayki gelirim ne kadar',
+        'bu ay toplam gelirim ne kadar?',
+        'Bu ayın geliri ne kadar',
+    ],
+    'budget_status': [
+        'bütçe durumum nasıl',
+        'bütçemin durumu nedir',
+        'Bütçe durumum ne?',
+        'bütçemde durum nasıl',
+    ],
+    'market_budget': [
+        'market bütçemi aştım mı',
+        'market bütçesini aşmış mıyım',
+        'market için bütçemi aştım mı?',
+    ],
+    'tax_deduction': [
+        'hangi harcamalarım vergiden düşülebilir',
+        'vergiden düşebileceğim harcamalar neler',
+        'vergiden düşülebilen harcamalarım hangileri',
+    ],
+    'savings_advice': [
+        'nasıl daha fazla tasarruf edebilirim',
+        'tasarruf etmek için ne yapmalıyım',
+        'daha çok tasarruf etmenin yolları neler',
+        'tasarruflarımı nasıl artırabilirim',
+    ],
+    'emergency_fund': [
+        'acil durum fonum yeterli mi',
+        'acil durum fonum yeterli midir',
+        'acil durum fonu ne kadar olmalı',
+    ],
+    'goal_progress': [
+        'tatil fonu hedefime ne kadar kaldı',
+        'tatil fonu hedefimde ne durumdayım',
+        'tatil hedefime ulaşmam için ne kadar kaldı',
+    ],
+    'cashflow_forecast': [
+        'gelecek ay nakit akışım nasıl olacak',
+        'önümüzdeki ay nakit akışı tahmini nedir',
+        'gelecek ayın nakit akışı tahmini',
+    ],
+    'invoices_spending': [
+        'faturalara ne kadar ödedim',
+        'faturalar için ne kadar harcadım',
+        'fatura ödemelerim ne kadar',
+    ],
+    'transport_spending': [
+        'ulaşıma ne kadar harcadım',
+        'ulaşım harcamalarım ne kadar',
+        'ulaşım için ne kadar para harcadım',
+    ],
+    'debt_reduction': [
+        'borcumu nasıl azaltırım',
+        'borçlarımı azaltmak için ne yapmalıyım',
+        'borç azaltma stratejisi önerir misin',
+    ],
+    'investment': [
+        'hangi yatırım bana uygun',
+        'bana uygun yatırım stratejisi nedir',
+        'yatırım için ne önerirsin',
+    ],
+}
+
+# (önbellekteki soru, farklı yanıt gerektiren benzer soru)
+NEAR_MISSES = [
+    # dönem
+    ('bu ay ne kadar harcadım', 'geçen ay ne kadar harcadım'),
+    ('geçen ay ne kadar harcadım', 'geçen yıl ne kadar harcadım'),
+    ('bu ayki gelirim ne kadar', 'geçen ayki gelirim ne kadar'),
+    ('bu hafta ne kadar harcadım', 'bu ay ne kadar harcadım'),
+    ('ocak ayında ne kadar harcadım', 'şubat ayında ne kadar harcadım'),
+    ('gelecek ay nakit akışım nasıl olacak', 'geçen ay nakit akışım nasıl oldu'),
+    # kategori
+    ('market harcamam ne kadar', 'kira harcamam ne kadar'),
+    ('market bütçemi aştım mı', 'eğlence bütçemi aştım mı'),
+    ('ulaşıma ne kadar harcadım', 'faturalara ne kadar harcadım'),
+    ('bu ay markete ne kadar harcadım', 'bu ay restorana ne kadar harcadım'),
+    # olumsuzluk
+    ('ne kadar harcadım', 'ne kadar harcamamalıyım'),
+    ('bütçemi aştım mı', 'bütçemi aşmadım mı'),
+    ('faturalarımı ödedim mi', 'hangi faturalarımı ödemedim'),
+    ('kredi kartı kullanmalı mıyım', 'kredi kartı kullanmamalı mıyım'),
+]
+
+def run(api_latency_s=2.0):
+    cache = SemanticCache(threshold=0.0)
+    scope = 'user:1:bench'
+
+    for intent, messages in INTENTS.items():
+        cache.store(scope, messages[0], intent)
+
+    paraphrases = [(intent, message) for intent, messages in INTENTS.items() for message in messages[1:]]
+    # Aynı niyetin ifadeleri yerine sadece başka niyetlerin soruları önbellekte olsaydı
+    # eşleşmemeleri gerekir: her ifade kendi niyetinin girdisi olmadan da aranır
+    unseen_cache = {}
+    for intent in INTENTS:
+        other = SemanticCache(threshold=0.0)
+        for other_intent, messages in INTENTS.items():
+            if other_intent != intent:
+                other.store(scope, messages[0], other_intent)
+        unseen_cache[intent] = other
+
+    positive_scores = []
+    for intent, message in paraphrases:
+        response, similarity = cache.lookup(scope, message)
+        positive_scores.append(similarity if response == intent else -similarity)
+
+    negative_scores = [
+        unseen_cache[intent].lookup(scope, message)[1] for intent, message in paraphrases
+    ]
+
+    near_miss_scores = []
+    for cached, message in NEAR_MISSES:
+        pair_cache = SemanticCache(threshold=0.0)
+        pair_cache.store(scope, cached, cached)
+        near_miss_scores.append(pair_cache.lookup(scope, message)[1])
+
+    positive_scores = np.array(positive_scores)
+    near_miss_scores = np.array(near_miss_scores)
+    negative_scores = np.concatenate([negative_scores, near_miss_scores])
+
+    print(f"{len(INTENTS)} niyet, {len(paraphrases)} farklı ifade, {len(NEAR_MISSES)} yakın ıska")
+    print("  eşik | isabet oranı | yanlış isabet | yakın ıska isabeti")
+    for threshold in np.arange(0.30, 0.85, 0.05):
+        hits = (positive_scores >= threshold).mean()
+        false_hits = (negative_scores >= threshold).mean()
+        near_hits = (near_miss_scores >= threshold).mean()
+        print(f"  {threshold:.2f} | {hits:12.0%} | {false_hits:13.0%} | {near_hits:18.0%}")
+
+    safe = [t for t in np.arange(0.30, 0.95, 0.01) if (negative_scores >= t).sum() == 0]
+    threshold = safe[0] if safe else 0.95
+    hit_rate = (positive_scores >= threshold).mean()
+
+    # Arama süresi (64 yanıtlık dolu bir dizinde)
+    full = SemanticCache(threshold=threshold)
+    for i in range(64):
+        full.store(scope, f"{paraphrases[i % len(paraphrases)][1]} {i}", str(i))
+    start = time.perf_counter()
+    for _, message in paraphrases * 20:
+        full.lookup(scope, message)
+    lookup_s = (time.perf_counter() - start) / (len(paraphrases) * 20)
+
+    default_threshold = SemanticCache().threshold
+    print(f"Varsayılan eşik ({default_threshold:.2f}): isabet oranı {(positive_scores >= default_threshold).mean():.0%}, "
+          f"yanlış isabet {(negative_scores >= default_threshold).mean():.0%}")
+    print(f"Yanlış isabet vermeyen en düşük eşik: {threshold:.2f}")
+    print(f"  İsabet oranı: {hit_rate:.0%}")
+    print(f"  En yüksek yanlış benzerlik: {negative_scores.max():.3f}")
+    print(f"  Arama süresi (gömme dahil, 64 yanıt): {lookup_s * 1e6:.0f} µs")
+    print(
+        f"  API süresi {api_latency_s:.1f} sn kabulüyle ifade başına kazanılan ortalama süre: "
+        f"{hit_rate * api_latency_s - lookup_s:.2f} sn"
+    )
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,61 @@
+"""
+Akışlı (stream=True) ve tam yanıt yollarının ilk parça süresi ölçümü
+
+Yerel sahte OpenAI sunucusuna karşı AIResponseService.get_response ve
+stream_response çağrılır. Kullanıcının beklediği süre tam yanıtta toplam
+süre, akışta ise ilk parçanın gelme süresidir (TTFT). Ayrıca akış yarıda
+kapatıldığında üst akışın da iptal edildiği doğrulanır.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.streaming_benchmark
+"""
+import os
+import time
+import numpy as np
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+def run(n_requests=10, first_token_delay=0.4, token_interval=0.02):
+    # Önbellek ölçümü etkilemesin
+    os.environ['AI_CACHE_ENABLED'] = 'false'
+    os.environ.setdefault('OPENAI_API_KEY', 'test')
+    from services.ai_response_service import AIResponseService
+
+    with FakeOpenAIServer(first_token_delay=first_token_delay, token_interval=token_interval) as server:
+        service = AIResponseService(base_url=server.base_url)
+
+        full_latencies = []
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            service.get_response('Bu ay ne kadar harcadım?')
+            full_latencies.append(time.perf_counter() - start)
+
+        first_token_latencies = []
+        stream_latencies = []
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            first_token = None
+            for _ in service.stream_response('Bu ay ne kadar harcadım?'):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+            first_token_latencies.append(first_token)
+            stream_latencies.append(time.perf_counter() - start)
+
+        # İstemci bağlantıyı kesince (üreteç kapanınca) üst akış da kapanmalı
+        cancelled_before = server.cancelled_streams
+        tokens = service.stream_response('Bu ay ne kadar harcadım?')
+        for _, _ in zip(range(3), tokens):
+            pass
+        tokens.close()
+        time.sleep(5 * token_interval + 0.2)
+        cancelled = server.cancelled_streams - cancelled_before
+
+        n_tokens = len(server.tokens())
+
+    print(f"Sahte sunucu: ilk parça {first_token_delay * 1000:.0f} ms, {n_tokens} parça x {token_interval * 1000:.0f} ms")
+    print(f"  Tam yanıt:   kullanıcının beklediği p50 {np.median(full_latencies) * 1000:.0f} ms")
+    print(f"  Akışlı yanıt: ilk parça p50 {np.median(first_token_latencies) * 1000:.0f} ms, "
+          f"tamamı p50 {np.median(stream_latencies) * 1000:.0f} ms")
+    print(f"  Yarıda kapatılan akış üst akışı iptal etti: {'evet' if cancelled else 'hayır'}")
+
+if __name__ == '__main__':
+    run()
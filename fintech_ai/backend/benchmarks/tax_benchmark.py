@@ -0,0 +1,33 @@
+"""
+TaxEstimationService gelir vergisi hesabı performans ölçümü
+
+Kullanım (backend dizininden):
+    python -m benchmarks.tax_benchmark
+"""
+import time
+import numpy as np
+from services.tax_estimation_service import TaxEstimationService
+
+def run(n_users=1000000, n_scalar=20000):
+    rng = np.random.default_rng(42)
+    service = TaxEstimationService()
+
+    incomes = rng.lognormal(12, 0.8, n_users)
+    deductions = rng.uniform(0, 20000, n_users)
+
+    start = time.perf_counter()
+    for income, deduction in zip(incomes[:n_scalar].tolist(), deductions[:n_scalar].tolist()):
+        service.calculate_income_tax(income, deduction)
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = service.calculate_income_tax_array(incomes, deductions)
+    array_s = time.perf_counter() - start
+
+    print(f"Tekil hesap ({n_scalar} kullanıcı): {scalar_s:.3f} sn "
+          f"(~{scalar_s / n_scalar * n_users:.1f} sn / {n_users} kullanıcı)")
+    print(f"Dizi hesabı ({n_users} kullanıcı): {array_s:.3f} sn")
+    print(f"Toplam vergi: {result['total_tax'].sum():,.0f} TL")
+
+if __name__ == '__main__':
+    run()
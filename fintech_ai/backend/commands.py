@@ -0,0 +1,173 @@
+import click
+
+def register_commands(app):
+    """Uygulamaya bakım ve toplu iş komutlarını ekler (flask <komut>)"""
+
+    @app.cli.command('cashflow-scan')
+    @click.option('--months', default=12, show_default=True, help='Taranacak ay sayısı')
+    def cashflow_scan(months):
+        """Tüm kullanıcılar için nakit akışı risk taraması yapar ve uyarıları kaydeder"""
+        from services.cashflow_risk_engine import CashflowRiskEngine
+
+        summary = CashflowRiskEngine().scan_all_users(months=months)
+
+        click.echo(f"Taranan kullanıcı: {summary['users_scanned']}")
+        click.echo(f"Tespit edilen uyarı: {summary['alerts_detected']} (yeni kaydedilen: {summary['alerts_written']})")
+        for risk_type, count in summary['by_type'].items():
+            click.echo(f"  {risk_type}: {count}")
+
+    @app.cli.command('tax-forecast')
+    @click.option('--months', default=12, show_default=True, help='Geçmiş veri ay sayısı')
+    @click.option('--horizon', default=3, show_default=True, help='Tahmin edilecek ay sayısı')
+    def tax_forecast(months, horizon):
+        """Tüm kullanıcıların gelecek dönem vergi yükümlülüğünü toplu olarak tahmin eder"""
+        import datetime
+        from services.cashflow_risk_engine import CashflowRiskEngine
+        from services.tax_estimation_service import TaxEstimationService
+
+        today = datetime.date.today()
+        start_index = today.year * 12 + today.month - months
+        start_date = datetime.date(start_index // 12, start_index % 12 + 1, 1)
+
+        data = CashflowRiskEngine().load_monthly_matrix(start_date, today)
+        forecast = TaxEstimationService().forecast_tax_liability_batch(
+            data['income'], data['expense'], data['months'], months_ahead=horizon,
+            income_mask=data['income_mask'], expense_mask=data['expense_mask']
+        )
+
+        totals = forecast['total_estimated_tax']
+        click.echo(f"Kullanıcı: {len(data['user_ids'])}")
+        click.echo(f"Dönem: {forecast['months'][0]} - {forecast['months'][-1]}" if horizon > 0 else "Dönem: -")
+        click.echo(f"Vergi yükümlülüğü olan kullanıcı: {int((totals > 0).sum())}")
+        click.echo(f"Toplam tahmini vergi: {totals.sum():.2f} TL")
+
+    @app.cli.command('tax-positions-rebuild')
+    @click.option('--year', type=int, default=None, help='Sadece bu vergi yılı')
+    @click.option('--user-id', type=int, default=None, help='Sadece bu kullanıcı')
+    def tax_positions_rebuild(year, user_id):
+        """Vergi pozisyonlarını işlemlerden yeniden oluşturur"""
+        from services.tax_position_service import TaxPositionService
+
+        written = TaxPositionService().rebuild(user_id=user_id, tax_year=year)
+
+        click.echo(f"Yeniden oluşturulan vergi pozisyonu: {written}")
+
+    @app.cli.command('tax-positions-verify')
+    @click.option('--year', type=int, default=None, help='Sadece bu vergi yılı')
+    @click.option('--user-id', type=int, default=None, help='Sadece bu kullanıcı')
+    @click.option('--tolerance', default=0.01, show_default=True, help='Kabul edilen tutar farkı (TL)')
+    def tax_positions_verify(year, user_id, tolerance):
+        """Saklanan vergi pozisyonlarını işlemlerle karşılaştırır (uyuşmazlıkta çıkış kodu 1)"""
+        from services.tax_position_service import TaxPositionService
+
+        mismatches = TaxPositionService().verify(user_id=user_id, tax_year=year, tolerance=tolerance)
+
+        for mismatch in mismatches:
+            click.echo(f"Kullanıcı {mismatch['user_id']} / {mismatch['tax_year']}:")
+            for field, values in mismatch['differences'].items():
+                click.echo(f"  {field}: beklenen {values['expected']}, saklanan {values['stored']}")
+
+        click.echo(f"Uyuşmayan vergi pozisyonu: {len(mismatches)}")
+        if mismatches:
+            raise SystemExit(1)
+
+    @app.cli.command('health-scores')
+    @click.option('--months', default=12, show_default=True, help='Kullanılacak ay sayısı')
+    def health_scores(months):
+        """Tüm kullanıcıların finansal sağlık skorlarını toplu olarak hesaplar"""
+        import numpy as np
+        from services.financial_advice_service import FinancialAdviceService
+
+        service = FinancialAdviceService()
+        inputs = service.load_health_inputs(months=months)
+        result = service.analyze_financial_health_batch(
+            inputs['annual_income'], inputs['annual_expense'], inputs['balance'],
+            inputs['debt'], inputs['income_growth']
+        )
+
+        click.echo(f"Kullanıcı: {len(inputs['user_ids'])}")
+        for field in ('health_category', 'financial_profile'):
+            names, counts = np.unique(result[field], return_counts=True)
+            for name, count in zip(names.tolist(), counts.tolist()):
+                click.echo(f"  {name}: {count}")
+
+    @app.cli.command('train-peer-segments')
+    @click.option('--months', default=12, show_default=True, help='Metrikler için kullanılacak ay sayısı')
+    @click.option('--chunk-size', default=10000, show_default=True, help='Bir seferde işlenen kullanıcı sayısı')
+    def train_peer_segments(months, chunk_size):
+        """Akran segmentasyon modelini tüm kullanıcılar üzerinde eğitir"""
+        from services.financial_advice_service import FinancialAdviceService
+
+        try:
+            result = FinancialAdviceService().train_peer_segments(months=months, chunk_size=chunk_size)
+        except ValueError as e:
+            click.echo(str(e))
+            raise SystemExit(1)
+
+        if result['status'] != 'success':
+            click.echo(result['message'])
+            raise SystemExit(1)
+
+        click.echo(f"Eğitilen kullanıcı: {result['n_samples']}, segment: {result['n_clusters']}")
+        click.echo(f"Segment büyüklükleri: {result['cluster_sizes']}")
+
+    @app.cli.command('train-income-models')
+    @click.option('--months', default=36, show_default=True, help='Eğitimde kullanılacak ay sayısı')
+    def train_income_models(months):
+        """Ortak gelir tahmin modellerini tüm kullanıcıların aylık gelirleriyle eğitir"""
+        import datetime
+        import numpy as np
+        from services.cashflow_risk_engine import CashflowRiskEngine
+        from services.income_prediction_service import IncomePredictionService
+
+        today = datetime.date.today()
+        start_index = today.year * 12 + today.month - months
+        start_date = datetime.date(start_index // 12, start_index % 12 + 1, 1)
+
+        data = CashflowRiskEngine().load_monthly_matrix(start_date, today)
+
+        # Modeller tek bir seri üzerinde eğitilir: her ay geliri olan kullanıcıların ortalama geliri
+        earners = data['income_mask'].sum(axis=0)
+        totals = np.where(data['income_mask'], data['income'], 0).sum(axis=0)
+        income_data = {
+            month: float(total / count)
+            for month, total, count in zip(data['months'], totals.tolist(), earners.tolist())
+            if count > 0
+        }
+
+        if len(income_data) < 6:
+            click.echo("Eğitim için en az 6 aylık gelir verisi gerekli")
+            raise SystemExit(1)
+
+        result = IncomePredictionService().train_models(income_data)
+
+        if result['status'] != 'success':
+            click.echo(result['message'])
+            raise SystemExit(1)
+
+        click.echo(f"Eğitimde kullanılan ay: {len(income_data)}, kullanıcı: {len(data['user_ids'])}")
+        for name, value in result['metrics'].items():
+            click.echo(f"  {name}: {value}")
+
+    @app.cli.command('daily-cashflow-scan')
+    @click.option('--months', default=12, show_default=True, help='Taranacak ay sayısı')
+    @click.option('--chunk-size', default=2000, show_default=True, help='Bir seferde işlenen kullanıcı sayısı')
+    def daily_cashflow_scan(months, chunk_size):
+        """Tüm kullanıcıların günlük bakiyelerini çıkarır ve ay içi nakit sıkışıklıklarını raporlar"""
+        import datetime
+        from services.daily_cashflow_service import DailyCashflowService
+
+        service = DailyCashflowService()
+
+        today = datetime.date.today()
+        start_index = today.year * 12 + today.month - months
+        start_date = datetime.date(start_index // 12, start_index % 12 + 1, 1)
+
+        summaries = service.summarize_all_users(start_date, today, chunk_size=chunk_size)
+
+        negative = [user_id for user_id, summary in summaries.items() if summary['first_negative_date']]
+        below = [user_id for user_id, summary in summaries.items() if summary['days_below_threshold'] > 0]
+
+        click.echo(f"Taranan kullanıcı: {len(summaries)} ({start_date} - {today})")
+        click.echo(f"Bakiyesi en az bir gün {service.low_balance_threshold} TL altına düşen kullanıcı: {len(below)}")
+        click.echo(f"Bakiyesi en az bir gün negatife düşen kullanıcı: {len(negative)}")
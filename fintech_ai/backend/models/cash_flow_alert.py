@@ -0,0 +1,41 @@
+from app import db
+from sqlalchemy.sql import func
+
+class CashFlowAlert(db.Model):
+    """Kullanıcıya gösterilen nakit akışı risk uyarılarını temsil eden model"""
+    __tablename__ = 'cash_flow_alerts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    
+    # Uyarı bilgileri (CashflowService.detect_cashflow_risks çıktısı ile aynı alanlar)
+    alert_type = db.Column(db.String(50), nullable=False)  # low_balance, negative_cashflow, ...
+    severity = db.Column(db.String(20), nullable=False)  # critical, high, medium
+    message = db.Column(db.String(255), nullable=False)
+    details = db.Column(db.Text, nullable=True)
+    
+    # Uyarının kaynağı: 'batch_scan' (toplu tarama), 'stream' (işlem bazlı) vb.
+    source = db.Column(db.String(30), nullable=True)
+    
+    is_read = db.Column(db.Boolean, default=False)
+    is_resolved = db.Column(db.Boolean, default=False)
+    
+    # Zaman damgaları
+    created_at = db.Column(db.DateTime, nullable=False, default=func.now())
+    
+    def __repr__(self):
+        return f'<CashFlowAlert {self.id}: {self.alert_type} for user {self.user_id}>'
+    
+    def to_dict(self):
+        """Uyarıyı API yanıtı için sözlüğe dönüştürür"""
+        return {
+            'id': self.id,
+            'type': self.alert_type,
+            'severity': self.severity,
+            'message': self.message,
+            'details': self.details,
+            'source': self.source,
+            'is_read': self.is_read,
+            'is_resolved': self.is_resolved,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
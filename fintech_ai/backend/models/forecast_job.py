@@ -0,0 +1,46 @@
+import json
+from app import db
+
+class ForecastJob(db.Model):
+    """Arka planda çalışan gelir tahmini işlerini ve sonuçlarını temsil eden model"""
+    __tablename__ = 'forecast_jobs'
+    __table_args__ = (
+        db.Index('ix_forecast_jobs_user_status', 'user_id', 'status'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    # İş girdisi: gelir verisi ve tahmin süresinin içerik özeti
+    data_key = db.Column(db.String(64), nullable=False)
+    months = db.Column(db.Integer, nullable=False, default=6)
+
+    # queued, running, completed, failed, cancelled, timeout
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)  # JSON: predict_future_income çıktısı
+
+    # Zaman damgaları (işçiler arasında süre sınırı bu alanlardan hesaplanır)
+    submitted_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<ForecastJob {self.id}: {self.status} for user {self.user_id}>'
+
+    @property
+    def result_data(self):
+        """Kaydedilmiş tahmin sonucunu sözlük olarak döndürür"""
+        return json.loads(self.result) if self.result else None
+
+    def to_dict(self):
+        """İşin dışarıya açılan durum bilgisini hazırlar"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'months': self.months,
+            'error': self.error,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,29 @@
+from app import db
+from sqlalchemy.sql import func
+
+class TaxPosition(db.Model):
+    """Kullanıcının vergi yılı içindeki gelir, kategori bazlı gider ve KDV matrahı toplamları"""
+    __tablename__ = 'tax_positions'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'tax_year', name='uq_tax_positions_user_year'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    tax_year = db.Column(db.Integer, nullable=False)
+    
+    # Yıl başından beri toplamlar (işlemler geldikçe artımlı güncellenir)
+    total_income = db.Column(db.Float, nullable=False, default=0.0)
+    total_expense = db.Column(db.Float, nullable=False, default=0.0)
+    category_amounts = db.Column(db.Text, nullable=False, default='{}')  # JSON: {"Sağlık": 1200.0, ...}
+    vat_amounts = db.Column(db.Text, nullable=False, default='{}')  # JSON: {"standard": 5400.0, ...}
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Zaman damgaları
+    created_at = db.Column(db.DateTime, nullable=False, default=func.now())
+    updated_at = db.Column(db.DateTime, nullable=False, default=func.now(), onupdate=func.now())
+    # İşlemlerden son tam yeniden oluşturma zamanı (artımlı oluşturulan pozisyonda boş)
+    rebuilt_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<TaxPosition user {self.user_id} / {self.tax_year}>'
@@ -13,6 +13,9 @@ class User(db.Model):
     business_type = db.Column(db.String(50), nullable=True)
     phone = db.Column(db.String(20), nullable=True)
     
+    # Güncel nakit bakiyesi (nakit akışı analizleri ve risk taramaları için)
+    current_balance = db.Column(db.Float, nullable=False, default=0.0)
+    
     # Plaid API entegrasyonu için
     plaid_access_token = db.Column(db.String(256), nullable=True)
     plaid_item_id = db.Column(db.String(256), nullable=True)
@@ -29,6 +32,7 @@ class User(db.Model):
     transactions = db.relationship('Transaction', backref='user', lazy=True, cascade='all, delete-orphan')
     income_predictions = db.relationship('IncomePrediction', backref='user', lazy=True, cascade='all, delete-orphan')
     tax_estimates = db.relationship('TaxEstimate', backref='user', lazy=True, cascade='all, delete-orphan')
+    tax_positions = db.relationship('TaxPosition', backref='user', lazy=True, cascade='all, delete-orphan')
     cash_flow_alerts = db.relationship('CashFlowAlert', backref='user', lazy=True, cascade='all, delete-orphan')
     financial_advice = db.relationship('FinancialAdvice', backref='user', lazy=True, cascade='all, delete-orphan')
     
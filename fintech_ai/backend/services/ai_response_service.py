@@ -1,10 +1,20 @@
 import os
+import re
 import json
+import hashlib
+import time
+import threading
+import unicodedata
 import openai
 from openai import OpenAI
 import traceback
 from datetime import datetime
 from dotenv import load_dotenv
+from services.snapshot_cache import create_cache_backend
+from services.semantic_cache import SemanticCache
+from services.async_ai_client import AsyncAIClient
+from services.prompt_builder import PromptBuilder
+from utils.circuit_breaker import CircuitBreaker
 
 # .env dosyasından API anahtarını yükle
 load_dotenv()
@@ -12,19 +22,75 @@ load_dotenv()
 class AIResponseService:
     """
     OpenAI API kullanarak chatbot için yanıtlar üreten servis sınıfı.
+    
+    Yanıtlar boyutu sınırlı, TTL'li bir LRU önbellekte tutulur. Anahtar;
+    kullanıcı kapsamı, normalize edilmiş mesaj ve finansal verinin kararlı
+    özetinden oluşur. Böylece aynı veride aynı soru tekrar ücretli API
+    çağrısı yapmaz, farklı kullanıcıların yanıtları birbirine karışmaz.
+    Birebir eşleşme yoksa aynı kapsamda anlamca benzer bir sorunun yanıtı
+    anlamsal önbellekte aranır ("bu ay ne kadar harcadım" / "bu ayki
+    harcamalarım ne kadar").
     """
     
-    def __init__(self):
+    # Her istekte değişen, yanıtın içeriğini etkilemeyen alanlar (önbellek anahtarına girmez)
+    VOLATILE_FIELDS = ('current_month', 'last_updated', 'last_expense_time')
+    
+    # Yanıtın başındaki "[HH:MM:SS] " zaman damgası (önbelleğe damgasız yazılır)
+    TIMESTAMP_PATTERN = re.compile(r'^\s*\[\d{2}:\d{2}:\d{2}\]\s*')
+    
+    def __init__(self, cache_size=None, cache_ttl=None, base_url=None, advice_service=None):
+        """
+        Args:
+            cache_size (int): Önbellekteki en fazla yanıt sayısı (varsayılan: AI_CACHE_SIZE veya 1000)
+            cache_ttl (int): Yanıtların önbellekte kalma süresi, saniye (varsayılan: AI_CACHE_TTL veya 900)
+            base_url (str): OpenAI uyumlu API adresi (varsayılan: OPENAI_BASE_URL veya OpenAI)
+            advice_service (FinancialAdviceService): Yedek yanıtlar için tavsiye servisi
+                (verilmezse ilk yedek yanıtta oluşturulur)
+        """
         # OpenAI API anahtarını çevre değişkenlerinden al
         self.api_key = os.environ.get('OPENAI_API_KEY')
+        self.base_url = base_url or os.environ.get('OPENAI_BASE_URL') or None
+        
+        # Model ayarları (tüm yanıt yollarında ortak)
+        self.model = "gpt-3.5-turbo-0125"  # Daha güvenilir ve stabil bir model versiyonu
+        self.max_tokens = 500
+        self.temperature = 0.7
+        
+        # Çağrı başına zaman aşımı (saniye) ve yeniden deneme sayısı: API yavaşladığında
+        # istekler gunicorn zaman aşımına kadar asılı kalmaz
+        self.timeout = float(os.environ.get('AI_TIMEOUT', 15))
+        self.max_retries = int(os.environ.get('AI_MAX_RETRIES', 0))
+        
         # API anahtarını ayarla
         try:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = OpenAI(
+                api_key=self.api_key, base_url=self.base_url,
+                timeout=self.timeout, max_retries=self.max_retries
+            )
             print(f"OpenAI API istemcisi başarıyla oluşturuldu. API anahtarı mevcut: {bool(self.api_key)}")
         except Exception as e:
             print(f"OpenAI istemcisi oluşturulurken hata: {str(e)}")
             self.client = None
         
+        # Tam yanıtlar paylaşılan olay döngüsündeki AsyncOpenAI ile alınır
+        # (AI_ASYNC_ENABLED=false ile senkron istemciye dönülür)
+        self.async_client = None
+        if os.environ.get('AI_ASYNC_ENABLED', 'true').lower() not in ('0', 'false', 'no'):
+            self.async_client = AsyncAIClient(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_concurrency=int(os.environ.get('AI_MAX_CONCURRENCY', 32)),
+                timeout=self.timeout,
+                max_retries=self.max_retries
+            )
+        
+        # Art arda hatalarda API çağrıları durdurulur ve yerel yedek yanıt döner
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get('AI_BREAKER_THRESHOLD', 5)),
+            reset_timeout=float(os.environ.get('AI_BREAKER_RESET', 30))
+        )
+        self._advice_service = advice_service
+        
         # Sistem mesajını tanımla
         self.system_message = """
         Sen Fintech AI asistanısın. Kullanıcıların finansal sorularına yardımcı olmak için bulunan, bilgili ve 
@@ -48,34 +114,60 @@ class AIResponseService:
         kullanıcıdan ek bilgi iste.
         """
         
-        # Tüm yanıtları önbellekten temizle
-        self.is_cache_enabled = False
-        # Önbellekleme için sözlük
-        self.response_cache = {}
+        # Kısa, kararlı sıralı prompt (değişken alanlar sonda, en yüksek N kategori)
+        self.prompt_builder = PromptBuilder(
+            self.system_message,
+            max_categories=int(os.environ.get('AI_PROMPT_MAX_CATEGORIES', 8)),
+            model=self.model
+        )
+        
+        # Yanıt önbelleği (AI_CACHE_ENABLED=false ile kapatılabilir)
+        self.is_cache_enabled = os.environ.get('AI_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+        self.cache_ttl = cache_ttl or int(os.environ.get('AI_CACHE_TTL', 900))
+        # SNAPSHOT_CACHE_URL tanımlıysa (Redis) yanıtlar işçiler arasında paylaşılır
+        self.response_cache = create_cache_backend(
+            max_entries=cache_size or int(os.environ.get('AI_CACHE_SIZE', 1000))
+        )
+        
+        # Anlamsal önbellek (AI_SEMANTIC_CACHE_ENABLED=false ile kapatılabilir)
+        semantic_enabled = os.environ.get('AI_SEMANTIC_CACHE_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+        self.semantic_cache = SemanticCache(
+            threshold=float(os.environ.get('AI_SEMANTIC_THRESHOLD', 0.57)),
+            ttl=self.cache_ttl
+        ) if semantic_enabled else None
         
-    def get_response(self, message, financial_data=None, force_refresh=True):
+        # Önbellek metrikleri
+        self._stats_lock = threading.Lock()
+        self._cache_stats = {
+            'hits': 0, 'semantic_hits': 0, 'misses': 0, 'bypassed': 0, 'stored': 0,
+            'api_calls': 0, 'api_seconds': 0.0, 'latency_saved_seconds': 0.0,
+            'prompts': 0, 'prompt_tokens': 0, 'api_failures': 0, 'fallbacks': 0
+        }
+        
+    def get_response(self, message, financial_data=None, force_refresh=False, user_id=None):
         """
         Kullanıcı mesajına yanıt üretir
         
         Args:
             message (str): Kullanıcı mesajı
             financial_data (dict): Kullanıcının finansal verileri (opsiyonel)
-            force_refresh (bool): Önbelleği zorla yenileme
+            force_refresh (bool): Önbelleği atlayıp yeni yanıt üret (yeni yanıt önbelleğe yazılır)
+            user_id: Yanıtın ait olduğu kullanıcı (None ise ortak/demo kapsamı)
             
         Returns:
             str: AI yanıtı
         """
         
-        # Daima güncel bilgi kullanılsın
-        force_refresh = True
-        
-        # Önbellek anahtarı oluştur
-        cache_key = f"{message}_{json.dumps(financial_data) if financial_data else 'no_data'}"
+        cached_response, cache_entry = self._lookup_cache(message, financial_data, user_id, force_refresh)
+        if cached_response is not None:
+            return cached_response
         
-        # Eğer önbellekleme etkinse ve mesaj önbellekte varsa ve yenileme zorunlu değilse
-        if not force_refresh and self.is_cache_enabled and cache_key in self.response_cache:
-            print(f"Önbellekten yanıt kullanılıyor: {message}")
-            return self.response_cache[cache_key]
+        # Eş zamanlı aynı sorular tek API çağrısını paylaşır (anahtar veri güncellenmeden önce alınır);
+        # yenileme istendiyse süren bir çağrının yanıtı kullanılmaz
+        if force_refresh:
+            request_key = None
+        else:
+            request_key = cache_entry['key'] if cache_entry else self.build_cache_key(message, financial_data, user_id)
         
         # Her seferinde güncel zamanı al
         current_time = datetime.now().strftime("%H:%M:%S")
@@ -89,72 +181,46 @@ class AIResponseService:
             if not self.client:
                 return f"[{current_time}] OpenAI istemcisi oluşturulamadı. Lütfen sistem yöneticinizle iletişime geçin."
             
-            # Finansal verilerde tarihleri güncelle
-            if financial_data:
-                # Mevcut ay ve zamanı güncelle 
-                financial_data['current_month'] = datetime.now().strftime('%B %Y')
-                financial_data['last_updated'] = current_time
-                
-                # Finans verilerinde başka tarih verileri varsa onları da güncelle
-                if 'expense_categories' in financial_data:
-                    # Demo harcamaları güncelleyelim: son veri 1-5 dakika öncesine ait olsun
-                    minutes_ago = datetime.now().minute % 5 + 1
-                    financial_data['last_expense_time'] = f"{minutes_ago} dakika önce"
-                    
-                    # Market harcamasını biraz değiştirelim (demo verinin güncel görünmesi için)
-                    if 'Market' in financial_data['expense_categories']:
-                        # Güncel hisse senedi fiyatı gibi değişken bir değer 
-                        import random
-                        variation = random.randint(-150, 150) # -150 TL ile +150 TL arası değişim
-                        financial_data['expense_categories']['Market'] = max(3350, 3500 + variation)
-                        
-                        # Bütçe durumunu da güncelle
-                        if 'budgets' in financial_data and 'Market' in financial_data['budgets']:
-                            market_expense = financial_data['expense_categories']['Market']
-                            market_budget = financial_data['budgets']['Market']
-                            market_budget['used'] = market_expense
-                            market_budget['remaining'] = market_budget['limit'] - market_expense
-                            market_budget['status'] = 'Dikkat' if market_budget['remaining'] < 300 else 'İyi'
-            
-            # Mesajları hazırla
-            messages = [
-                {"role": "system", "content": self.system_message + f"\n\nYanıtını oluştururken şu anki zamanı kullan: {current_time}"}
-            ]
-            
-            # Finansal veri varsa ekle
-            if financial_data:
-                financial_context = f"""
-                Kullanıcının finansal verileri aşağıdadır:
-                {json.dumps(financial_data, ensure_ascii=False, indent=2)}
-                
-                Bu verileri kullanarak yanıtını kişiselleştir. Her yanıtında finansal verilerin güncel olduğunu belirt.
-                """
-                messages.append({"role": "system", "content": financial_context})
+            # Devre açıksa API'yi beklemeden yerel yanıt döndür
+            if not self.circuit_breaker.allow():
+                print(f"AI devre kesicisi açık, yerel yanıt döndürülüyor: {message}")
+                return self._fallback_response(financial_data, current_time)
             
-            # Kullanıcı mesajını ekle
-            messages.append({"role": "user", "content": message})
+            messages = self._build_messages(message, financial_data, current_time)
             
             print(f"OpenAI API'ye istek gönderiliyor. Mesaj: {message}")
             
             # OpenAI API'sini çağır - yeni sürümle uyumlu
             try:
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo-0125",  # Daha güvenilir ve stabil bir model versiyonu
-                    messages=messages,
-                    max_tokens=500,
-                    temperature=0.7
-                )
-                
-                # OpenAI yanıtını al
-                ai_response = response.choices[0].message.content
+                api_start = time.perf_counter()
+                if self.async_client is not None:
+                    # Bekleme süresi kuyrukta geçen süreyi de kapsar
+                    ai_response = self.async_client.complete(
+                        request_key,
+                        timeout=self.timeout * (self.max_retries + 1),
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature
+                    )
+                else:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature
+                    )
+                    # OpenAI yanıtını al
+                    ai_response = response.choices[0].message.content
+                self._record_api_call(time.perf_counter() - api_start)
+                self.circuit_breaker.record_success()
                 
                 # Eğer yanıtta zaman damgası yoksa ekle
                 if not ai_response.strip().startswith("["):
                     ai_response = f"[{current_time}] {ai_response}"
                 
                 # Önbelleğe kaydet (eğer aktifse)
-                if self.is_cache_enabled:
-                    self.response_cache[cache_key] = ai_response
+                self._store_response(cache_entry, message, ai_response)
                 
                 print(f"API yanıtı başarıyla alındı: {ai_response[:50]}...")
                 
@@ -162,13 +228,396 @@ class AIResponseService:
                 return ai_response
                 
             except Exception as e:
-                error_msg = f"OpenAI API özel hatası: {str(e)}"
+                error_msg = f"OpenAI API özel hatası: {str(e) or type(e).__name__}"
                 print(error_msg)
                 print(f"Hata ayrıntıları: {traceback.format_exc()}")
-                return f"[{current_time}] Üzgünüm, yanıt üretirken teknik bir sorun oluştu. Lütfen daha sonra tekrar deneyin."
+                self._record_api_failure()
+                return self._fallback_response(financial_data, current_time)
             
         except Exception as e:
             # Hata durumunda bilgilendirici bir mesaj döndür
             print(f"OpenAI API genel hatası: {str(e)}")
             print(f"Hata ayrıntıları: {traceback.format_exc()}")
-            return f"[{current_time}] Üzgünüm, şu anda yanıt üretirken bir sorun yaşıyorum: {str(e)}. Lütfen daha sonra tekrar deneyin." 
\ No newline at end of file
+            return f"[{current_time}] Üzgünüm, şu anda yanıt üretirken bir sorun yaşıyorum: {str(e)}. Lütfen daha sonra tekrar deneyin." 
+    
+    def stream_response(self, message, financial_data=None, force_refresh=False, user_id=None):
+        """
+        Kullanıcı mesajının yanıtını API'den geldikçe parça parça üretir
+        
+        Önbellekteki yanıt tek parça olarak döner. Üreteç kapatılırsa (ör.
+        istemci bağlantıyı kestiğinde) API akışı da kapatılır ve yarım yanıt
+        önbelleğe yazılmaz.
+        
+        Args:
+            message (str): Kullanıcı mesajı
+            financial_data (dict): Kullanıcının finansal verileri (opsiyonel)
+            force_refresh (bool): Önbelleği atlayıp yeni yanıt üret
+            user_id: Yanıtın ait olduğu kullanıcı (None ise ortak/demo kapsamı)
+            
+        Yields:
+            str: Yanıt parçaları
+        """
+        cached_response, cache_entry = self._lookup_cache(message, financial_data, user_id, force_refresh)
+        if cached_response is not None:
+            yield cached_response
+            return
+        
+        current_time = datetime.now().strftime("%H:%M:%S")
+        print(f"Akışlı yanıt üretiliyor: {message} | Zaman: {current_time}")
+        
+        if not self.api_key:
+            yield f"[{current_time}] OpenAI API anahtarı bulunamadı. Lütfen sistem yöneticinizle iletişime geçin."
+            return
+        
+        if not self.client:
+            yield f"[{current_time}] OpenAI istemcisi oluşturulamadı. Lütfen sistem yöneticinizle iletişime geçin."
+            return
+        
+        if not self.circuit_breaker.allow():
+            print(f"AI devre kesicisi açık, yerel yanıt döndürülüyor: {message}")
+            yield self._fallback_response(financial_data, current_time)
+            return
+        
+        stream = None
+        parts = []
+        try:
+            messages = self._build_messages(message, financial_data, current_time)
+            
+            # Zaman aşımı bağlantı ve her parça okuması için ayrı ayrı uygulanır
+            # (ilk parça ve parçalar arası bekleme sınırlıdır)
+            api_start = time.perf_counter()
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                stream=True
+            )
+            
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if not token:
+                    continue
+                
+                # Eğer yanıtta zaman damgası yoksa ekle
+                if not parts and not token.lstrip().startswith("["):
+                    parts.append(f"[{current_time}] ")
+                    yield parts[0]
+                
+                parts.append(token)
+                yield token
+            
+            self._record_api_call(time.perf_counter() - api_start)
+            self.circuit_breaker.record_success()
+            self._store_response(cache_entry, message, ''.join(parts))
+            
+        except GeneratorExit:
+            print(f"İstemci bağlantıyı kapattı, API akışı iptal ediliyor: {message}")
+            if parts:
+                self.circuit_breaker.record_success()
+            raise
+        except Exception as e:
+            print(f"OpenAI API akış hatası: {str(e) or type(e).__name__}")
+            print(f"Hata ayrıntıları: {traceback.format_exc()}")
+            self._record_api_failure()
+            if parts:
+                # Yanıtın bir kısmı gönderildiyse yerine yedek yanıt konamaz
+                yield "\n\nÜzgünüm, yanıtın devamı alınamadı. Lütfen daha sonra tekrar deneyin."
+            else:
+                yield self._fallback_response(financial_data, current_time)
+        finally:
+            if stream is not None:
+                stream.close()
+    
+    def _fallback_response(self, financial_data, current_time):
+        """
+        API'ye ulaşılamadığında finansal veriden şablonlarla hızlı bir yanıt üretir
+        
+        Öncelikler ve özet FinancialAdviceService.generate_financial_advice ile
+        hesaplanır. Yedek yanıtlar önbelleğe yazılmaz.
+        
+        Args:
+            financial_data (dict): Kullanıcının finansal verileri (opsiyonel)
+            current_time (str): Yanıtta kullanılacak güncel zaman
+            
+        Returns:
+            str: Yerel yanıt
+        """
+        self._record('fallbacks')
+        unavailable = f"[{current_time}] AI asistanına şu anda ulaşılamıyor."
+        
+        if not financial_data or 'monthly_income' not in financial_data:
+            return f"{unavailable} Lütfen birkaç dakika sonra tekrar deneyin."
+        
+        try:
+            advice = self._local_advice(financial_data)
+        except Exception as e:
+            print(f"Yerel finansal tavsiye üretilemedi: {str(e)}")
+            return f"{unavailable} Lütfen birkaç dakika sonra tekrar deneyin."
+        
+        income = financial_data.get('monthly_income') or 0
+        expenses = financial_data.get('monthly_expenses') or 0
+        lines = [
+            f"{unavailable} Finansal verilerinize göre kısa bir özet:",
+            advice['summary'],
+            f"Bu ay geliriniz {income:.2f} TL, giderleriniz {expenses:.2f} TL."
+        ]
+        
+        expense_categories = financial_data.get('expense_categories') or {}
+        if expense_categories:
+            category, amount = max(expense_categories.items(), key=lambda item: item[1] or 0)
+            lines.append(f"En yüksek gider kaleminiz {category} ({amount:.2f} TL).")
+        
+        budgets = financial_data.get('budgets') or {}
+        warnings = [category for category, budget in budgets.items() if budget.get('status') == 'Dikkat']
+        if warnings:
+            lines.append(f"Sınırına yaklaştığınız bütçeler: {', '.join(warnings)}.")
+        
+        for priority in advice['priorities']:
+            lines.append(f"- {priority['title']}: {priority['description']}")
+        
+        lines.append("Ayrıntılı yanıt için birkaç dakika sonra tekrar deneyin.")
+        return '\n'.join(lines)
+    
+    def _local_advice(self, financial_data):
+        """Aylık gelir, gider ve bakiyeden kural tabanlı finansal tavsiye üretir"""
+        from services.financial_advice_service import FinancialAdviceService
+        
+        if self._advice_service is None:
+            self._advice_service = FinancialAdviceService()
+        
+        income = financial_data.get('monthly_income') or 0
+        expenses = financial_data.get('monthly_expenses') or 0
+        financial_health = self._advice_service.analyze_financial_health(
+            {'annual': income * 12}, {'annual': expenses * 12}, financial_data.get('current_balance') or 0
+        )
+        
+        return self._advice_service.generate_financial_advice(
+            financial_health,
+            expense_categories=financial_data.get('expense_categories')
+        )
+    
+    def _lookup_cache(self, message, financial_data, user_id, force_refresh):
+        """
+        Yanıtı birebir ve anlamsal önbellekte arar
+        
+        Önbellek anahtarları, finansal veri _build_messages ile güncellenmeden
+        önce oluşturulmalıdır.
+        
+        Returns:
+            tuple: (önbellekteki yanıt veya None, _store_response için önbellek girdisi)
+        """
+        if not self.is_cache_enabled:
+            return None, None
+        
+        cache_entry = {
+            'key': self.build_cache_key(message, financial_data, user_id),
+            'scope': self.cache_scope(financial_data, user_id),
+            'vector': None
+        }
+        
+        if force_refresh:
+            self._record('bypassed')
+            return None, cache_entry
+        
+        cached_response = self.response_cache.get(cache_entry['key'])
+        if cached_response is not None:
+            self._record_hit('hits')
+            print(f"Önbellekten yanıt kullanılıyor: {message}")
+            return self._with_timestamp(cached_response), cache_entry
+        
+        if self.semantic_cache is not None:
+            cache_entry['vector'] = self.semantic_cache.embedder.embed(message)
+            cached_response, similarity = self.semantic_cache.lookup(
+                cache_entry['scope'], message, cache_entry['vector']
+            )
+            if cached_response is not None:
+                self._record_hit('semantic_hits')
+                # Aynı ifade tekrar sorulursa birebir önbellekten gelsin
+                self.response_cache.set(cache_entry['key'], cached_response, ttl=self.cache_ttl)
+                print(f"Anlamsal önbellekten yanıt kullanılıyor ({similarity:.2f}): {message}")
+                return self._with_timestamp(cached_response), cache_entry
+        
+        self._record('misses')
+        return None, cache_entry
+    
+    def _store_response(self, cache_entry, message, ai_response):
+        """Başarılı API yanıtını birebir ve anlamsal önbelleğe yazar"""
+        if cache_entry is None:
+            return
+        
+        # Zaman damgası önbellekten dönerken güncel saatle yeniden eklenir
+        ai_response = self.TIMESTAMP_PATTERN.sub('', ai_response, count=1)
+        self.response_cache.set(cache_entry['key'], ai_response, ttl=self.cache_ttl)
+        if self.semantic_cache is not None:
+            self.semantic_cache.store(cache_entry['scope'], message, ai_response, cache_entry['vector'])
+        self._record('stored')
+    
+    def _with_timestamp(self, cached_response):
+        """Önbellekteki yanıtın başına güncel zaman damgasını ekler"""
+        current_time = datetime.now().strftime("%H:%M:%S")
+        return f"[{current_time}] {self.TIMESTAMP_PATTERN.sub('', cached_response, count=1)}"
+    
+    def _build_messages(self, message, financial_data, current_time):
+        """
+        API'ye gönderilecek mesaj listesini hazırlar (finansal verideki zaman alanlarını günceller)
+        
+        Returns:
+            list: Sohbet mesajları
+        """
+        # Finansal verilerde tarihleri güncelle
+        if financial_data:
+            # Mevcut ay ve zamanı güncelle 
+            financial_data['current_month'] = datetime.now().strftime('%B %Y')
+            financial_data['last_updated'] = current_time
+            
+            # Finans verilerinde başka tarih verileri varsa onları da güncelle
+            if 'expense_categories' in financial_data:
+                # Demo harcamaları güncelleyelim: son veri 1-5 dakika öncesine ait olsun
+                minutes_ago = datetime.now().minute % 5 + 1
+                financial_data['last_expense_time'] = f"{minutes_ago} dakika önce"
+                
+                # Market harcamasını biraz değiştirelim (demo verinin güncel görünmesi için)
+                if 'Market' in financial_data['expense_categories']:
+                    # Güncel hisse senedi fiyatı gibi değişken bir değer 
+                    import random
+                    variation = random.randint(-150, 150) # -150 TL ile +150 TL arası değişim
+                    financial_data['expense_categories']['Market'] = max(3350, 3500 + variation)
+                    
+                    # Bütçe durumunu da güncelle
+                    if 'budgets' in financial_data and 'Market' in financial_data['budgets']:
+                        market_expense = financial_data['expense_categories']['Market']
+                        market_budget = financial_data['budgets']['Market']
+                        market_budget['used'] = market_expense
+                        market_budget['remaining'] = market_budget['limit'] - market_expense
+                        market_budget['status'] = 'Dikkat' if market_budget['remaining'] < 300 else 'İyi'
+        
+        # Mesajları hazırla: sabit sistem mesajı önde, değişken alanlar sonda
+        messages = self.prompt_builder.build(message, financial_data, current_time)
+        self._record_prompt_tokens(self.prompt_builder.count_tokens(messages))
+        
+        return messages
+    
+    def build_cache_key(self, message, financial_data=None, user_id=None):
+        """
+        Yanıt önbelleği anahtarını oluşturur
+        
+        Args:
+            message (str): Kullanıcı mesajı
+            financial_data (dict): Finansal veriler (opsiyonel)
+            user_id: Kullanıcı kimliği (None ise ortak kapsam)
+            
+        Returns:
+            str: 'ai-response:kapsam:veri özeti:mesaj özeti' biçiminde anahtar (önek, paylaşılan
+                 Redis'te diğer önbelleklerin anahtarlarından ayırır)
+        """
+        message_digest = hashlib.sha256(self.normalize_message(message).encode('utf-8')).hexdigest()[:32]
+        
+        return f"ai-response:{self.cache_scope(financial_data, user_id)}:{message_digest}"
+    
+    def cache_scope(self, financial_data=None, user_id=None):
+        """
+        Kullanıcı ve finansal veri sürümünü belirten önbellek kapsamı
+        
+        Returns:
+            str: 'kapsam:veri özeti' biçiminde kapsam
+        """
+        scope = f"user:{user_id}" if user_id is not None else 'public'
+        
+        return f"{scope}:{self.financial_data_digest(financial_data)}"
+    
+    def normalize_message(self, message):
+        """
+        Mesajı önbellek karşılaştırması için normalize eder (Türkçe küçük harf,
+        tekil boşluk, sondaki noktalama işaretleri olmadan)
+        """
+        text = unicodedata.normalize('NFC', str(message))
+        # str.lower() Türkçe I/İ harflerini doğru çevirmez
+        text = text.replace('I', 'ı').replace('İ', 'i').lower()
+        text = re.sub(r'\s+', ' ', text).strip()
+        return text.rstrip(' ?!.,;:')
+    
+    def financial_data_digest(self, financial_data):
+        """
+        Finansal verinin kararlı özeti (anahtar sırasından, değişken zaman
+        alanlarından ve kayan nokta gürültüsünden bağımsız)
+        """
+        if not financial_data:
+            return 'no_data'
+        
+        relevant = {
+            key: value for key, value in financial_data.items()
+            if key not in self.VOLATILE_FIELDS
+        }
+        canonical = json.dumps(
+            self._canonical(relevant), sort_keys=True, ensure_ascii=False,
+            separators=(',', ':'), default=str
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+    
+    def cache_stats(self):
+        """
+        Önbellek metrikleri
+        
+        Returns:
+            dict: Birebir ve anlamsal isabet, ıskalama, atlanan ve yazılan yanıt
+                  sayıları, isabet oranları, önbellekten yanıtla kazanılan tahmini
+                  API süresi, istek başına ortalama giriş token sayısı, API hata ve
+                  yedek yanıt sayıları, devre kesici durumu ve önbellek boyutu
+        """
+        with self._stats_lock:
+            stats = dict(self._cache_stats)
+        
+        lookups = stats['hits'] + stats['semantic_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['semantic_hits']) / lookups if lookups else 0.0
+        stats['semantic_hit_rate'] = stats['semantic_hits'] / lookups if lookups else 0.0
+        stats['avg_api_seconds'] = stats['api_seconds'] / stats['api_calls'] if stats['api_calls'] else 0.0
+        stats['avg_prompt_tokens'] = stats['prompt_tokens'] / stats['prompts'] if stats['prompts'] else 0.0
+        # Redis arka ucunda boyut bilinmez
+        stats['size'] = len(self.response_cache) if hasattr(self.response_cache, '__len__') else None
+        stats['semantic_scopes'] = len(self.semantic_cache) if self.semantic_cache is not None else 0
+        stats['enabled'] = self.is_cache_enabled
+        stats['circuit_breaker'] = self.circuit_breaker.stats()
+        
+        return stats
+    
+    def _canonical(self, value):
+        """Sayıları kuruşa yuvarlar; iç içe yapıları aynı biçime getirir"""
+        if isinstance(value, bool) or value is None:
+            return value
+        if isinstance(value, (int, float)):
+            return round(float(value), 2)
+        if isinstance(value, dict):
+            return {str(key): self._canonical(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._canonical(item) for item in value]
+        return value
+    
+    def _record(self, event):
+        with self._stats_lock:
+            self._cache_stats[event] += 1
+    
+    def _record_hit(self, event):
+        """İsabeti kaydeder; kazanılan süre ortalama API süresiyle tahmin edilir"""
+        with self._stats_lock:
+            self._cache_stats[event] += 1
+            if self._cache_stats['api_calls']:
+                self._cache_stats['latency_saved_seconds'] += (
+                    self._cache_stats['api_seconds'] / self._cache_stats['api_calls']
+                )
+    
+    def _record_api_call(self, seconds):
+        with self._stats_lock:
+            self._cache_stats['api_calls'] += 1
+            self._cache_stats['api_seconds'] += seconds
+    
+    def _record_prompt_tokens(self, tokens):
+        with self._stats_lock:
+            self._cache_stats['prompts'] += 1
+            self._cache_stats['prompt_tokens'] += tokens
+    
+    def _record_api_failure(self):
+        self._record('api_failures')
+        self.circuit_breaker.record_failure()
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from openai import AsyncOpenAI
+
+class AsyncAIClient:
+    """
+    OpenAI çağrılarını tek bir paylaşılan olay döngüsünde yürüten istemci.
+
+    İşlevler:
+    - AsyncOpenAI çağrıları arka plandaki tek bir olay döngüsü iş parçacığında
+      çalışır; istek iş parçacıkları sadece sonucu bekler, ağ bağlantıları
+      tek bir bağlantı havuzunda paylaşılır
+    - Aynı anda yapılabilecek API çağrısı sayısı global bir semafor ile sınırlanır
+    - Aynı anahtarla süren bir çağrı varsa yeni çağrı yapılmaz; eş zamanlı
+      aynı istekler tek üst çağrının sonucunu paylaşır
+    """
+
+    def __init__(self, api_key=None, base_url=None, max_concurrency=32, timeout=None, max_retries=2):
+        """
+        Args:
+            api_key (str): OpenAI API anahtarı
+            base_url (str): OpenAI uyumlu API adresi (opsiyonel)
+            max_concurrency (int): Aynı anda yapılabilecek en fazla API çağrısı
+            timeout (float): Üst çağrı başına zaman aşımı, saniye (None: istemci varsayılanı)
+            max_retries (int): Üst çağrının en fazla yeniden deneme sayısı
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._in_flight = {}
+        self._start_lock = threading.Lock()
+
+    def complete(self, key, timeout=None, **params):
+        """
+        Sohbet tamamlama isteğini olay döngüsünde çalıştırır ve yanıt metnini bekler
+
+        Args:
+            key (str): Birleştirme anahtarı (aynı anahtarlı eş zamanlı istekler tek çağrı yapar;
+                None ise istek birleştirilmez ve her zaman yeni çağrı yapılır)
+            timeout (float): En fazla bekleme süresi (saniye)
+            **params: chat.completions.create parametreleri (model, messages, ...)
+
+        Returns:
+            str: Yanıt metni
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._coalesced(key, params), loop)
+
+        try:
+            return future.result(timeout=timeout)
+        except BaseException:
+            # Bekleyen iptal edilir; paylaşılan üst çağrı diğer bekleyenler için sürer
+            future.cancel()
+            raise
+
+    def stats(self):
+        """Üst çağrı, birleştirilen çağrı ve süren çağrı sayıları"""
+        return {
+            'upstream_calls': self.upstream_calls,
+            'coalesced_calls': self.coalesced_calls,
+            'in_flight': len(self._in_flight),
+            'max_concurrency': self.max_concurrency
+        }
+
+    async def _coalesced(self, key, params):
+        if key is None:
+            self.upstream_calls += 1
+            return await self._call(params)
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(params))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.upstream_calls += 1
+        else:
+            self.coalesced_calls += 1
+
+        # shield: bir bekleyenin iptali diğerlerinin beklediği çağrıyı iptal etmez
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        self._in_flight.pop(key, None)
+        # Tüm bekleyenler zaman aşımıyla ayrıldıysa hata burada alınır (aksi halde
+        # asyncio "Task exception was never retrieved" uyarısı verir)
+        if not task.cancelled():
+            task.exception()
+
+    async def _call(self, params):
+        async with self._semaphore:
+            response = await self._client.chat.completions.create(**params)
+        return response.choices[0].message.content
+
+    def _ensure_loop(self):
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(
+                        target=loop.run_forever, name='async-ai-client', daemon=True
+                    )
+                    thread.start()
+                    # Semafor ve istemci döngünün kendi iş parçacığında oluşturulur
+                    asyncio.run_coroutine_threadsafe(self._init(), loop).result()
+                    self._loop = loop
+        return self._loop
+
+    async def _init(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        options = {'timeout': self.timeout} if self.timeout is not None else {}
+        self._client = AsyncOpenAI(
+            api_key=self.api_key, base_url=self.base_url, max_retries=self.max_retries, **options
+        )
@@ -0,0 +1,503 @@
+import bisect
+import datetime
+from services.cashflow_service import CashflowService
+from services.cashflow_risk_engine import CashflowRiskEngine
+from services.snapshot_cache import SnapshotCache
+
+class _RunningStats:
+    """Welford yöntemiyle güncellenen ortalama/varyans (değer ekleme, çıkarma ve değiştirme O(1))"""
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def remove(self, value):
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = value - self.mean
+        self.count -= 1
+        self.mean -= delta / self.count
+        self.m2 = max(0.0, self.m2 - delta * (value - self.mean))
+
+    def replace(self, old_value, new_value):
+        self.remove(old_value)
+        self.add(new_value)
+
+    def to_list(self):
+        return [self.count, self.mean, self.m2]
+
+    @classmethod
+    def from_list(cls, values):
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = values
+        return stats
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+class _UserCashflowState:
+    """Bir kullanıcının kayan pencere içindeki aylık toplamları ve aktif uyarıları"""
+
+    __slots__ = ('balance', 'months', 'income', 'expense', 'income_months', 'expense_months',
+                 'income_stats', 'expense_stats', 'total_income', 'total_expense', 'active_alerts')
+
+    def __init__(self, balance):
+        self.balance = balance
+        self.months = []  # Penceredeki aylar (gelir veya gideri olan), sıralı
+        self.income = {}  # ay -> aylık gelir toplamı
+        self.expense = {}  # ay -> aylık gider toplamı
+        self.income_months = []  # Gelir verisi olan aylar, sıralı
+        self.expense_months = []  # Gider verisi olan aylar, sıralı
+        self.income_stats = _RunningStats()  # Penceredeki aylar üzerinden (eksik ay = 0)
+        self.expense_stats = _RunningStats()
+        self.total_income = 0.0
+        self.total_expense = 0.0
+        self.active_alerts = set()
+
+    def to_dict(self):
+        """Önbellekte (JSON olarak) saklanabilecek biçime çevirir"""
+        return {
+            'balance': self.balance,
+            'months': list(self.months),
+            'income': dict(self.income),
+            'expense': dict(self.expense),
+            'income_stats': self.income_stats.to_list(),
+            'expense_stats': self.expense_stats.to_list(),
+            'total_income': self.total_income,
+            'total_expense': self.total_expense,
+            'active_alerts': sorted(self.active_alerts)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['balance'])
+        state.months = list(data['months'])
+        state.income = dict(data['income'])
+        state.expense = dict(data['expense'])
+        state.income_months = sorted(state.income)
+        state.expense_months = sorted(state.expense)
+        state.income_stats = _RunningStats.from_list(data['income_stats'])
+        state.expense_stats = _RunningStats.from_list(data['expense_stats'])
+        state.total_income = data['total_income']
+        state.total_expense = data['total_expense']
+        state.active_alerts = set(data['active_alerts'])
+        return state
+
+
+class CashflowAlertStream:
+    """
+    Yeni işlemler geldikçe nakit akışı risk kurallarını artımlı olarak
+    yeniden değerlendiren servis.
+
+    Her kullanıcı için son `window_months` ayın aylık toplamları, Welford
+    ortalama/varyansı, son 3 ay toplamları ve güncel bakiye tutulur; her
+    işlem bu durumu O(1) günceller. Uyarı sadece CashflowService.alert_thresholds
+    içindeki bir eşik yeni aşıldığında üretilir; koşul ortadan kalkınca uyarı
+    tekrar tetiklenebilir hale gelir.
+
+    Durum, kullanıcının veri sürümüyle anahtarlanan ortak önbellekte
+    (SnapshotCache; SNAPSHOT_CACHE_URL tanımlıysa Redis) saklanır. İşlemler
+    veya kullanıcı kaydı başka bir yoldan değişirse sürüm artar ve durum bir
+    sonraki kullanımda veritabanından bir kez yeniden yüklenir. Önbellekte
+    durum yoksa her zaman veritabanından yüklenir; sıfır bakiyeyle başlanmaz.
+
+    Not: Tutarlar Plaid işaret kuralını izler; pozitif tutar gider, negatif
+    tutar gelirdir.
+    """
+
+    def __init__(self, cashflow_service=None, window_months=12, forecast_months=3,
+                 state_cache=None, state_ttl=86400):
+        """
+        Args:
+            cashflow_service (CashflowService): Uyarı eşikleri ve mesajları
+            window_months (int): Durumda tutulan ay sayısı
+            forecast_months (int): Bakiye projeksiyonunun ay sayısı
+            state_cache (SnapshotCache): Durum önbelleği (varsayılan: 'cashflow-alert-stream')
+            state_ttl (int): Kullanılmayan durumun önbellekte kalma süresi (saniye)
+        """
+        self.cashflow_service = cashflow_service or CashflowService()
+        self.risk_engine = CashflowRiskEngine(self.cashflow_service, forecast_months=forecast_months)
+        self.alert_thresholds = self.cashflow_service.alert_thresholds
+        self.window_months = window_months
+        self.forecast_months = forecast_months
+
+        # Anahtar kullanıcının veri sürümünü içerir; izlenen modeller (işlemler,
+        # kullanıcı kaydı) çağıran tarafta state_cache.watch ile bağlanır
+        self.state_cache = state_cache or SnapshotCache('cashflow-alert-stream', ttl=state_ttl)
+
+    def get_state(self, user_id, as_of=None):
+        """
+        Kullanıcının güncel durumunu önbellekten, yoksa veritabanından yükler
+
+        Veritabanı değiştirilmeden önce çağrılmalıdır (yükleme bu isteğin
+        değişikliklerini içermemeli).
+
+        Args:
+            user_id: Kullanıcı kimliği
+            as_of (date): Pencere sonu (varsayılan: bugün)
+
+        Returns:
+            tuple: (durum, durumun ait olduğu veri sürümü)
+        """
+        as_of = as_of or datetime.date.today()
+
+        # Sürüm yüklemeden önce okunur: arada yapılan bir commit sürümü artırır
+        # ve burada yazılan durum bir daha okunmaz
+        version = self.state_cache.version(user_id)
+        key = self._state_key(user_id, version, as_of)
+
+        data = self.state_cache.backend.get(key)
+        if data is not None:
+            self.state_cache.hits += 1
+            return _UserCashflowState.from_dict(data), version
+
+        self.state_cache.misses += 1
+        state = self.load_user_state(user_id, as_of)
+        self.state_cache.backend.set(key, state.to_dict(), ttl=self.state_cache.ttl)
+
+        return state, version
+
+    def expected_version(self, session, user_id, version):
+        """
+        Oturum commit edildiğinde kullanıcının sahip olacağı veri sürümü
+
+        Oturum flush edilmiş olmalıdır; izlenen modellerde değişiklik varsa
+        commit sürümü bir artırır.
+        """
+        return version + 1 if self.state_cache.will_invalidate(session, user_id) else version
+
+    def save_state(self, user_id, state, version, as_of=None):
+        """
+        Güncellenen durumu commit sonrasında saklar
+
+        Kullanıcının sürümü beklenenden farklıysa (arada başka bir yazma
+        olduysa) durum saklanmaz; bir sonraki kullanımda yeniden yüklenir.
+
+        Args:
+            user_id: Kullanıcı kimliği
+            state: process_transactions ile güncellenen durum
+            version (int): expected_version çıktısı
+            as_of (date): Pencere sonu (varsayılan: bugün)
+
+        Returns:
+            bool: Durumun saklanıp saklanmadığı
+        """
+        if self.state_cache.version(user_id) != version:
+            return False
+
+        key = self._state_key(user_id, version, as_of or datetime.date.today())
+        self.state_cache.backend.set(key, state.to_dict(), ttl=self.state_cache.ttl)
+        return True
+
+    def load_state(self, balance, income_data=None, expense_data=None, active_alerts=None):
+        """
+        Geçmiş aylık toplamlardan bir kullanıcı durumu oluşturur
+
+        Args:
+            balance (float): Güncel nakit bakiyesi
+            income_data (dict): Aylık gelir toplamları {'2023-01': 5000, ...}
+            expense_data (dict): Aylık gider toplamları
+            active_alerts (iterable): Halihazırda açık olan uyarı türleri
+
+        Returns:
+            _UserCashflowState: Kullanıcı durumu
+        """
+        state = _UserCashflowState(balance)
+        income_data = income_data or {}
+        expense_data = expense_data or {}
+
+        for month in sorted(income_data.keys() | expense_data.keys()):
+            self._ensure_month(state, month)
+            if month in income_data:
+                self._add_amount(state, month, 'income', income_data[month])
+            if month in expense_data:
+                self._add_amount(state, month, 'expense', expense_data[month])
+
+        state.active_alerts = set(active_alerts or [])
+
+        return state
+
+    def load_user_state(self, user_id, as_of=None):
+        """
+        Kullanıcının durumunu veritabanındaki son `window_months` aydan oluşturur
+
+        Bakiye, toplu taramadaki gibi kayıtlı bakiye + dönem net nakit akışı
+        olarak alınır; açık (çözülmemiş) uyarılar tekrar üretilmez.
+
+        Args:
+            user_id: Kullanıcı kimliği
+            as_of (date): Başlangıç tarihi (varsayılan: bugün)
+
+        Returns:
+            _UserCashflowState: Kullanıcı durumu
+        """
+        from app import db
+        from models.cash_flow_alert import CashFlowAlert
+
+        as_of = as_of or datetime.date.today()
+        start_index = as_of.year * 12 + as_of.month - self.window_months
+        start_date = datetime.date(start_index // 12, start_index % 12 + 1, 1)
+
+        data = self.risk_engine.load_monthly_matrix(start_date, as_of, user_ids=[user_id])
+
+        income_data, expense_data, balance = {}, {}, 0.0
+        if len(data['user_ids']):
+            for i, month in enumerate(data['months']):
+                if data['income_mask'][0, i]:
+                    income_data[month] = float(data['income'][0, i])
+                if data['expense_mask'][0, i]:
+                    expense_data[month] = float(data['expense'][0, i])
+            balance = float(data['balances'][0] + data['income'][0].sum() - data['expense'][0].sum())
+
+        active_alerts = [
+            alert_type for (alert_type,) in db.session.query(CashFlowAlert.alert_type).filter(
+                CashFlowAlert.user_id == user_id,
+                CashFlowAlert.is_resolved.is_(False)
+            ).all()
+        ]
+
+        return self.load_state(balance, income_data, expense_data, active_alerts)
+
+    def save_alerts(self, user_id, alerts):
+        """
+        Akışta üretilen uyarıları CashFlowAlert olarak kaydeder
+
+        Args:
+            user_id: Kullanıcı kimliği
+            alerts (list): process_transaction(s) çıktısı
+
+        Returns:
+            int: Kaydedilen uyarı sayısı
+        """
+        rows = [{
+            'user_id': user_id,
+            'alert_type': alert['type'],
+            'severity': alert['severity'],
+            'message': alert['message'],
+            'details': alert['details'],
+            'source': 'stream'
+        } for alert in alerts]
+
+        return self.risk_engine.write_alerts(rows)
+
+    def process_transaction(self, user_id, transaction, previous=None, state=None):
+        """
+        Tek bir işlemi uygular ve yeni aşılan eşikler için uyarı döndürür
+
+        Args:
+            user_id: Kullanıcı kimliği
+            transaction: Transaction nesnesi veya {'date', 'amount'} sözlüğü
+            previous: İşlem güncelleniyorsa önceki hali ({'date', 'amount'})
+            state: get_state ile alınan durum (verilmezse yüklenir)
+
+        Returns:
+            list: Yeni tetiklenen uyarılar
+        """
+        return self.process_transactions(user_id, [(transaction, previous)], state=state)
+
+    def process_transactions(self, user_id, transactions, state=None):
+        """
+        İşlem grubunu duruma uygular ve kuralları grup sonunda bir kez değerlendirir
+
+        Her işlem durumu O(1) günceller. Verilen durum yerinde değiştirilir
+        ama saklanmaz; değişiklikler commit edildikten sonra save_state ile
+        saklanmalıdır (commit başarısız olursa önbellekteki durum değişmez).
+
+        Args:
+            user_id: Kullanıcı kimliği
+            transactions (list): İşlemler veya (işlem, önceki hali) çiftleri
+            state: get_state ile değişikliklerden önce alınan durum; verilmezse
+                önbellekten veya veritabanından yüklenir (işlemler henüz
+                veritabanına yazılmamış olmalıdır)
+
+        Returns:
+            list: Yeni tetiklenen uyarılar
+        """
+        if state is None:
+            state, _ = self.get_state(user_id)
+
+        for item in transactions:
+            transaction, previous = item if isinstance(item, tuple) else (item, None)
+
+            if previous is not None:
+                # Güncellenen işlemin eski katkısı geri alınır
+                date, amount = self._transaction_fields(previous)
+                self._apply_amount(state, self._month_key(date), amount, reverse=True)
+
+            date, amount = self._transaction_fields(transaction)
+            self._apply_amount(state, self._month_key(date), amount)
+
+        return self._evaluate(state)
+
+    def _apply_amount(self, state, month, amount, reverse=False):
+        """İşlem tutarını bakiyeye ve (pencere içindeyse) aylık toplamlara uygular veya geri alır"""
+        sign = -1 if reverse else 1
+        state.balance -= sign * amount
+
+        if not self._ensure_month(state, month):
+            return  # Pencereden eski ay: sadece bakiye etkilenir
+
+        if amount < 0:
+            self._add_amount(state, month, 'income', -sign * amount)
+        else:
+            self._add_amount(state, month, 'expense', sign * amount)
+
+    def _ensure_month(self, state, month):
+        """Ayı pencereye ekler, pencereyi kaydırır; ay pencereden eskiyse False döndürür"""
+        if month in state.income or month in state.expense or month in state.months:
+            return True
+
+        if len(state.months) >= self.window_months and month < state.months[0]:
+            return False
+
+        # Yeni ay her iki seri için 0 değeriyle istatistiklere girer
+        bisect.insort(state.months, month)
+        state.income_stats.add(0.0)
+        state.expense_stats.add(0.0)
+
+        while len(state.months) > self.window_months:
+            self._evict_month(state, state.months[0])
+
+        return True
+
+    def _evict_month(self, state, month):
+        """Pencereden çıkan ayın katkısını istatistiklerden ve toplamlardan çıkarır"""
+        state.months.remove(month)
+
+        income = state.income.pop(month, None)
+        expense = state.expense.pop(month, None)
+
+        state.income_stats.remove(income or 0.0)
+        state.expense_stats.remove(expense or 0.0)
+        state.total_income -= income or 0.0
+        state.total_expense -= expense or 0.0
+
+        if income is not None:
+            state.income_months.remove(month)
+        if expense is not None:
+            state.expense_months.remove(month)
+
+    def _add_amount(self, state, month, kind, amount):
+        """Aylık toplamı ve ilgili istatistikleri günceller"""
+        totals = state.income if kind == 'income' else state.expense
+        stats = state.income_stats if kind == 'income' else state.expense_stats
+        months = state.income_months if kind == 'income' else state.expense_months
+
+        old_value = totals.get(month)
+        if old_value is None:
+            bisect.insort(months, month)
+            old_value = 0.0
+
+        totals[month] = old_value + amount
+        stats.replace(old_value, old_value + amount)
+
+        if kind == 'income':
+            state.total_income += amount
+        else:
+            state.total_expense += amount
+
+    def _evaluate(self, state):
+        """Kuralları değerlendirir; yeni aşılan eşikler için uyarı döndürür"""
+        if not state.months:
+            return []
+
+        thresholds = self.alert_thresholds
+        triggered = {}
+
+        if state.balance < thresholds['low_balance']:
+            triggered['low_balance'] = state.balance
+
+        net_cashflow = state.total_income - state.total_expense
+        if net_cashflow < thresholds['cash_flow_negative']:
+            triggered['negative_cashflow'] = net_cashflow
+
+        if len(state.expense_months) >= 3:
+            avg_recent_expense = sum(state.expense[m] for m in state.expense_months[-3:]) / 3
+            if avg_recent_expense > state.expense_stats.mean * thresholds['expense_spike']:
+                triggered['expense_spike'] = avg_recent_expense
+
+        if len(state.income_months) >= 3:
+            avg_recent_income = sum(state.income[m] for m in state.income_months[-3:]) / 3
+            if avg_recent_income < state.income_stats.mean * thresholds['income_drop']:
+                triggered['income_drop'] = avg_recent_income
+
+        average_expense = state.expense_stats.mean
+        runway = state.balance / average_expense if average_expense > 0 else float('inf')
+        if runway < thresholds['runway_months']:
+            triggered['low_runway'] = runway
+
+        months_to_negative = self._months_to_negative(state)
+        if months_to_negative:
+            triggered['future_cashflow_problem'] = months_to_negative
+
+        new_alerts = [
+            self.cashflow_service.build_risk_alert(risk_type, value)
+            for risk_type, value in triggered.items()
+            if risk_type not in state.active_alerts
+        ]
+
+        # Ortadan kalkan koşullar tekrar tetiklenebilir
+        state.active_alerts = set(triggered)
+
+        return new_alerts
+
+    def _months_to_negative(self, state):
+        """
+        forecast_cashflow ile aynı trend tahminiyle bakiyenin negatife düşeceği ay (yoksa None)
+
+        Projeksiyon, akışta tutulan güncel bakiyeden başlar.
+        """
+        if len(state.months) < 2:
+            return None
+
+        first_month, last_month = state.months[0], state.months[-1]
+        periods = len(state.months) - 1
+
+        income_trend = self._trend(state.income.get(first_month, 0), state.income.get(last_month, 0), periods)
+        expense_trend = self._trend(state.expense.get(first_month, 0), state.expense.get(last_month, 0), periods)
+
+        next_income = state.income.get(last_month, 0)
+        next_expense = state.expense.get(last_month, 0)
+        balance = state.balance
+        first_negative = None
+
+        for month in range(1, self.forecast_months + 1):
+            next_income = max(0, next_income * (1 + income_trend))
+            next_expense = max(0, next_expense * (1 + expense_trend))
+            balance += next_income - next_expense
+            if balance < 0 and first_negative is None:
+                first_negative = month
+
+        return first_negative if balance < 0 else None
+
+    def _trend(self, first_value, last_value, periods):
+        """CashflowService._calculate_trend ile aynı bileşik aylık değişim oranı"""
+        if first_value <= 0 or last_value < 0:
+            return 0
+        return (last_value / first_value) ** (1 / periods) - 1
+
+    def _state_key(self, user_id, version, as_of):
+        # Pencere aya göre kaydığından durum aya göre de ayrılır
+        return self.state_cache.snapshot_key(user_id, version, scope=self._month_key(as_of))
+
+    def _month_key(self, date):
+        """Tarihi 'YYYY-MM' ay anahtarına çevirir"""
+        return f"{date.year}-{date.month:02d}"
+
+    def _transaction_fields(self, transaction):
+        """İşlemden tarih ve tutarı çıkarır"""
+        if isinstance(transaction, dict):
+            return transaction['date'], transaction['amount']
+        return transaction.date, transaction.amount
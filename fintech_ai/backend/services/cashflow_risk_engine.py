@@ -0,0 +1,328 @@
+import datetime
+import numpy as np
+from services.cashflow_service import CashflowService
+
+class CashflowRiskEngine:
+    """
+    Tüm kullanıcıların nakit akışı risklerini toplu olarak tarayan servis.
+
+    Kullanıcıların aylık gelir/gider serileri (kullanıcı x ay) matrislerine
+    yüklenir ve CashflowService.alert_thresholds içindeki tüm kurallar
+    vektörel işlemlerle tek seferde değerlendirilir. Sonuç kuralları
+    CashflowService.detect_cashflow_risks ile aynıdır.
+    """
+
+    # Değerlendirme sırası detect_cashflow_risks ile aynıdır
+    RISK_TYPES = [
+        'low_balance', 'negative_cashflow', 'expense_spike',
+        'income_drop', 'low_runway', 'future_cashflow_problem'
+    ]
+
+    def __init__(self, cashflow_service=None, forecast_months=3):
+        self.cashflow_service = cashflow_service or CashflowService()
+        self.alert_thresholds = self.cashflow_service.alert_thresholds
+        self.forecast_months = forecast_months
+
+    def evaluate(self, income, expense, balances, income_mask=None, expense_mask=None):
+        """
+        Risk kurallarını tüm kullanıcılar için vektörel olarak değerlendirir
+
+        Args:
+            income (ndarray): (kullanıcı x ay) aylık gelir matrisi
+            expense (ndarray): (kullanıcı x ay) aylık gider matrisi
+            balances (ndarray): Kullanıcıların mevcut nakit bakiyeleri
+            income_mask (ndarray): Gelir verisi bulunan hücreler (varsayılan: tümü)
+            expense_mask (ndarray): Gider verisi bulunan hücreler (varsayılan: tümü)
+
+        Returns:
+            dict: Risk türü -> {'flags': bool dizisi, 'values': uyarı değerleri}
+        """
+        income = np.asarray(income, dtype=np.float64)
+        expense = np.asarray(expense, dtype=np.float64)
+        balances = np.asarray(balances, dtype=np.float64)
+        n_users, n_months = income.shape
+
+        if income_mask is None:
+            income_mask = np.ones(income.shape, dtype=bool)
+        if expense_mask is None:
+            expense_mask = np.ones(expense.shape, dtype=bool)
+
+        # Eksik hücreler 0 kabul edilir (sözlükteki .get(month, 0) ile aynı)
+        income = np.where(income_mask, income, 0)
+        expense = np.where(expense_mask, expense, 0)
+
+        month_mask = income_mask | expense_mask
+        month_count = month_mask.sum(axis=1)
+        has_data = month_count > 0
+        safe_count = np.maximum(month_count, 1)
+
+        total_income = income.sum(axis=1)
+        total_expense = expense.sum(axis=1)
+        net_cashflow = total_income - total_expense
+        average_income = total_income / safe_count
+        average_expense = total_expense / safe_count
+        current_balance = balances + net_cashflow
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            runway = np.where(average_expense > 0, current_balance / average_expense, np.inf)
+
+        avg_recent_expense = self._recent_average(expense, expense_mask)
+        avg_recent_income = self._recent_average(income, income_mask)
+
+        months_to_negative = self._months_to_negative(income, expense, month_mask, month_count, balances)
+
+        thresholds = self.alert_thresholds
+        return {
+            'low_balance': {
+                'flags': has_data & (current_balance < thresholds['low_balance']),
+                'values': current_balance
+            },
+            'negative_cashflow': {
+                'flags': has_data & (net_cashflow < thresholds['cash_flow_negative']),
+                'values': net_cashflow
+            },
+            'expense_spike': {
+                'flags': (expense_mask.sum(axis=1) >= 3)
+                         & (avg_recent_expense > average_expense * thresholds['expense_spike']),
+                'values': avg_recent_expense
+            },
+            'income_drop': {
+                'flags': (income_mask.sum(axis=1) >= 3)
+                         & (avg_recent_income < average_income * thresholds['income_drop']),
+                'values': avg_recent_income
+            },
+            'low_runway': {
+                'flags': has_data & (runway < thresholds['runway_months']),
+                'values': runway
+            },
+            'future_cashflow_problem': {
+                'flags': months_to_negative > 0,
+                'values': months_to_negative
+            }
+        }
+
+    def build_alerts(self, user_ids, evaluation):
+        """
+        Değerlendirme sonucundan sadece riskli kullanıcılar için uyarı satırları üretir
+
+        Args:
+            user_ids (array): evaluate'e verilen satırların kullanıcı kimlikleri
+            evaluation (dict): evaluate çıktısı
+
+        Returns:
+            list: CashFlowAlert satırları için sözlükler
+        """
+        user_ids = np.asarray(user_ids)
+        rows = []
+
+        for risk_type in self.RISK_TYPES:
+            result = evaluation[risk_type]
+            indices = np.flatnonzero(result['flags'])
+            values = result['values'][indices]
+
+            if risk_type == 'future_cashflow_problem':
+                values = values.astype(int)
+
+            for user_id, value in zip(user_ids[indices].tolist(), values.tolist()):
+                alert = self.cashflow_service.build_risk_alert(risk_type, value)
+                rows.append({
+                    'user_id': user_id,
+                    'alert_type': alert['type'],
+                    'severity': alert['severity'],
+                    'message': alert['message'],
+                    'details': alert['details'],
+                    'source': 'batch_scan'
+                })
+
+        return rows
+
+    def load_monthly_matrix(self, start_date, end_date, user_ids=None):
+        """
+        Tüm kullanıcıların aylık gelir/gider toplamlarını SQL'de gruplayıp matrise yükler
+
+        Gelirler amount < 0, giderler amount > 0 olan işlemlerdir (Plaid işaret kuralı).
+
+        Args:
+            start_date (date): Dönem başlangıcı
+            end_date (date): Dönem sonu
+            user_ids (list): Verilirse sadece bu kullanıcılar yüklenir
+
+        Returns:
+            dict: {'user_ids', 'months', 'income', 'expense', 'income_mask',
+                   'expense_mask', 'balances'}
+        """
+        from sqlalchemy import case, func
+        from app import db
+        from models.transaction import Transaction
+        from models.user import User
+
+        year = func.extract('year', Transaction.date)
+        month = func.extract('month', Transaction.date)
+        is_income = Transaction.amount < 0
+
+        query = db.session.query(
+            Transaction.user_id,
+            year,
+            month,
+            func.sum(case((is_income, -Transaction.amount), else_=0)),
+            func.sum(case((is_income, 0), else_=Transaction.amount)),
+            func.count(case((is_income, 1))),
+            func.count(case((Transaction.amount > 0, 1)))
+        ).filter(
+            Transaction.date >= start_date,
+            Transaction.date <= end_date
+        )
+        if user_ids is not None:
+            query = query.filter(Transaction.user_id.in_(list(user_ids)))
+
+        rows = query.group_by(Transaction.user_id, year, month).all()
+
+        start_index = start_date.year * 12 + start_date.month - 1
+        n_months = end_date.year * 12 + end_date.month - start_index
+
+        if rows:
+            columns = list(zip(*rows))
+            row_users = np.asarray(columns[0])
+            month_index = (np.asarray(columns[1], dtype=np.int64) * 12
+                           + np.asarray(columns[2], dtype=np.int64) - 1 - start_index)
+        else:
+            columns = [[]] * 7
+            row_users = np.asarray([], dtype=np.int64)
+            month_index = np.asarray([], dtype=np.int64)
+
+        user_ids, user_codes = np.unique(row_users, return_inverse=True)
+
+        income = np.zeros((len(user_ids), n_months))
+        expense = np.zeros((len(user_ids), n_months))
+        income_mask = np.zeros((len(user_ids), n_months), dtype=bool)
+        expense_mask = np.zeros((len(user_ids), n_months), dtype=bool)
+
+        income[user_codes, month_index] = np.asarray(columns[3], dtype=np.float64)
+        expense[user_codes, month_index] = np.asarray(columns[4], dtype=np.float64)
+        income_mask[user_codes, month_index] = np.asarray(columns[5]) > 0
+        expense_mask[user_codes, month_index] = np.asarray(columns[6]) > 0
+
+        # Mevcut bakiyeler tek sorguda
+        balance_rows = dict(
+            db.session.query(User.id, User.current_balance).filter(User.id.in_(user_ids.tolist())).all()
+        ) if len(user_ids) else {}
+        balances = np.array([balance_rows.get(user_id) or 0 for user_id in user_ids.tolist()], dtype=np.float64)
+
+        months = [
+            f"{(start_index + i) // 12}-{(start_index + i) % 12 + 1:02d}" for i in range(n_months)
+        ]
+
+        return {
+            'user_ids': user_ids,
+            'months': months,
+            'income': income,
+            'expense': expense,
+            'income_mask': income_mask,
+            'expense_mask': expense_mask,
+            'balances': balances
+        }
+
+    def write_alerts(self, rows):
+        """
+        Uyarıları toplu olarak kaydeder
+
+        Kullanıcının aynı türde çözülmemiş bir uyarısı varsa tekrar yazılmaz.
+
+        Args:
+            rows (list): build_alerts çıktısı
+
+        Returns:
+            int: Kaydedilen uyarı sayısı
+        """
+        from app import db
+        from models.cash_flow_alert import CashFlowAlert
+
+        if not rows:
+            return 0
+
+        user_ids = list({row['user_id'] for row in rows})
+        open_alerts = set(
+            db.session.query(CashFlowAlert.user_id, CashFlowAlert.alert_type).filter(
+                CashFlowAlert.user_id.in_(user_ids),
+                CashFlowAlert.is_resolved.is_(False)
+            ).all()
+        )
+
+        new_rows = [row for row in rows if (row['user_id'], row['alert_type']) not in open_alerts]
+
+        if new_rows:
+            db.session.bulk_insert_mappings(CashFlowAlert, new_rows)
+            db.session.commit()
+
+        return len(new_rows)
+
+    def scan_all_users(self, months=12, as_of=None):
+        """
+        Son `months` ayın verisiyle tüm kullanıcıları tarar ve uyarıları kaydeder
+
+        Args:
+            months (int): Taranacak ay sayısı
+            as_of (date): Tarama tarihi (varsayılan: bugün)
+
+        Returns:
+            dict: Tarama özeti
+        """
+        as_of = as_of or datetime.date.today()
+        start_index = as_of.year * 12 + as_of.month - months
+        start_date = datetime.date(start_index // 12, start_index % 12 + 1, 1)
+
+        data = self.load_monthly_matrix(start_date, as_of)
+        evaluation = self.evaluate(
+            data['income'], data['expense'], data['balances'],
+            income_mask=data['income_mask'], expense_mask=data['expense_mask']
+        )
+        rows = self.build_alerts(data['user_ids'], evaluation)
+        written = self.write_alerts(rows)
+
+        return {
+            'users_scanned': int(len(data['user_ids'])),
+            'alerts_detected': len(rows),
+            'alerts_written': written,
+            'by_type': {risk_type: int(evaluation[risk_type]['flags'].sum()) for risk_type in self.RISK_TYPES}
+        }
+
+    def _recent_average(self, values, mask, count=3):
+        """Her satırda verisi olan son `count` ayın toplamının `count`'a bölümü"""
+        # Sağdan sayılan veri sırası: son veri 1, ondan önceki 2, ...
+        rank_from_end = np.cumsum(mask[:, ::-1], axis=1)[:, ::-1]
+        recent = mask & (rank_from_end <= count)
+        return np.where(recent, values, 0).sum(axis=1) / count
+
+    def _months_to_negative(self, income, expense, month_mask, month_count, balances):
+        """
+        forecast_cashflow ile aynı trend tahmini ile bakiyenin kaç ay içinde
+        negatife düşeceğini hesaplar (düşmüyorsa veya veri yetersizse 0)
+        """
+        n_users, n_months = income.shape
+        rows = np.arange(n_users)
+
+        # Verisi olan ilk ve son ay
+        first = month_mask.argmax(axis=1)
+        last = n_months - 1 - month_mask[:, ::-1].argmax(axis=1)
+        periods = np.maximum(month_count - 1, 1)
+
+        income_trend = self._trend(income[rows, first], income[rows, last], periods)
+        expense_trend = self._trend(expense[rows, first], expense[rows, last], periods)
+
+        steps = np.arange(1, self.forecast_months + 1)
+        forecast_income = np.maximum(0, income[rows, last][:, None] * (1 + income_trend[:, None]) ** steps)
+        forecast_expense = np.maximum(0, expense[rows, last][:, None] * (1 + expense_trend[:, None]) ** steps)
+        forecast_balance = balances[:, None] + np.cumsum(forecast_income - forecast_expense, axis=1)
+
+        negative = forecast_balance < 0
+        at_risk = (month_count >= 2) & negative[:, -1]
+
+        return np.where(at_risk, negative.argmax(axis=1) + 1, 0)
+
+    def _trend(self, first_values, last_values, periods):
+        """CashflowService._calculate_trend'in vektörel karşılığı"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = last_values / first_values
+            trend = np.power(np.where(ratio >= 0, ratio, 1.0), 1.0 / periods) - 1
+
+        return np.where((first_values > 0) & (ratio >= 0), trend, 0.0)
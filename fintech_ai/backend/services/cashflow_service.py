@@ -1,6 +1,7 @@
-import datetime
-import pandas as pd
+import threading
+from collections import Counter
 import numpy as np
+from utils.date_utils import next_month_keys
 
 class CashflowService:
     """
@@ -22,8 +23,27 @@ class CashflowService:
             'income_drop': 0.7,  # Ortalama gelirin %70'in altına düşen gelirler için uyarı
             'runway_months': 3  # 3 aydan az nakit ömrü için uyarı
         }
+        
+        # Gerçekleştirilen hesaplama sayıları (CashflowContext ile tekrarlar izlenir);
+        # servis istek iş parçacıkları arasında paylaşıldığı için kilitle güncellenir
+        self.computation_counts = Counter()
+        self._counts_lock = threading.Lock()
+    
+    def create_context(self, income_data, expense_data, balance=None):
+        """
+        Tek bir istek için paylaşılan hesaplama bağlamı oluşturur
+        
+        Args:
+            income_data (dict): Aylık gelir verileri
+            expense_data (dict): Aylık gider verileri
+            balance (float): Mevcut nakit bakiyesi
+            
+        Returns:
+            CashflowContext: Servis metotlarına context parametresiyle verilecek bağlam
+        """
+        return CashflowContext(self, income_data, expense_data, balance)
     
-    def analyze_cashflow(self, income_data, expense_data, balance=None):
+    def analyze_cashflow(self, income_data, expense_data, balance=None, context=None):
         """
         Nakit akışı analizi yapar
         
@@ -31,38 +51,44 @@ class CashflowService:
             income_data (dict): Aylık gelir verileri {'2023-01': 5000, ...}
             expense_data (dict): Aylık gider verileri {'2023-01': 3000, ...}
             balance (float): Mevcut nakit bakiyesi (değer verilmezse hesaplanır)
+            context (CashflowContext): Paylaşılan hesaplama bağlamı (verilirse
+                                       diğer parametreler yerine kullanılır)
         
         Returns:
             dict: Nakit akışı analiz sonuçları
         """
-        # Veriyi DataFrame'e dönüştür
-        months = sorted(list(set(income_data.keys()) | set(expense_data.keys())))
-        cashflow_df = pd.DataFrame(index=months, columns=['income', 'expense', 'net', 'cumulative'])
+        if context is None:
+            context = self.create_context(income_data, expense_data, balance)
         
-        # Gelir ve gider verilerini doldur
-        for month in months:
-            cashflow_df.loc[month, 'income'] = income_data.get(month, 0)
-            cashflow_df.loc[month, 'expense'] = expense_data.get(month, 0)
+        return context.analysis
+    
+    def _compute_analysis(self, context):
+        """Bağlamdaki diziler üzerinden nakit akışı analizini hesaplar"""
+        self._count_computation('analysis')
+        
+        months = context.months
+        income_values = context.income_values
+        expense_values = context.expense_values
+        balance = context.balance
         
         # Net ve kümülatif nakit akışını hesapla
-        cashflow_df['net'] = cashflow_df['income'] - cashflow_df['expense']
-        cashflow_df['cumulative'] = cashflow_df['net'].cumsum()
+        net_values = income_values - expense_values
+        cumulative_values = np.cumsum(net_values)
         
         # Eğer başlangıç bakiyesi belirtilmişse, kümülatif değerlere ekle
         if balance is not None:
-            cashflow_df['cumulative'] += balance
+            cumulative_values += balance
         
         # Temel istatistikler
-        total_income = cashflow_df['income'].sum()
-        total_expense = cashflow_df['expense'].sum()
+        total_income = float(income_values.sum())
+        total_expense = float(expense_values.sum())
         net_cashflow = total_income - total_expense
-        average_monthly_income = cashflow_df['income'].mean()
-        average_monthly_expense = cashflow_df['expense'].mean()
-        current_balance = cashflow_df['cumulative'].iloc[-1] if balance is None else balance + net_cashflow
+        average_monthly_income = float(income_values.mean())
+        average_monthly_expense = float(expense_values.mean())
+        current_balance = float(cumulative_values[-1]) if balance is None else balance + net_cashflow
         
         # Gelir ve gider trendi
-        income_trend = self._calculate_trend(cashflow_df['income'])
-        expense_trend = self._calculate_trend(cashflow_df['expense'])
+        income_trend, expense_trend = context.trends
         
         # Nakit ömrü hesaplama (mevcut gider hızıyla kaç ay dayanabilir)
         if average_monthly_expense > 0:
@@ -77,7 +103,22 @@ class CashflowService:
             cashflow_efficiency = 0
         
         # Nakit dalgalanması (standart sapma / ortalama)
-        cashflow_volatility = cashflow_df['net'].std() / abs(cashflow_df['net'].mean()) if cashflow_df['net'].mean() != 0 else 0
+        net_mean = float(net_values.mean())
+        net_std = float(net_values.std(ddof=1)) if len(net_values) > 1 else float('nan')
+        cashflow_volatility = net_std / abs(net_mean) if net_mean != 0 else 0
+        
+        # Gelir ve gider dalgalanması (değişim katsayısı), senaryo simülasyonunda kullanılır
+        income_volatility = self._coefficient_of_variation(income_values)
+        expense_volatility = self._coefficient_of_variation(expense_values)
+        
+        # Aylık tablo (ay -> gelir, gider, net, kümülatif)
+        monthly_data = {
+            month: {'income': inc, 'expense': exp, 'net': net, 'cumulative': cum}
+            for month, inc, exp, net, cum in zip(
+                months, income_values.tolist(), expense_values.tolist(),
+                net_values.tolist(), cumulative_values.tolist()
+            )
+        }
         
         return {
             'total_income': total_income,
@@ -91,10 +132,12 @@ class CashflowService:
             'runway_months': runway_months,
             'cashflow_efficiency': cashflow_efficiency,
             'cashflow_volatility': cashflow_volatility,
-            'monthly_data': cashflow_df.to_dict('index')
+            'income_volatility': income_volatility,
+            'expense_volatility': expense_volatility,
+            'monthly_data': monthly_data
         }
     
-    def forecast_cashflow(self, income_data, expense_data, balance, months_ahead=3):
+    def forecast_cashflow(self, income_data, expense_data, balance, months_ahead=3, context=None):
         """
         Gelecek aylar için nakit akışı tahmini yapar
         
@@ -103,14 +146,25 @@ class CashflowService:
             expense_data (dict): Aylık gider verileri
             balance (float): Mevcut nakit bakiyesi
             months_ahead (int): Kaç ay ilerisi için tahmin yapılacağı
+            context (CashflowContext): Paylaşılan hesaplama bağlamı (opsiyonel)
         
         Returns:
             dict: Nakit akışı tahmin sonuçları
         """
+        if context is None:
+            context = self.create_context(income_data, expense_data, balance)
+        
+        return context.forecast(months_ahead)
+    
+    def _compute_forecast(self, context, months_ahead):
+        """Bağlamdaki diziler ve trendler üzerinden nakit akışı tahmini yapar"""
+        self._count_computation('forecast')
+        
         # Basit trend analizi ile gelecek ayları tahmin et
-        months = sorted(list(set(income_data.keys()) | set(expense_data.keys())))
-        income_values = [income_data.get(month, 0) for month in months]
-        expense_values = [expense_data.get(month, 0) for month in months]
+        months = context.months
+        income_values = context.income_values
+        expense_values = context.expense_values
+        balance = context.balance if context.balance is not None else 0
         
         # Gelir ve gider dizilerinin uzunluğu en az 2 olmalı
         if len(income_values) < 2 or len(expense_values) < 2:
@@ -119,46 +173,23 @@ class CashflowService:
             }
         
         # Trend hesaplama
-        income_trend = self._calculate_trend(pd.Series(income_values))
-        expense_trend = self._calculate_trend(pd.Series(expense_values))
-        
-        # Son değerler
-        last_income = income_values[-1]
-        last_expense = expense_values[-1]
-        
-        # Gelecek ayları tahmin et
-        forecast_months = []
-        forecast_income = []
-        forecast_expense = []
-        forecast_net = []
-        forecast_balance = []
-        
-        current_balance = balance
-        last_month = datetime.datetime.strptime(months[-1], '%Y-%m')
-        
-        for i in range(1, months_ahead + 1):
-            # Gelecek ay
-            next_month = last_month + datetime.timedelta(days=30 * i)
-            forecast_month = next_month.strftime('%Y-%m')
-            forecast_months.append(forecast_month)
-            
-            # Gelir tahmini (trend ile)
-            next_income = max(0, last_income * (1 + income_trend))
-            forecast_income.append(next_income)
-            last_income = next_income
-            
-            # Gider tahmini (trend ile)
-            next_expense = max(0, last_expense * (1 + expense_trend))
-            forecast_expense.append(next_expense)
-            last_expense = next_expense
-            
-            # Net nakit akışı
-            next_net = next_income - next_expense
-            forecast_net.append(next_net)
-            
-            # Bakiye güncelleme
-            current_balance += next_net
-            forecast_balance.append(current_balance)
+        income_trend, expense_trend = context.trends
+        
+        # Gelecek ayların gelir/gider tahmini (son değerden bileşik trend ile)
+        steps = np.arange(1, months_ahead + 1)
+        forecast_income = np.maximum(0, income_values[-1] * (1 + income_trend) ** steps)
+        forecast_expense = np.maximum(0, expense_values[-1] * (1 + expense_trend) ** steps)
+        
+        # Net nakit akışı ve bakiye
+        forecast_net = forecast_income - forecast_expense
+        forecast_balance = balance + np.cumsum(forecast_net)
+        
+        forecast_months = next_month_keys(months[-1], months_ahead)
+        
+        forecast_income = forecast_income.tolist()
+        forecast_expense = forecast_expense.tolist()
+        forecast_net = forecast_net.tolist()
+        forecast_balance = forecast_balance.tolist()
         
         return {
             'forecast_months': forecast_months,
@@ -169,7 +200,88 @@ class CashflowService:
             'final_balance': forecast_balance[-1] if forecast_balance else balance
         }
     
-    def detect_cashflow_risks(self, income_data, expense_data, balance):
+    def simulate_cashflow_scenarios(self, income_data, expense_data, balance, months_ahead=24,
+                                    n_paths=10000, percentiles=(5, 25, 50, 75, 95), seed=None,
+                                    context=None):
+        """
+        Monte Carlo yöntemiyle nakit akışı senaryoları üretir
+        
+        Gelir ve gider yolları, forecast_cashflow'un trend tahmini etrafında
+        analyze_cashflow'daki geçmiş dalgalanma (değişim katsayısı) ve gelir-gider
+        korelasyonu ile çekilir. Tüm yollar tek bir (n_paths x months_ahead)
+        NumPy matrisi olarak simüle edilir.
+        
+        Args:
+            income_data (dict): Aylık gelir verileri
+            expense_data (dict): Aylık gider verileri
+            balance (float): Mevcut nakit bakiyesi
+            months_ahead (int): Simülasyon ufku (ay)
+            n_paths (int): Senaryo (yol) sayısı
+            percentiles (tuple): Bakiye için hesaplanacak yüzdelik dilimler
+            seed (int): Tekrarlanabilir sonuçlar için rastgele sayı tohumu (opsiyonel)
+            context (CashflowContext): Paylaşılan hesaplama bağlamı (opsiyonel)
+        
+        Returns:
+            dict: Yüzdelik bakiye bantları, aylık negatif bakiye olasılığı ve
+                  beklenen nakit ömrü
+        """
+        if context is None:
+            context = self.create_context(income_data, expense_data, balance)
+        
+        forecast = context.forecast(months_ahead)
+        if 'error' in forecast:
+            return forecast
+        
+        self._count_computation('scenarios')
+        
+        analysis = context.analysis
+        start_balance = context.balance if context.balance is not None else 0
+        
+        # Trend tahmini senaryoların merkezi yoludur
+        base_income = np.asarray(forecast['forecast_income'])
+        base_expense = np.asarray(forecast['forecast_expense'])
+        
+        income_sigma = np.nan_to_num(analysis['income_volatility'])
+        expense_sigma = np.nan_to_num(analysis['expense_volatility'])
+        correlation = self._correlation(context.income_values, context.expense_values)
+        
+        # Korelasyonlu standart normal şoklar: (2, n_paths, months_ahead)
+        rng = np.random.default_rng(seed)
+        shocks = rng.standard_normal((2, n_paths, months_ahead))
+        income_shocks = shocks[0]
+        expense_shocks = correlation * shocks[0] + np.sqrt(1 - correlation ** 2) * shocks[1]
+        
+        income_paths = np.maximum(0, base_income * (1 + income_sigma * income_shocks))
+        expense_paths = np.maximum(0, base_expense * (1 + expense_sigma * expense_shocks))
+        
+        balance_paths = start_balance + np.cumsum(income_paths - expense_paths, axis=1)
+        
+        # Yüzdelik bakiye bantları
+        bands = np.percentile(balance_paths, percentiles, axis=0)
+        
+        # Her ay için negatif bakiye olasılığı
+        negative = balance_paths < 0
+        negative_probability = negative.mean(axis=0)
+        
+        # Nakit ömrü: ilk negatif bakiye ayı (hiç düşmeyen yollar ufukta sansürlenir)
+        depleted = negative.any(axis=1)
+        runway = np.where(depleted, negative.argmax(axis=1) + 1, months_ahead)
+        
+        return {
+            'months': forecast['forecast_months'],
+            'n_paths': n_paths,
+            'balance_percentiles': {
+                f'p{p:g}': band.tolist() for p, band in zip(percentiles, bands)
+            },
+            'expected_balance': balance_paths.mean(axis=0).tolist(),
+            'negative_balance_probability': negative_probability.tolist(),
+            'depletion_probability': float(depleted.mean()),
+            'expected_runway_months': float(runway.mean()),
+            'median_runway_months': float(np.median(runway)),
+            'runway_censored_at': months_ahead
+        }
+    
+    def detect_cashflow_risks(self, income_data, expense_data, balance, context=None):
         """
         Nakit akışı risklerini tespit eder
         
@@ -177,71 +289,54 @@ class CashflowService:
             income_data (dict): Aylık gelir verileri
             expense_data (dict): Aylık gider verileri
             balance (float): Mevcut nakit bakiyesi
+            context (CashflowContext): Paylaşılan hesaplama bağlamı (opsiyonel)
         
         Returns:
             list: Tespit edilen risk uyarıları
         """
-        # Nakit akışı analizi yap
-        analysis = self.analyze_cashflow(income_data, expense_data, balance)
+        if context is None:
+            context = self.create_context(income_data, expense_data, balance)
+        
+        return context.risks
+    
+    def _compute_risks(self, context):
+        """Bağlamdaki analiz ve tahmin üzerinden risk uyarılarını üretir"""
+        self._count_computation('risks')
         
-        # Gelecek nakit akışı tahmini
-        forecast = self.forecast_cashflow(income_data, expense_data, balance)
+        # Nakit akışı analizi ve gelecek nakit akışı tahmini
+        analysis = context.analysis
+        forecast = context.forecast()
         
         # Riskler
         risks = []
         
         # Düşük bakiye riski
         if analysis['current_balance'] < self.alert_thresholds['low_balance']:
-            risks.append({
-                'type': 'low_balance',
-                'severity': 'high',
-                'message': f"Düşük nakit bakiyesi: {analysis['current_balance']:.2f} TL",
-                'details': f"Mevcut nakit bakiyeniz {self.alert_thresholds['low_balance']} TL'nin altında."
-            })
+            risks.append(self.build_risk_alert('low_balance', analysis['current_balance']))
         
         # Negatif nakit akışı riski
         if analysis['net_cashflow'] < self.alert_thresholds['cash_flow_negative']:
-            risks.append({
-                'type': 'negative_cashflow',
-                'severity': 'high',
-                'message': f"Negatif nakit akışı: {analysis['net_cashflow']:.2f} TL",
-                'details': "Son dönemde harcamalarınız gelirlerinizden fazla."
-            })
+            risks.append(self.build_risk_alert('negative_cashflow', analysis['net_cashflow']))
         
         # Gider artış riski
-        if len(expense_data) >= 3:
-            recent_expenses = [expense_data[month] for month in sorted(expense_data.keys())[-3:]]
+        if len(context.expense_data) >= 3:
+            recent_expenses = context.recent_values('expense')
             avg_recent_expense = sum(recent_expenses) / 3
             
             if avg_recent_expense > analysis['average_monthly_expense'] * self.alert_thresholds['expense_spike']:
-                risks.append({
-                    'type': 'expense_spike',
-                    'severity': 'medium',
-                    'message': f"Gider artışı tespit edildi: {avg_recent_expense:.2f} TL",
-                    'details': "Son 3 aydaki ortalama gideriniz, genel ortalamanızdan belirgin şekilde yüksek."
-                })
+                risks.append(self.build_risk_alert('expense_spike', avg_recent_expense))
         
         # Gelir düşüş riski
-        if len(income_data) >= 3:
-            recent_income = [income_data[month] for month in sorted(income_data.keys())[-3:]]
+        if len(context.income_data) >= 3:
+            recent_income = context.recent_values('income')
             avg_recent_income = sum(recent_income) / 3
             
             if avg_recent_income < analysis['average_monthly_income'] * self.alert_thresholds['income_drop']:
-                risks.append({
-                    'type': 'income_drop',
-                    'severity': 'high',
-                    'message': f"Gelir düşüşü tespit edildi: {avg_recent_income:.2f} TL",
-                    'details': "Son 3 aydaki ortalama geliriniz, genel ortalamanızdan belirgin şekilde düşük."
-                })
+                risks.append(self.build_risk_alert('income_drop', avg_recent_income))
         
         # Nakit ömrü riski
         if analysis['runway_months'] < self.alert_thresholds['runway_months']:
-            risks.append({
-                'type': 'low_runway',
-                'severity': 'critical',
-                'message': f"Düşük nakit ömrü: {analysis['runway_months']:.1f} ay",
-                'details': f"Mevcut gider hızınızla nakit bakiyeniz {analysis['runway_months']:.1f} ay içinde tükenebilir."
-            })
+            risks.append(self.build_risk_alert('low_runway', analysis['runway_months']))
         
         # Gelecekte nakit sorunu riski
         if forecast.get('final_balance', float('inf')) < 0:
@@ -249,16 +344,70 @@ class CashflowService:
             months_to_negative = negative_month_index + 1 if negative_month_index is not None else None
             
             if months_to_negative:
-                risks.append({
-                    'type': 'future_cashflow_problem',
-                    'severity': 'high',
-                    'message': f"Yaklaşan nakit sorunu: {months_to_negative} ay içinde",
-                    'details': f"Mevcut trend devam ederse {months_to_negative} ay içinde nakit bakiyeniz negatife düşebilir."
-                })
+                risks.append(self.build_risk_alert('future_cashflow_problem', months_to_negative))
         
         return risks
     
-    def suggest_cashflow_improvements(self, income_data, expense_data, balance, expense_categories=None):
+    def build_risk_alert(self, risk_type, value):
+        """
+        Risk türü ve tetikleyen değer için uyarı sözlüğü oluşturur
+        
+        Tekil (detect_cashflow_risks) ve toplu risk taramaları aynı uyarı
+        metinlerini üretsin diye tek yerde tanımlanır.
+        
+        Args:
+            risk_type (str): Risk türü
+            value (float): Uyarıyı tetikleyen değer (bakiye, tutar, ay sayısı)
+            
+        Returns:
+            dict: {'type', 'severity', 'message', 'details'}
+        """
+        if risk_type == 'low_balance':
+            return {
+                'type': 'low_balance',
+                'severity': 'high',
+                'message': f"Düşük nakit bakiyesi: {value:.2f} TL",
+                'details': f"Mevcut nakit bakiyeniz {self.alert_thresholds['low_balance']} TL'nin altında."
+            }
+        elif risk_type == 'negative_cashflow':
+            return {
+                'type': 'negative_cashflow',
+                'severity': 'high',
+                'message': f"Negatif nakit akışı: {value:.2f} TL",
+                'details': "Son dönemde harcamalarınız gelirlerinizden fazla."
+            }
+        elif risk_type == 'expense_spike':
+            return {
+                'type': 'expense_spike',
+                'severity': 'medium',
+                'message': f"Gider artışı tespit edildi: {value:.2f} TL",
+                'details': "Son 3 aydaki ortalama gideriniz, genel ortalamanızdan belirgin şekilde yüksek."
+            }
+        elif risk_type == 'income_drop':
+            return {
+                'type': 'income_drop',
+                'severity': 'high',
+                'message': f"Gelir düşüşü tespit edildi: {value:.2f} TL",
+                'details': "Son 3 aydaki ortalama geliriniz, genel ortalamanızdan belirgin şekilde düşük."
+            }
+        elif risk_type == 'low_runway':
+            return {
+                'type': 'low_runway',
+                'severity': 'critical',
+                'message': f"Düşük nakit ömrü: {value:.1f} ay",
+                'details': f"Mevcut gider hızınızla nakit bakiyeniz {value:.1f} ay içinde tükenebilir."
+            }
+        elif risk_type == 'future_cashflow_problem':
+            return {
+                'type': 'future_cashflow_problem',
+                'severity': 'high',
+                'message': f"Yaklaşan nakit sorunu: {value} ay içinde",
+                'details': f"Mevcut trend devam ederse {value} ay içinde nakit bakiyeniz negatife düşebilir."
+            }
+        
+        raise ValueError(f"Bilinmeyen risk türü: {risk_type}")
+    
+    def suggest_cashflow_improvements(self, income_data, expense_data, balance, expense_categories=None, context=None):
         """
         Nakit akışını iyileştirme önerileri sunar
         
@@ -267,13 +416,17 @@ class CashflowService:
             expense_data (dict): Aylık gider verileri
             balance (float): Mevcut nakit bakiyesi
             expense_categories (dict): Gider kategorileri (opsiyonel)
+            context (CashflowContext): Paylaşılan hesaplama bağlamı (opsiyonel)
             
         Returns:
             list: İyileştirme önerileri
         """
+        if context is None:
+            context = self.create_context(income_data, expense_data, balance)
+        
         # Nakit akışı analizi ve risk tespiti
-        analysis = self.analyze_cashflow(income_data, expense_data, balance)
-        risks = self.detect_cashflow_risks(income_data, expense_data, balance)
+        analysis = context.analysis
+        risks = context.risks
         
         # Öneriler
         suggestions = []
@@ -359,7 +512,7 @@ class CashflowService:
         Zaman serisi verileri için basit trend hesaplama
         
         Args:
-            data_series (Series): Zaman serisi veriler
+            data_series (array): Zaman serisi veriler (ndarray veya Series)
             
         Returns:
             float: Trend katsayısı (pozitif: artış, negatif: azalış)
@@ -368,8 +521,9 @@ class CashflowService:
             return 0
         
         # Basit bir yöntem: son değer ile ilk değer arasındaki yüzde değişim
-        first_value = data_series.iloc[0]
-        last_value = data_series.iloc[-1]
+        values = np.asarray(data_series, dtype=np.float64)
+        first_value = float(values[0])
+        last_value = float(values[-1])
         
         if first_value == 0:
             return 0  # Sıfıra bölme hatasını önle
@@ -381,4 +535,145 @@ class CashflowService:
         else:
             trend = 0
         
-        return trend 
\ No newline at end of file
+        return trend 
+    
+    def _coefficient_of_variation(self, values):
+        """Dizinin değişim katsayısını (standart sapma / |ortalama|) hesaplar"""
+        if len(values) < 2:
+            return 0
+        
+        mean = float(values.mean())
+        return float(values.std(ddof=1)) / abs(mean) if mean != 0 else 0
+    
+    def _correlation(self, x, y):
+        """İki dizi arasındaki korelasyon katsayısı (tanımsızsa 0)"""
+        if len(x) < 2 or x.std() == 0 or y.std() == 0:
+            return 0.0
+        
+        return float(np.clip(np.corrcoef(x, y)[0, 1], -1, 1))
+    
+    def _count_computation(self, name):
+        with self._counts_lock:
+            self.computation_counts[name] += 1
+    
+    def _monthly_arrays(self, income_data, expense_data):
+        """
+        Aylık gelir ve gider sözlüklerini aynı ay sırasına hizalanmış
+        float64 dizilere dönüştürür (eksik aylar 0 kabul edilir)
+        
+        Args:
+            income_data (dict): Aylık gelir verileri
+            expense_data (dict): Aylık gider verileri
+            
+        Returns:
+            tuple: (sıralı ay listesi, gelir dizisi, gider dizisi)
+        """
+        self._count_computation('monthly_arrays')
+        
+        months = sorted(income_data.keys() | expense_data.keys())
+        count = len(months)
+        
+        income_values = np.fromiter((income_data.get(month, 0) for month in months), dtype=np.float64, count=count)
+        expense_values = np.fromiter((expense_data.get(month, 0) for month in months), dtype=np.float64, count=count)
+        
+        return months, income_values, expense_values
+
+
+class CashflowContext:
+    """
+    Tek bir istek boyunca nakit akışı hesaplamalarını paylaşan bağlam.
+    
+    Sıralı aylar, hizalı diziler, trendler, analiz, tahmin ve riskler ilk
+    ihtiyaç duyulduğunda bir kez hesaplanır ve aynı bağlamı alan tüm
+    CashflowService metotları tarafından yeniden kullanılır.
+    
+    Örnek:
+        context = cashflow_service.create_context(income_data, expense_data, balance)
+        risks = context.risks
+        suggestions = context.suggest_improvements(expense_categories)
+    """
+    
+    def __init__(self, service, income_data, expense_data, balance=None):
+        self.service = service
+        self.income_data = income_data
+        self.expense_data = expense_data
+        self.balance = balance
+        
+        self._values = {}
+        # Ölçüm: hesaplanan (bağlamda bulunamayan) değerler ve önbellekten kullanılma sayıları
+        self.computed = []
+        self.reuse_counts = Counter()
+    
+    def _get(self, key, compute):
+        """Değeri ilk erişimde hesaplar, sonraki erişimlerde önbellekten döndürür"""
+        if key in self._values:
+            self.reuse_counts[key] += 1
+        else:
+            self.computed.append(key)
+            self._values[key] = compute()
+        return self._values[key]
+    
+    @property
+    def arrays(self):
+        """(sıralı aylar, gelir dizisi, gider dizisi)"""
+        return self._get('arrays', lambda: self.service._monthly_arrays(self.income_data, self.expense_data))
+    
+    @property
+    def months(self):
+        return self.arrays[0]
+    
+    @property
+    def income_values(self):
+        return self.arrays[1]
+    
+    @property
+    def expense_values(self):
+        return self.arrays[2]
+    
+    @property
+    def trends(self):
+        """(gelir trendi, gider trendi)"""
+        return self._get('trends', lambda: (
+            self.service._calculate_trend(self.income_values),
+            self.service._calculate_trend(self.expense_values)
+        ))
+    
+    @property
+    def analysis(self):
+        return self._get('analysis', lambda: self.service._compute_analysis(self))
+    
+    def forecast(self, months_ahead=3):
+        return self._get(f'forecast:{months_ahead}', lambda: self.service._compute_forecast(self, months_ahead))
+    
+    @property
+    def risks(self):
+        return self._get('risks', lambda: self.service._compute_risks(self))
+    
+    def suggest_improvements(self, expense_categories=None):
+        """Bağlamın verileriyle CashflowService.suggest_cashflow_improvements"""
+        return self.service.suggest_cashflow_improvements(
+            self.income_data, self.expense_data, self.balance,
+            expense_categories=expense_categories, context=self
+        )
+    
+    def simulate_scenarios(self, **kwargs):
+        """Bağlamın verileriyle CashflowService.simulate_cashflow_scenarios"""
+        return self.service.simulate_cashflow_scenarios(
+            self.income_data, self.expense_data, self.balance, context=self, **kwargs
+        )
+    
+    def recent_values(self, kind, count=3):
+        """Gelir ('income') veya gider ('expense') verisinin kendi aylarına göre son değerleri"""
+        data = self.income_data if kind == 'income' else self.expense_data
+        
+        def _compute():
+            return [data[month] for month in sorted(data.keys())[-count:]]
+        
+        return self._get(f'recent_{kind}:{count}', _compute)
+    
+    def stats(self):
+        """Bağlam ölçümlerini döndürür (hesaplanan değerler ve önbellekten kullanılma sayıları)"""
+        return {
+            'computed': list(self.computed),
+            'reused': dict(self.reuse_counts)
+        }
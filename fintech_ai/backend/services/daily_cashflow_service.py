@@ -0,0 +1,463 @@
+import datetime
+import numpy as np
+import pandas as pd
+from utils.date_utils import add_months
+
+class DailyCashflowService:
+    """
+    İşlem kayıtlarından günlük çözünürlükte nakit akışı üreten servis.
+
+    Aylık toplamlar ay içindeki nakit sıkışıklıklarını (ör. ayın 1'inde
+    maaş ödemesi, 25'inde tahsilat) gizler. Bu servis işlemleri gün
+    ofsetlerine çevirip np.bincount / np.cumsum ile yoğun günlük bakiye
+    dizileri oluşturur.
+
+    İşlevler:
+    - Günlük bakiye serisi (tek kullanıcı)
+    - Çok kullanıcılı toplu günlük bakiye matrisi ve özetleri
+    - Düzenli (tekrarlayan) giriş/çıkışların tespiti
+    - Günlük bakiye projeksiyonu
+
+    Not: Tutarlar Plaid işaret kuralını izler; pozitif tutar nakit çıkışı
+    (gider), negatif tutar nakit girişidir (gelir).
+    """
+
+    def __init__(self):
+        # Düşük bakiye eşiği (CashflowService.alert_thresholds['low_balance'] ile aynı)
+        self.low_balance_threshold = 5000
+
+        # Düzenli işlem tespiti parametreleri
+        self.recurring_min_months = 3  # En az kaç farklı ayda görülmeli
+        self.recurring_day_tolerance = 3  # Ayın günü standart sapması (gün)
+        self.recurring_amount_tolerance = 0.1  # Tutar değişim katsayısı üst sınırı
+
+    def build_daily_balances(self, transactions, opening_balance=0, start_date=None, end_date=None):
+        """
+        Tek bir kullanıcının işlemlerinden günlük bakiye serisi oluşturur
+
+        Args:
+            transactions (list): Transaction nesneleri veya {'date', 'amount'} sözlükleri
+            opening_balance (float): Başlangıç tarihinden önceki bakiye
+            start_date (date): Serinin başlangıcı (varsayılan: ilk işlem günü)
+            end_date (date): Serinin sonu (varsayılan: son işlem günü)
+
+        Returns:
+            dict: Günlük giriş, çıkış, net ve bakiye dizileri ile ay içi
+                  en düşük bakiye özetleri
+        """
+        dates, amounts, _ = self._transaction_arrays(transactions)
+
+        if len(dates) == 0 and (start_date is None or end_date is None):
+            return {'error': 'Günlük nakit akışı için işlem bulunamadı.'}
+
+        start = np.datetime64(start_date, 'D') if start_date is not None else dates.min()
+        end = np.datetime64(end_date, 'D') if end_date is not None else dates.max()
+
+        # Aralık dışındaki işlemler: öncekiler açılış bakiyesine eklenir, sonrakiler atılır
+        before = dates < start
+        opening_balance = opening_balance - float(amounts[before].sum())
+        in_range = ~before & (dates <= end)
+
+        inflow, outflow = self._daily_flows(dates[in_range], amounts[in_range], start, end)
+        net = inflow - outflow
+        balance = opening_balance + np.cumsum(net)
+
+        day_index = np.arange(start, end + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+
+        return {
+            'start_date': str(start),
+            'end_date': str(end),
+            'opening_balance': opening_balance,
+            'dates': day_index.astype(str).tolist(),
+            'inflow': inflow.tolist(),
+            'outflow': outflow.tolist(),
+            'net': net.tolist(),
+            'balance': balance.tolist(),
+            'summary': self._balance_summary(day_index, balance)
+        }
+
+    def build_daily_balance_matrix(self, user_ids, dates, amounts, start_date, end_date, opening_balances=None):
+        """
+        Birden fazla kullanıcının işlemlerinden (kullanıcı x gün) bakiye matrisi oluşturur
+
+        Tüm kullanıcıların işlemleri tek bir np.bincount çağrısıyla günlere
+        dağıtılır ve bakiyeler satır bazında kümülatif toplanır.
+
+        Args:
+            user_ids (array): İşlemlerin kullanıcı kimlikleri
+            dates (array): İşlem tarihleri (datetime64[D]'ye dönüştürülebilir)
+            amounts (array): İşlem tutarları (pozitif: çıkış, negatif: giriş)
+            start_date (date): Matrisin ilk günü
+            end_date (date): Matrisin son günü
+            opening_balances (dict): Kullanıcı -> açılış bakiyesi (opsiyonel)
+
+        Returns:
+            tuple: (kullanıcı kimlikleri dizisi, gün dizisi, bakiye matrisi)
+        """
+        users, user_codes = np.unique(np.asarray(user_ids), return_inverse=True)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        amounts = np.asarray(amounts, dtype=np.float64)
+
+        start = np.datetime64(start_date, 'D')
+        end = np.datetime64(end_date, 'D')
+        n_days = int((end - start).astype(int)) + 1
+
+        opening = np.zeros(len(users))
+        if opening_balances:
+            opening = np.array([opening_balances.get(user, 0) for user in users.tolist()], dtype=np.float64)
+
+        # Başlangıçtan önceki işlemler açılış bakiyesine eklenir
+        before = dates < start
+        if before.any():
+            opening -= np.bincount(user_codes[before], weights=amounts[before], minlength=len(users))
+
+        in_range = ~before & (dates <= end)
+        offsets = (dates[in_range] - start).astype(np.int64)
+        flat_index = user_codes[in_range] * n_days + offsets
+
+        # Nakit girişi pozitif olacak şekilde işaret çevrilir
+        net = np.bincount(flat_index, weights=-amounts[in_range], minlength=len(users) * n_days)
+        balances = net.reshape(len(users), n_days)
+        np.cumsum(balances, axis=1, out=balances)
+        balances += opening[:, None]
+
+        day_index = np.arange(start, end + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+
+        return users, day_index, balances
+
+    def summarize_daily_balances_batch(self, user_ids, dates, amounts, start_date, end_date,
+                                       opening_balances=None, chunk_size=2000):
+        """
+        Toplu çalıştırma için kullanıcı başına günlük bakiye özetleri üretir
+
+        Bellek kullanımını sınırlamak için kullanıcılar parçalar halinde işlenir
+        (5 yıl x 10.000 kullanıcı için tek seferde ~150 MB yerine parça başına ~30 MB).
+
+        Args:
+            user_ids, dates, amounts: İşlemlerin paralel dizileri
+            start_date (date): Başlangıç günü
+            end_date (date): Bitiş günü
+            opening_balances (dict): Kullanıcı -> açılış bakiyesi (opsiyonel)
+            chunk_size (int): Bir parçada işlenecek kullanıcı sayısı
+
+        Returns:
+            dict: Kullanıcı -> {'min_balance', 'min_balance_date', 'final_balance',
+                  'days_below_threshold', 'first_negative_date'}
+        """
+        user_ids = np.asarray(user_ids)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        amounts = np.asarray(amounts, dtype=np.float64)
+
+        # Kullanıcıya göre sırala; parçalar ardışık dilimler olur
+        order = np.argsort(user_ids, kind='stable')
+        user_ids, dates, amounts = user_ids[order], dates[order], amounts[order]
+        users = np.unique(user_ids)
+
+        summaries = {}
+        for chunk_start in range(0, len(users), chunk_size):
+            chunk_users = users[chunk_start:chunk_start + chunk_size]
+            lo = np.searchsorted(user_ids, chunk_users[0], side='left')
+            hi = np.searchsorted(user_ids, chunk_users[-1], side='right')
+
+            chunk_ids, day_index, balances = self.build_daily_balance_matrix(
+                user_ids[lo:hi], dates[lo:hi], amounts[lo:hi],
+                start_date, end_date, opening_balances
+            )
+
+            min_index = balances.argmin(axis=1)
+            below = (balances < self.low_balance_threshold).sum(axis=1)
+            negative = balances < 0
+            has_negative = negative.any(axis=1)
+            first_negative = negative.argmax(axis=1)
+
+            for i, user in enumerate(chunk_ids.tolist()):
+                summaries[user] = {
+                    'min_balance': float(balances[i, min_index[i]]),
+                    'min_balance_date': str(day_index[min_index[i]]),
+                    'final_balance': float(balances[i, -1]),
+                    'days_below_threshold': int(below[i]),
+                    'first_negative_date': str(day_index[first_negative[i]]) if has_negative[i] else None
+                }
+
+        return summaries
+
+    def load_transaction_arrays(self, start_date, end_date, user_ids=None):
+        """
+        Dönemdeki işlemleri veritabanından paralel diziler olarak yükler
+
+        Sadece kullanıcı, tarih ve tutar sütunları okunur (ORM nesnesi
+        oluşturulmaz). Açılış bakiyesi, toplu risk taramasındaki gibi
+        kullanıcının kayıtlı bakiyesidir (dönem sonu bakiyesi = kayıtlı
+        bakiye + dönem net nakit akışı).
+
+        Args:
+            start_date (date): Dönem başlangıcı
+            end_date (date): Dönem sonu
+            user_ids (list): Verilirse sadece bu kullanıcılar yüklenir
+
+        Returns:
+            dict: 'user_ids', 'dates', 'amounts' dizileri ve 'opening_balances'
+                  (kullanıcı -> açılış bakiyesi)
+        """
+        from app import db
+        from models.transaction import Transaction
+        from models.user import User
+
+        query = db.session.query(Transaction.user_id, Transaction.date, Transaction.amount).filter(
+            Transaction.date >= start_date,
+            Transaction.date <= end_date
+        )
+        if user_ids is not None:
+            query = query.filter(Transaction.user_id.in_(list(user_ids)))
+
+        rows = query.all()
+        columns = list(zip(*rows)) if rows else [[], [], []]
+
+        row_users = np.asarray(columns[0], dtype=np.int64)
+        users = np.unique(row_users).tolist()
+        opening_balances = {
+            user_id: balance or 0.0
+            for user_id, balance in db.session.query(User.id, User.current_balance).filter(User.id.in_(users)).all()
+        } if users else {}
+
+        return {
+            'user_ids': row_users,
+            'dates': np.asarray(columns[1], dtype='datetime64[D]'),
+            'amounts': np.asarray(columns[2], dtype=np.float64),
+            'opening_balances': opening_balances
+        }
+
+    def summarize_all_users(self, start_date, end_date, chunk_size=2000):
+        """
+        Dönemde işlemi olan tüm kullanıcıların günlük bakiye özetlerini üretir
+
+        İşlemler kullanıcı parçaları halinde yüklenir; bellekte aynı anda
+        sadece bir parçanın işlemleri ve bakiye matrisi bulunur.
+
+        Args:
+            start_date (date): Dönem başlangıcı
+            end_date (date): Dönem sonu
+            chunk_size (int): Bir parçada yüklenen kullanıcı sayısı
+
+        Returns:
+            dict: Kullanıcı -> summarize_daily_balances_batch özeti
+        """
+        from app import db
+        from models.transaction import Transaction
+
+        user_ids = [
+            user_id for (user_id,) in db.session.query(Transaction.user_id).filter(
+                Transaction.date >= start_date,
+                Transaction.date <= end_date
+            ).distinct().order_by(Transaction.user_id).all()
+        ]
+
+        summaries = {}
+        for chunk_start in range(0, len(user_ids), chunk_size):
+            data = self.load_transaction_arrays(
+                start_date, end_date, user_ids=user_ids[chunk_start:chunk_start + chunk_size]
+            )
+            summaries.update(self.summarize_daily_balances_batch(
+                data['user_ids'], data['dates'], data['amounts'], start_date, end_date,
+                opening_balances=data['opening_balances'], chunk_size=chunk_size
+            ))
+
+        return summaries
+
+    def detect_recurring_transactions(self, transactions):
+        """
+        Düzenli tekrarlayan nakit giriş ve çıkışlarını tespit eder
+
+        Aynı karşı taraf (merchant_name veya name) ve yön için en az
+        recurring_min_months farklı ayda, ayın benzer gününde ve benzer
+        tutarda gerçekleşen işlemler düzenli kabul edilir. Karşı taraf adı
+        olmayan işlemler tek bir karşı taraf sayılamayacağından atlanır.
+
+        Args:
+            transactions (list): Transaction nesneleri veya sözlükler
+
+        Returns:
+            list: Düzenli işlemler [{'name', 'direction', 'amount', 'day_of_month',
+                  'occurrences', 'last_date'}, ...]
+        """
+        dates, amounts, names = self._transaction_arrays(transactions)
+
+        named = names != ''
+        dates, amounts, names = dates[named], amounts[named], names[named]
+        if len(dates) == 0:
+            return []
+
+        df = pd.DataFrame({
+            'name': names,
+            'direction': np.where(amounts < 0, 'inflow', 'outflow'),
+            'amount': np.abs(amounts),
+            'date': dates,
+        })
+        df['month'] = df['date'].dt.year * 12 + df['date'].dt.month
+        df['day'] = df['date'].dt.day
+
+        stats = df.groupby(['name', 'direction']).agg(
+            occurrences=('amount', 'size'),
+            months=('month', 'nunique'),
+            day_of_month=('day', 'median'),
+            day_std=('day', 'std'),
+            amount=('amount', 'mean'),
+            amount_std=('amount', 'std'),
+            last_date=('date', 'max'),
+        ).reset_index()
+
+        amount_cv = (stats['amount_std'] / stats['amount']).fillna(0)
+        recurring = stats[
+            (stats['months'] >= self.recurring_min_months)
+            & (stats['occurrences'] <= stats['months'] * 1.5)  # Ayda en fazla ~1 kez
+            & (stats['day_std'].fillna(0) <= self.recurring_day_tolerance)
+            & (amount_cv <= self.recurring_amount_tolerance)
+        ]
+
+        return [
+            {
+                'name': row.name,
+                'direction': row.direction,
+                'amount': float(row.amount),
+                'day_of_month': int(round(row.day_of_month)),
+                'occurrences': int(row.occurrences),
+                'last_date': pd.Timestamp(row.last_date).date().isoformat()
+            }
+            for row in recurring.itertuples(index=False)
+        ]
+
+    def project_daily_balances(self, transactions, current_balance, days_ahead=90, as_of=None):
+        """
+        Düzenli işlemler ve düzensiz işlemlerin günlük ortalaması ile
+        gelecekteki günlük bakiyeyi tahmin eder
+
+        Args:
+            transactions (list): Geçmiş işlemler
+            current_balance (float): as_of günü sonundaki bakiye
+            days_ahead (int): Kaç gün ilerisi için tahmin yapılacağı
+            as_of (date): Tahminin başlangıç günü (varsayılan: son işlem günü)
+
+        Returns:
+            dict: Günlük tahmini bakiye, beklenen düzenli işlemler ve ilk
+                  negatif / en düşük bakiye günleri
+        """
+        dates, amounts, names = self._transaction_arrays(transactions)
+        if len(dates) == 0:
+            return {'error': 'Tahmin için işlem geçmişi bulunamadı.'}
+
+        as_of = np.datetime64(as_of, 'D') if as_of is not None else dates.max()
+        recurring = self.detect_recurring_transactions(transactions)
+
+        # Düzensiz işlemlerin günlük ortalama net akışı
+        recurring_keys = {(item['name'], item['direction']) for item in recurring}
+        directions = np.where(amounts < 0, 'inflow', 'outflow')
+        is_recurring = np.fromiter(
+            ((name, direction) in recurring_keys for name, direction in zip(names.tolist(), directions.tolist())),
+            dtype=bool, count=len(names)
+        )
+        history_days = int((as_of - dates.min()).astype(int)) + 1
+        baseline_daily_net = -float(amounts[~is_recurring].sum()) / history_days
+
+        # Gelecek düzenli işlemleri gün ofsetlerine yerleştir
+        start_day = pd.Timestamp(as_of).date()
+        event_offsets = []
+        event_amounts = []
+        expected_events = []
+        for item in recurring:
+            signed_amount = item['amount'] if item['direction'] == 'inflow' else -item['amount']
+            month_start = start_day.replace(day=1)
+            for month_step in range(0, days_ahead // 28 + 2):
+                month = add_months(month_start, month_step)
+                day = min(item['day_of_month'], (add_months(month, 1) - datetime.timedelta(days=1)).day)
+                event_date = month.replace(day=day)
+                offset = (event_date - start_day).days - 1
+                if 0 <= offset < days_ahead:
+                    event_offsets.append(offset)
+                    event_amounts.append(signed_amount)
+                    expected_events.append({
+                        'date': event_date.isoformat(),
+                        'name': item['name'],
+                        'amount': signed_amount
+                    })
+
+        projected_net = np.full(days_ahead, baseline_daily_net)
+        if event_offsets:
+            projected_net += np.bincount(event_offsets, weights=event_amounts, minlength=days_ahead)
+
+        projected_balance = current_balance + np.cumsum(projected_net)
+        day_index = np.arange(as_of + np.timedelta64(1, 'D'), as_of + np.timedelta64(days_ahead + 1, 'D'),
+                              dtype='datetime64[D]')
+
+        expected_events.sort(key=lambda event: event['date'])
+
+        return {
+            'dates': day_index.astype(str).tolist(),
+            'projected_net': projected_net.tolist(),
+            'projected_balance': projected_balance.tolist(),
+            'baseline_daily_net': baseline_daily_net,
+            'recurring': recurring,
+            'expected_events': expected_events,
+            'summary': self._balance_summary(day_index, projected_balance)
+        }
+
+    def _daily_flows(self, dates, amounts, start, end):
+        """Tarih/tutar dizilerinden günlük giriş ve çıkış dizilerini hesaplar"""
+        n_days = int((end - start).astype(int)) + 1
+        offsets = (dates - start).astype(np.int64)
+
+        inflow = np.bincount(offsets, weights=np.where(amounts < 0, -amounts, 0), minlength=n_days)
+        outflow = np.bincount(offsets, weights=np.where(amounts > 0, amounts, 0), minlength=n_days)
+
+        return inflow, outflow
+
+    def _balance_summary(self, day_index, balance):
+        """Günlük bakiye dizisi için en düşük bakiye ve ay içi sıkışıklık özetleri"""
+        if len(balance) == 0:
+            return {}
+
+        min_index = int(balance.argmin())
+        negative = np.flatnonzero(balance < 0)
+
+        # Her ayın en düşük günlük bakiyesi (ay içi nakit sıkışıklığı)
+        months = day_index.astype('datetime64[M]')
+        month_keys, month_codes = np.unique(months, return_inverse=True)
+        monthly_min = np.full(len(month_keys), np.inf)
+        np.minimum.at(monthly_min, month_codes, balance)
+
+        return {
+            'min_balance': float(balance[min_index]),
+            'min_balance_date': str(day_index[min_index]),
+            'final_balance': float(balance[-1]),
+            'days_below_threshold': int((balance < self.low_balance_threshold).sum()),
+            'first_negative_date': str(day_index[negative[0]]) if len(negative) else None,
+            'monthly_min_balance': dict(zip(month_keys.astype(str).tolist(), monthly_min.tolist()))
+        }
+
+    def _transaction_arrays(self, transactions):
+        """İşlemlerden tarih, tutar ve karşı taraf adı dizilerini çıkarır"""
+        dates = []
+        amounts = []
+        names = []
+
+        for transaction in transactions:
+            if isinstance(transaction, dict):
+                date = transaction['date']
+                amount = transaction['amount']
+                merchant_name, name = transaction.get('merchant_name'), transaction.get('name')
+            else:
+                date = transaction.date
+                amount = transaction.amount
+                merchant_name, name = transaction.merchant_name, transaction.name
+
+            # Boşluklardan oluşan ad da adsız sayılır
+            name = (merchant_name or '').strip() or (name or '').strip()
+
+            dates.append(date)
+            amounts.append(amount)
+            names.append(name)
+
+        return (
+            np.array(dates, dtype='datetime64[D]'),
+            np.array(amounts, dtype=np.float64),
+            np.array(names, dtype=object)
+        )
@@ -1,7 +1,7 @@
 import datetime
 import numpy as np
 import pandas as pd
-from sklearn.cluster import KMeans
+from services.peer_segmentation_service import PeerSegmentationService
 
 class FinancialAdviceService:
     """
@@ -89,6 +89,9 @@ class FinancialAdviceService:
                 'suitable_for': ['security_seeker']
             }
         }
+        
+        # Akran segmentasyonu (eğitilmiş model varsa profil segmentten belirlenir)
+        self.segmentation = PeerSegmentationService()
     
     def analyze_financial_health(self, income_data, expense_data, balance, debts=None):
         """
@@ -103,36 +106,10 @@ class FinancialAdviceService:
         Returns:
             dict: Finansal sağlık analiz sonuçları
         """
-        # Temel finansal oranları hesapla
+        # Temel toplamlar
         total_annual_income = sum(income_data.values())
         total_annual_expense = sum(expense_data.values())
-        
-        # Nakit akışı oranı (gelir/gider)
-        if total_annual_expense > 0:
-            cashflow_ratio = total_annual_income / total_annual_expense
-        else:
-            cashflow_ratio = float('inf')  # Gider sıfırsa, oran sonsuz
-        
-        # Tasarruf oranı (tasarruf/gelir)
-        if total_annual_income > 0:
-            savings = total_annual_income - total_annual_expense
-            savings_ratio = max(0, savings) / total_annual_income
-        else:
-            savings_ratio = 0
-        
-        # Acil durum fonu yeterliliği (bakiye / aylık gider)
-        monthly_expense = total_annual_expense / 12 if total_annual_expense > 0 else 0
-        if monthly_expense > 0:
-            emergency_fund_months = balance / monthly_expense
-        else:
-            emergency_fund_months = float('inf')
-        
-        # Borç oranı (toplam borç / yıllık gelir)
         total_debt = sum(debts.values()) if debts else 0
-        if total_annual_income > 0:
-            debt_to_income_ratio = total_debt / total_annual_income
-        else:
-            debt_to_income_ratio = float('inf')
         
         # Gelir büyüme trendi
         if len(income_data) >= 3:
@@ -141,6 +118,54 @@ class FinancialAdviceService:
         else:
             income_growth = 0
         
+        result = self.analyze_financial_health_batch(
+            [total_annual_income], [total_annual_expense], [balance], [total_debt], [income_growth]
+        )
+        
+        return {
+            'financial_health_score': float(result['financial_health_score'][0]),
+            'health_category': str(result['health_category'][0]),
+            'financial_profile': str(result['financial_profile'][0]),
+            'metrics': {name: float(values[0]) for name, values in result['metrics'].items()},
+            'component_scores': {name: float(values[0]) for name, values in result['component_scores'].items()},
+            'peer_benchmarks': self.segmentation.peer_benchmarks(int(result['segment'][0]))
+        }
+    
+    def analyze_financial_health_batch(self, annual_income, annual_expense, balance, debt, income_growth):
+        """
+        Birden fazla kullanıcının finansal sağlığını tek seferde analiz eder
+        
+        Args:
+            annual_income (array): Kullanıcıların yıllık toplam gelirleri
+            annual_expense (array): Kullanıcıların yıllık toplam giderleri
+            balance (array): Mevcut nakit bakiyeleri
+            debt (array): Toplam borçlar
+            income_growth (array): Gelir büyüme oranları (ilk aydan son aya)
+            
+        Returns:
+            dict: analyze_financial_health ile aynı yapıda, değerleri dizi olan sonuçlar
+                  ('segment': akran segmenti numarası, model yoksa -1)
+        """
+        income = np.asarray(annual_income, dtype=np.float64)
+        expense = np.asarray(annual_expense, dtype=np.float64)
+        balance = np.asarray(balance, dtype=np.float64)
+        debt = np.asarray(debt, dtype=np.float64)
+        income_growth = np.asarray(income_growth, dtype=np.float64)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Nakit akışı oranı (gelir/gider); gider sıfırsa sonsuz
+            cashflow_ratio = np.where(expense > 0, income / expense, np.inf)
+            
+            # Tasarruf oranı (tasarruf/gelir)
+            savings_ratio = np.where(income > 0, np.maximum(0, income - expense) / income, 0.0)
+            
+            # Acil durum fonu yeterliliği (bakiye / aylık gider)
+            monthly_expense = np.where(expense > 0, expense / 12, 0.0)
+            emergency_fund_months = np.where(monthly_expense > 0, balance / monthly_expense, np.inf)
+            
+            # Borç oranı (toplam borç / yıllık gelir)
+            debt_to_income_ratio = np.where(income > 0, debt / income, np.inf)
+        
         # Finansal sağlık skoru hesaplama (0-100)
         # Faktörler ve ağırlıkları:
         # - Nakit akışı oranı (25%): 1.0 değerinde ideal, >2.0 çok iyi, <0.8 zayıf
@@ -149,38 +174,49 @@ class FinancialAdviceService:
         # - Borç oranı (20%): <0.3 çok iyi, >0.5 zayıf
         # - Gelir büyüme trendi (10%): >0.1 çok iyi, <0 zayıf
         
-        cashflow_score = min(25, 25 * min(cashflow_ratio / 1.5, 1.0))
-        savings_score = min(25, 25 * min(savings_ratio / 0.2, 1.0))
-        emergency_fund_score = min(20, 20 * min(emergency_fund_months / 6, 1.0))
-        debt_score = min(20, 20 * (1 - min(debt_to_income_ratio / 0.5, 1.0)))
-        growth_score = min(10, 10 * (0.5 + min(income_growth / 0.2, 0.5)))
+        cashflow_score = np.minimum(25, 25 * np.minimum(cashflow_ratio / 1.5, 1.0))
+        savings_score = np.minimum(25, 25 * np.minimum(savings_ratio / 0.2, 1.0))
+        emergency_fund_score = np.minimum(20, 20 * np.minimum(emergency_fund_months / 6, 1.0))
+        debt_score = np.minimum(20, 20 * (1 - np.minimum(debt_to_income_ratio / 0.5, 1.0)))
+        growth_score = np.minimum(10, 10 * (0.5 + np.minimum(income_growth / 0.2, 0.5)))
         
         financial_health_score = cashflow_score + savings_score + emergency_fund_score + debt_score + growth_score
         
         # Skor kategorisi
-        if financial_health_score >= self.financial_health_thresholds['excellent']:
-            health_category = 'excellent'
-        elif financial_health_score >= self.financial_health_thresholds['good']:
-            health_category = 'good'
-        elif financial_health_score >= self.financial_health_thresholds['fair']:
-            health_category = 'fair'
-        else:
-            health_category = 'poor'
+        thresholds = self.financial_health_thresholds
+        health_category = np.select(
+            [
+                financial_health_score >= thresholds['excellent'],
+                financial_health_score >= thresholds['good'],
+                financial_health_score >= thresholds['fair']
+            ],
+            ['excellent', 'good', 'fair'],
+            default='poor'
+        )
+        
+        metrics = {
+            'cashflow_ratio': cashflow_ratio,
+            'savings_ratio': savings_ratio,
+            'emergency_fund_months': emergency_fund_months,
+            'debt_to_income_ratio': debt_to_income_ratio,
+            'income_growth': income_growth
+        }
         
-        # Kullanıcının finansal profil segmenti tahmin et
-        financial_profile = self._determine_financial_profile(income_growth, savings_ratio, debt_to_income_ratio)
+        # Kullanıcıların finansal profil segmentleri: eğitilmiş segmentasyon modeli
+        # varsa en yakın segmentin profili, yoksa kural tabanlı profil
+        if self.segmentation.model_loaded:
+            segment = self.segmentation.assign_segments(self.segmentation.build_features(metrics))
+            financial_profile = self.segmentation.segment_profiles(segment)
+        else:
+            segment = np.full(len(income), -1)
+            financial_profile = self._determine_financial_profiles(income_growth, savings_ratio, debt_to_income_ratio)
         
         return {
             'financial_health_score': financial_health_score,
             'health_category': health_category,
             'financial_profile': financial_profile,
-            'metrics': {
-                'cashflow_ratio': cashflow_ratio,
-                'savings_ratio': savings_ratio,
-                'emergency_fund_months': emergency_fund_months,
-                'debt_to_income_ratio': debt_to_income_ratio,
-                'income_growth': income_growth
-            },
+            'segment': segment,
+            'metrics': metrics,
             'component_scores': {
                 'cashflow_score': cashflow_score,
                 'savings_score': savings_score,
@@ -190,6 +226,82 @@ class FinancialAdviceService:
             }
         }
     
+    def load_health_inputs(self, months=12, as_of=None):
+        """
+        Tüm kullanıcılar için analyze_financial_health_batch girdilerini
+        SQL'de gruplanmış aylık toplamlardan hazırlar
+        
+        Args:
+            months (int): Kullanılacak ay sayısı
+            as_of (date): Dönem sonu (varsayılan: bugün)
+        
+        Returns:
+            dict: 'user_ids', 'annual_income', 'annual_expense', 'balance', 'debt', 'income_growth'
+        """
+        from services.cashflow_risk_engine import CashflowRiskEngine
+        
+        as_of = as_of or datetime.date.today()
+        start_index = as_of.year * 12 + as_of.month - months
+        start_date = datetime.date(start_index // 12, start_index % 12 + 1, 1)
+        
+        data = CashflowRiskEngine().load_monthly_matrix(start_date, as_of)
+        income = data['income']
+        income_mask = data['income_mask']
+        n_users, n_months = income.shape
+        rows = np.arange(n_users)
+        
+        # Gelir büyümesi: gelir verisi olan ilk ve son ay (en az 3 ay veri gerekir)
+        first = income_mask.argmax(axis=1)
+        last = n_months - 1 - income_mask[:, ::-1].argmax(axis=1)
+        first_income = income[rows, first]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            income_growth = np.where(
+                (income_mask.sum(axis=1) >= 3) & (first_income > 0),
+                income[rows, last] / first_income - 1,
+                0.0
+            )
+        
+        return {
+            'user_ids': data['user_ids'],
+            'annual_income': np.where(income_mask, income, 0).sum(axis=1),
+            'annual_expense': np.where(data['expense_mask'], data['expense'], 0).sum(axis=1),
+            'balance': data['balances'],
+            # Borç verisi henüz tutulmuyor
+            'debt': np.zeros(n_users),
+            'income_growth': income_growth
+        }
+    
+    def train_peer_segments(self, months=12, chunk_size=10000, epochs=3):
+        """
+        Akran segmentasyon modelini tüm kullanıcı tabanı üzerinde eğitir
+        
+        Args:
+            months (int): Metrikler için kullanılacak ay sayısı
+            chunk_size (int): Eğitimde bir seferde işlenen kullanıcı sayısı
+            epochs (int): Kümeleme için veri üzerinden geçiş sayısı
+        
+        Returns:
+            dict: Eğitim özeti
+        """
+        inputs = self.load_health_inputs(months=months)
+        
+        # Özellikler ve kural tabanlı profiller (segment profillerinin etiketi)
+        result = self.analyze_financial_health_batch(
+            inputs['annual_income'], inputs['annual_expense'], inputs['balance'],
+            inputs['debt'], inputs['income_growth']
+        )
+        metrics = result['metrics']
+        features = self.segmentation.build_features(metrics)
+        rule_profiles = self._determine_financial_profiles(
+            metrics['income_growth'], metrics['savings_ratio'], metrics['debt_to_income_ratio']
+        )
+        
+        def chunk_factory():
+            for start in range(0, len(features), chunk_size):
+                yield features[start:start + chunk_size], rule_profiles[start:start + chunk_size]
+        
+        return self.segmentation.train(chunk_factory, epochs=epochs)
+    
     def generate_financial_advice(self, financial_health, transaction_data=None, expense_categories=None, goals=None):
         """
         Kullanıcıya özel finansal tavsiyeler üretir
@@ -527,13 +639,25 @@ class FinancialAdviceService:
         Returns:
             str: Finansal profil adı
         """
-        # Basit bir kural tabanlı yaklaşım
-        if income_growth > 0.15 and debt_ratio < 0.4:
-            return 'growth_seeker'
-        elif savings_ratio > 0.15 and debt_ratio < 0.3:
-            return 'security_seeker'
-        else:
-            return 'stability_seeker'
+        return str(self._determine_financial_profiles([income_growth], [savings_ratio], [debt_ratio])[0])
+    
+    def _determine_financial_profiles(self, income_growth, savings_ratio, debt_ratio):
+        """
+        _determine_financial_profile'ın dizi karşılığı
+        
+        Returns:
+            ndarray: Kullanıcı başına finansal profil adları
+        """
+        income_growth = np.asarray(income_growth, dtype=np.float64)
+        savings_ratio = np.asarray(savings_ratio, dtype=np.float64)
+        debt_ratio = np.asarray(debt_ratio, dtype=np.float64)
         
-        # Not: Gerçek bir uygulamada, burada daha sofistike bir makine öğrenmesi
-        # modeli (örn. K-means kümeleme) kullanılabilir 
\ No newline at end of file
+        # Basit bir kural tabanlı yaklaşım
+        return np.select(
+            [
+                (income_growth > 0.15) & (debt_ratio < 0.4),
+                (savings_ratio > 0.15) & (debt_ratio < 0.3)
+            ],
+            ['growth_seeker', 'security_seeker'],
+            default='stability_seeker'
+        )
@@ -0,0 +1,251 @@
+import datetime
+from utils.concurrency import run_parallel
+
+class FinancialContextBuilder:
+    """
+    Tavsiye ve AI endpointlerinin ortak kullandığı kullanıcı finansal
+    bağlamını oluşturan sınıf.
+
+    Gider ve gelir toplamları SQL'de gruplanarak tek sorguda (son yılın aylık
+    ve kategori toplamları ile son 30 günün toplamları birlikte) hesaplanır;
+    bütçeler ve hedefler birer sorguyla alınır ve bağımsız sorgular paralel
+    çalıştırılır. Bağlam istek başına bir kez
+    oluşturulur ve flask.g üzerinde saklanır.
+    """
+
+    def __init__(self, history_days=365, recent_days=30):
+        """
+        Args:
+            history_days (int): Finansal sağlık analizi için geriye bakılan gün sayısı
+            recent_days (int): AI bağlamındaki "aylık" toplamlar için gün sayısı
+        """
+        self.history_days = history_days
+        self.recent_days = recent_days
+
+    def get(self, user_id):
+        """
+        Kullanıcının finansal bağlamını döndürür (istek içinde önbelleklenir)
+
+        Args:
+            user_id: Kullanıcı kimliği
+
+        Returns:
+            dict: Finansal bağlam (kullanıcı yoksa None)
+        """
+        from flask import g, has_request_context
+
+        if not has_request_context():
+            return self.build(user_id)
+
+        contexts = g.setdefault('financial_contexts', {})
+        key = str(user_id)
+        if key not in contexts:
+            contexts[key] = self.build(user_id)
+
+        return contexts[key]
+
+    def build(self, user_id, now=None):
+        """
+        Kullanıcının finansal bağlamını veritabanından oluşturur
+
+        Birbirinden bağımsız beş sorgu (kullanıcı, gider ve gelir toplamları,
+        bütçeler, hedefler) ayrı bağlantılarda paralel çalıştırılır; böylece
+        uzak veritabanında istek süresi sorgu gecikmelerinin toplamı yerine en
+        yavaş sorgunun süresi kadar olur.
+
+        Args:
+            user_id: Kullanıcı kimliği
+            now (datetime): Dönem sonu (varsayılan: şimdi)
+
+        Returns:
+            dict: 'user', 'now', 'current_balance', aylık gelir/gider toplamları,
+                  yıllık ve son dönem kategori toplamları, 'budgets', 'goals'
+                  (kullanıcı yoksa None)
+        """
+        now = now or datetime.datetime.now()
+        end = now.date()
+        history_start = (now - datetime.timedelta(days=self.history_days)).date()
+        recent_start = (now - datetime.timedelta(days=self.recent_days)).date()
+
+        results = run_parallel({
+            'user': lambda: self._load_user(user_id),
+            'expenses': lambda: self._load_expense_rows(user_id, history_start, recent_start, end),
+            'incomes': lambda: self._load_income_rows(user_id, history_start, recent_start, end),
+            'budgets': lambda: self._load_budgets(user_id),
+            'goals': lambda: self._load_goals(user_id)
+        })
+
+        user = results['user']
+        if user is None:
+            return None
+
+        monthly_expenses = {}
+        expense_categories = {}
+        recent_expense_categories = {}
+        for year, month, category, amount, recent_amount, recent_count in results['expenses']:
+            month_key = f"{int(year)}-{int(month):02d}"
+            monthly_expenses[month_key] = monthly_expenses.get(month_key, 0) + amount
+            expense_categories[category] = expense_categories.get(category, 0) + amount
+            if recent_count:
+                recent_expense_categories[category] = recent_expense_categories.get(category, 0) + recent_amount
+
+        monthly_income = {}
+        recent_income = 0
+        for year, month, amount, recent_amount in results['incomes']:
+            monthly_income[f"{int(year)}-{int(month):02d}"] = amount
+            recent_income += recent_amount or 0
+
+        return {
+            'user': {
+                'name': user['full_name'],
+                'company': user['company_name']
+            },
+            'now': now,
+            'current_balance': user['current_balance'],
+            'monthly_income': monthly_income,
+            'monthly_expenses': monthly_expenses,
+            'expense_categories': expense_categories,
+            'recent_income': recent_income,
+            'recent_expenses': sum(recent_expense_categories.values()),
+            'recent_expense_categories': recent_expense_categories,
+            'budgets': results['budgets'],
+            'goals': results['goals']
+        }
+
+    # Aşağıdaki yükleyiciler ayrı iş parçacıklarında çalışır; ORM nesnesi yerine düz veri döndürür
+
+    def _load_user(self, user_id):
+        from models.user import User
+
+        user = User.query.get(user_id)
+        if not user:
+            return None
+
+        return {
+            'full_name': user.full_name,
+            'company_name': user.company_name,
+            'current_balance': user.current_balance
+        }
+
+    def _load_expense_rows(self, user_id, history_start, recent_start, end):
+        """Giderler: ay ve kategori bazında yıllık toplam ve son dönem toplamı"""
+        from sqlalchemy import case, func
+        from app import db
+        from models.expense import Expense
+
+        expense_year = func.extract('year', Expense.date)
+        expense_month = func.extract('month', Expense.date)
+        rows = db.session.query(
+            expense_year,
+            expense_month,
+            Expense.category,
+            func.sum(Expense.amount),
+            func.sum(case((Expense.date >= recent_start, Expense.amount), else_=0)),
+            func.sum(case((Expense.date >= recent_start, 1), else_=0))
+        ).filter(
+            Expense.user_id == user_id,
+            Expense.date >= history_start,
+            Expense.date <= end
+        ).group_by(expense_year, expense_month, Expense.category).all()
+
+        return [tuple(row) for row in rows]
+
+    def _load_income_rows(self, user_id, history_start, recent_start, end):
+        """Gelirler: aylık toplam ve son dönem toplamı"""
+        from sqlalchemy import case, func
+        from app import db
+        from models.income import Income
+
+        income_year = func.extract('year', Income.date)
+        income_month = func.extract('month', Income.date)
+        rows = db.session.query(
+            income_year,
+            income_month,
+            func.sum(Income.amount),
+            func.sum(case((Income.date >= recent_start, Income.amount), else_=0))
+        ).filter(
+            Income.user_id == user_id,
+            Income.date >= history_start,
+            Income.date <= end
+        ).group_by(income_year, income_month).all()
+
+        return [tuple(row) for row in rows]
+
+    def _load_budgets(self, user_id):
+        from models.budget import Budget
+
+        return [
+            {
+                'category': budget.category,
+                'amount': budget.amount,
+                'period': budget.period
+            }
+            for budget in Budget.query.filter_by(user_id=user_id).all()
+        ]
+
+    def _load_goals(self, user_id):
+        from models.financial_goal import FinancialGoal
+
+        return [
+            {
+                'id': goal.id,
+                'name': goal.name,
+                'target_amount': goal.target_amount,
+                'current_amount': goal.current_amount,
+                'deadline': goal.deadline.strftime('%Y-%m-%d') if goal.deadline else None,
+                'priority': goal.priority
+            }
+            for goal in FinancialGoal.query.filter_by(user_id=user_id).all()
+        ]
+
+    def ai_financial_data(self, context):
+        """
+        Bağlamı AI yanıt servisine gönderilen finansal veri yapısına dönüştürür
+
+        Args:
+            context (dict): get() çıktısı
+
+        Returns:
+            dict: Son dönem gelir/gider, bütçe kullanımı ve hedef ilerlemesi
+        """
+        expense_categories = context['recent_expense_categories']
+        total_income = context['recent_income']
+        total_expenses = context['recent_expenses']
+
+        # Bütçenin ne kadarının kullanıldığını hesapla
+        budget_data = {}
+        for budget in context['budgets']:
+            used_amount = expense_categories.get(budget['category'], 0)
+            remaining = budget['amount'] - used_amount
+            budget_data[budget['category']] = {
+                'limit': budget['amount'],
+                'used': used_amount,
+                'remaining': remaining,
+                'status': 'İyi' if remaining > (budget['amount'] * 0.2) else 'Dikkat'
+            }
+
+        goals_data = [
+            {
+                'name': goal['name'],
+                'target': goal['target_amount'],
+                'current': goal['current_amount'],
+                'progress': (goal['current_amount'] / goal['target_amount'] * 100) if goal['target_amount'] > 0 else 0,
+                'deadline': goal['deadline']
+            }
+            for goal in context['goals']
+        ]
+
+        savings = max(0, total_income - total_expenses)
+
+        return {
+            'user': dict(context['user']),
+            'current_month': context['now'].strftime('%B %Y'),  # Örn: "Mart 2023"
+            'monthly_income': total_income,
+            'monthly_expenses': total_expenses,
+            'savings': savings,
+            'savings_rate': (savings / total_income * 100) if total_income > 0 else 0,
+            'current_balance': context['current_balance'],
+            'expense_categories': dict(expense_categories),
+            'budgets': budget_data,
+            'goals': goals_data
+        }
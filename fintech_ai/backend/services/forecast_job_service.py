@@ -0,0 +1,342 @@
+import uuid
+import time
+import json
+import hashlib
+import datetime
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+class ForecastJobService:
+    """
+    Uzun süren gelir tahmini işlerini arka planda çalıştıran servis.
+
+    İşlevler:
+    - İş gönderme, durum sorgulama ve sonuç alma
+    - Kullanıcı başına tekilleştirme (aynı anda tek aktif iş)
+    - Süre sınırı ve iptal
+    - Sonuç deposu: tekrar eden istekler depodan yanıtlanır, eskimiş
+      sonuçlar arka planda yenilenir
+
+    İşler ve sonuçları forecast_jobs tablosunda tutulur; iş, gönderildiği
+    gunicorn işçisinde çalışır ama durum sorgusu ve iptal herhangi bir
+    işçiden yapılabilir. Çalışan iş iptali veritabanındaki durumdan okur.
+
+    Tahmin modelleri tüm kullanıcılar için ortaktır; işler modelleri
+    eğitmez. Modeller `flask train-income-models` komutuyla eğitilir,
+    işçiler yeni sürümü diskten yükler.
+    """
+
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    def __init__(self, income_prediction_service, max_workers=2, time_limit=600, result_ttl=3600,
+                 cancel_check_interval=2.0):
+        """
+        Args:
+            income_prediction_service (IncomePredictionService): Tahmin servisi
+            max_workers (int): Bu işlemde eşzamanlı çalışan iş sayısı
+            time_limit (int): Bir işin kuyrukta veya çalışırken kalabileceği en uzun süre (saniye)
+            result_ttl (int): Depolanan sonucun taze kabul edildiği süre (saniye)
+            cancel_check_interval (float): Çalışan işin iptal durumunu veritabanından
+                                           okuma aralığı (saniye)
+        """
+        self.income_prediction_service = income_prediction_service
+        self.time_limit = time_limit
+        self.result_ttl = result_ttl
+        self.cancel_check_interval = cancel_check_interval
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='forecast-job')
+
+    def submit(self, user_id, income_data, months=6):
+        """
+        Tahmin işi gönderir
+
+        Depoda aynı veri için taze bir sonuç varsa yeni iş açılmaz. Sonuç
+        eskimişse veya veri değişmişse depodaki sonuç hemen döndürülür ve
+        yenileme arka planda başlatılır.
+
+        Args:
+            user_id: Kullanıcı kimliği
+            income_data (dict): Aylık gelir verileri {'2023-01': 5000, ...}
+            months (int): Kaç ay ilerisi için tahmin yapılacağı
+
+        Returns:
+            dict: {'job': iş durumu veya None, 'result': depodaki sonuç veya None,
+                   'stale': depodaki sonucun eskimiş olup olmadığı}
+        """
+        from flask import current_app
+        from app import db
+        from models.user import User
+        from models.forecast_job import ForecastJob
+
+        data_key = self._data_key(income_data, months)
+        now = datetime.datetime.now()
+
+        # Aynı kullanıcının eş zamanlı gönderimleri (farklı işçilerde bile) sıraya girer
+        User.query.filter_by(id=user_id).with_for_update().first()
+
+        self._prune_jobs(user_id, now)
+
+        stored = ForecastJob.query.filter_by(user_id=user_id, status='completed').order_by(
+            ForecastJob.finished_at.desc()
+        ).first()
+        is_fresh = (
+            stored is not None
+            and stored.data_key == data_key
+            and (now - stored.finished_at).total_seconds() < self.result_ttl
+        )
+
+        if is_fresh:
+            db.session.commit()
+            return {'job': None, 'result': stored.result_data, 'stale': False}
+
+        job = self._active_job(user_id, now)
+
+        if job is not None and job.data_key != data_key:
+            # Kullanıcının verisi değişti, eski işin sonucu artık gereksiz
+            self._mark_finished(job, 'cancelled', now)
+            job = None
+
+        created = job is None
+        if created:
+            job = ForecastJob(
+                id=uuid.uuid4().hex,
+                user_id=user_id,
+                data_key=data_key,
+                months=months,
+                status='queued',
+                submitted_at=now
+            )
+            db.session.add(job)
+
+        db.session.commit()
+
+        if created:
+            app = current_app._get_current_object()
+            self.executor.submit(self._run_job, app, job.id, dict(income_data))
+
+        return {
+            'job': job.to_dict(),
+            'result': stored.result_data if stored else None,
+            'stale': stored is not None
+        }
+
+    def get_job(self, job_id, user_id=None):
+        """
+        İş durumunu döndürür
+
+        Args:
+            job_id (str): İş kimliği
+            user_id: Verilirse sadece bu kullanıcının işleri döndürülür
+
+        Returns:
+            dict: İş durumu (iş bulunamazsa None)
+        """
+        job = self._find_job(job_id, user_id)
+        if job is None:
+            return None
+
+        self._check_time_limit(job)
+        return job.to_dict()
+
+    def get_result(self, job_id, user_id=None):
+        """
+        Tamamlanmış işin sonucunu döndürür
+
+        Returns:
+            tuple: (iş durumu, sonuç) - iş tamamlanmadıysa sonuç None
+        """
+        job = self._find_job(job_id, user_id)
+        if job is None:
+            return None, None
+
+        self._check_time_limit(job)
+        return job.to_dict(), job.result_data
+
+    def cancel(self, job_id, user_id=None):
+        """
+        İşi iptal eder
+
+        Kuyruktaki işler hiç çalışmaz; çalışan işler bir sonraki kontrol
+        noktasında durur.
+
+        Returns:
+            dict: İş durumu (iş bulunamazsa None)
+        """
+        from app import db
+
+        job = self._find_job(job_id, user_id)
+        if job is None:
+            return None
+
+        if job.status in self.ACTIVE_STATUSES:
+            self._mark_finished(job, 'cancelled', datetime.datetime.now())
+            db.session.commit()
+
+        return job.to_dict()
+
+    def _run_job(self, app, job_id, income_data):
+        """İşi işçi iş parçacığında, kendi uygulama bağlamında çalıştırır"""
+        with app.app_context():
+            self._execute_job(job_id, income_data)
+
+    def _execute_job(self, job_id, income_data):
+        from app import db
+        from models.forecast_job import ForecastJob
+
+        # İşi sadece hâlâ kuyruktaysa üstlen (bu arada iptal edilmiş olabilir)
+        started_at = datetime.datetime.now()
+        claimed = ForecastJob.query.filter_by(id=job_id, status='queued').update(
+            {'status': 'running', 'started_at': started_at}, synchronize_session=False
+        )
+        db.session.commit()
+        if not claimed:
+            return
+
+        job = db.session.get(ForecastJob, job_id)
+        months, user_id = job.months, job.user_id
+        should_stop = self._stop_checker(job_id)
+
+        try:
+            if should_stop():
+                return self._finish_job(job_id, None)
+
+            result = self.income_prediction_service.predict_future_income(
+                income_data, months=months, user_id=user_id
+            )
+            self._finish_job(job_id, result)
+        except Exception as e:
+            print(f"Tahmin işi başarısız oldu ({job_id}): {str(e)}")
+            print(f"Hata ayrıntıları: {traceback.format_exc()}")
+            db.session.rollback()
+            self._finish_job(job_id, None, error=str(e))
+
+    def _stop_checker(self, job_id):
+        """
+        Çalışan işin durması gerekip gerekmediğini döndüren fonksiyon oluşturur
+
+        Süre sınırı yerel saatle, iptal ise veritabanındaki durumla (en fazla
+        cancel_check_interval saniyede bir okunarak) kontrol edilir.
+        """
+        from app import db
+        from models.forecast_job import ForecastJob
+
+        started = time.monotonic()
+        state = {'checked_at': started, 'stopped': False}
+
+        def should_stop():
+            if state['stopped']:
+                return True
+
+            now = time.monotonic()
+            if now - started > self.time_limit:
+                state['stopped'] = True
+            elif now - state['checked_at'] >= self.cancel_check_interval:
+                state['checked_at'] = now
+                status = db.session.query(ForecastJob.status).filter_by(id=job_id).scalar()
+                # Okuma işlemi açık kalmasın (tahmin uzun sürebilir)
+                db.session.commit()
+                state['stopped'] = status != 'running'
+
+            return state['stopped']
+
+        return should_stop
+
+    def _finish_job(self, job_id, result, error=None):
+        """İşin son durumunu kaydeder; başarılı sonuç depoya (iş satırına) yazılır"""
+        from app import db
+        from models.forecast_job import ForecastJob
+
+        job = db.session.get(ForecastJob, job_id, populate_existing=True)
+        if job is None:
+            return
+
+        now = datetime.datetime.now()
+
+        # İptal edilen veya zaman aşımına uğrayan işin durumu korunur
+        if job.status == 'running':
+            if error is not None:
+                self._mark_finished(job, 'failed', now, error=error)
+            elif self._is_over_time_limit(job, now):
+                self._mark_finished(job, 'timeout', now)
+            elif result is None:
+                self._mark_finished(job, 'cancelled', now)
+            elif result.get('status') != 'success':
+                self._mark_finished(job, 'failed', now, error=result.get('message'))
+            else:
+                self._mark_finished(job, 'completed', now)
+                job.result = json.dumps(result, ensure_ascii=False)
+
+        db.session.commit()
+
+    def _mark_finished(self, job, status, now, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = job.finished_at or now
+
+    def _check_time_limit(self, job):
+        """Süresi dolan aktif işi zaman aşımı olarak işaretler"""
+        from app import db
+
+        now = datetime.datetime.now()
+        if job.status in self.ACTIVE_STATUSES and self._is_over_time_limit(job, now):
+            self._mark_finished(job, 'timeout', now)
+            db.session.commit()
+
+    def _is_over_time_limit(self, job, now):
+        """
+        İşin süre sınırını aşıp aşmadığını kontrol eder
+
+        Çalıştığı işçi kapanan işler asılı kalmasın diye kuyrukta bekleme
+        de süre sınırına tabidir.
+        """
+        since = job.started_at or job.submitted_at
+        return since is not None and (now - since).total_seconds() > self.time_limit
+
+    def _active_job(self, user_id, now):
+        """Kullanıcının kuyrukta veya çalışmakta olan işini döndürür"""
+        from models.forecast_job import ForecastJob
+
+        for job in ForecastJob.query.filter(
+            ForecastJob.user_id == user_id, ForecastJob.status.in_(self.ACTIVE_STATUSES)
+        ).order_by(ForecastJob.submitted_at.desc()).all():
+            if self._is_over_time_limit(job, now):
+                self._mark_finished(job, 'timeout', now)
+            else:
+                return job
+
+        return None
+
+    def _find_job(self, job_id, user_id):
+        """İşi bulur; kullanıcı verilmişse sahipliği kontrol eder"""
+        from models.forecast_job import ForecastJob
+
+        query = ForecastJob.query.filter_by(id=job_id)
+        if user_id is not None:
+            query = query.filter_by(user_id=user_id)
+        return query.first()
+
+    def _prune_jobs(self, user_id, now):
+        """Kullanıcının sonuç süresinden eski, bitmiş iş kayıtlarını temizler (son sonuç korunur)"""
+        from models.forecast_job import ForecastJob
+
+        latest = ForecastJob.query.with_entities(ForecastJob.id).filter_by(
+            user_id=user_id, status='completed'
+        ).order_by(ForecastJob.finished_at.desc()).first()
+
+        expired = ForecastJob.query.filter(
+            ForecastJob.user_id == user_id,
+            ForecastJob.finished_at.isnot(None),
+            ForecastJob.finished_at < now - datetime.timedelta(seconds=self.result_ttl)
+        )
+        if latest is not None:
+            expired = expired.filter(ForecastJob.id != latest.id)
+
+        expired.delete(synchronize_session=False)
+
+    def _data_key(self, income_data, months):
+        """İş girdisinin içerik özetini hesaplar"""
+        payload = json.dumps(
+            {'income': income_data, 'months': months},
+            sort_keys=True, separators=(',', ':'), default=float
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
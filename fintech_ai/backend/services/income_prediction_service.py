@@ -7,11 +7,12 @@ from tensorflow.keras.layers import LSTM, Dense, Dropout
 from sklearn.preprocessing import MinMaxScaler
 import pickle
 import datetime
+import threading
+import hashlib
+import json
 from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.tsa.statespace.sarimax import SARIMAX
-import matplotlib.pyplot as plt
-import io
-import base64
+from services.snapshot_cache import create_cache_backend
 
 class IncomePredictionService:
     """
@@ -22,10 +23,11 @@ class IncomePredictionService:
     tahmin yapar.
     """
     
-    def __init__(self, model_dir='models'):
+    def __init__(self, model_dir='models', forecast_ttl=3600):
         """
         Args:
             model_dir (str): Model dosyalarının saklanacağı dizin
+            forecast_ttl (int): Tahminlerin ve grafiklerin saklanma süresi (saniye)
         """
         self.model_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), model_dir)
         self.models_loaded = False
@@ -34,29 +36,127 @@ class IncomePredictionService:
         self.arima_model = None
         self.sarima_model = None
         
+        # Modeller tahminlerle eş zamanlı yeniden eğitilebilir: eğitim yerel
+        # değişkenlerde yapılır, kaydedildikten sonra bu kilit altında
+        # tek seferde değiştirilir. Sürüm, diğer işçilerin yeni modelleri
+        # diskten yeniden yüklemesi için kullanılır.
+        self.model_lock = threading.Lock()
+        self.model_version = None
+        
+        # Grafikler isteğe bağlı üretilir; tahmin ve grafikler tahminin sahibi
+        # ve içerik özetiyle (forecast_id) anahtarlanır. SNAPSHOT_CACHE_URL
+        # tanımlıysa (Redis) grafik isteği başka bir işçiye düşse de tahmin bulunur.
+        self.forecast_cache_size = 32
+        self.forecast_ttl = forecast_ttl
+        self.forecast_cache = create_cache_backend(max_entries=2 * self.forecast_cache_size)
+        
         # Modelleri yükle
         self._load_models()
     
     def _load_models(self):
         """Kayıtlı modelleri yükler"""
+        # Sürüm dosyalardan önce okunur; yükleme sırasında yeni bir eğitim
+        # kaydedilirse bir sonraki kontrolde yeniden yüklenir
+        version = self._read_model_version()
+        
         try:
             # LSTM modeli ve veri ölçekleyici
-            self.lstm_model = load_model(os.path.join(self.model_dir, 'income_lstm_model.h5'))
+            lstm_model = load_model(os.path.join(self.model_dir, 'income_lstm_model.h5'))
             
             with open(os.path.join(self.model_dir, 'income_scaler.pkl'), 'rb') as f:
-                self.scaler = pickle.load(f)
+                scaler = pickle.load(f)
             
             # ARIMA ve SARIMA parametreleri
             with open(os.path.join(self.model_dir, 'arima_params.pkl'), 'rb') as f:
-                self.arima_params = pickle.load(f)
+                arima_params = pickle.load(f)
             
             with open(os.path.join(self.model_dir, 'sarima_params.pkl'), 'rb') as f:
-                self.sarima_params = pickle.load(f)
-            
-            self.models_loaded = True
+                sarima_params = pickle.load(f)
         except (FileNotFoundError, OSError):
-            self.models_loaded = False
             print("Gelir tahmin modelleri bulunamadı. Tahmin yapmadan önce modelleri eğitin.")
+            return
+        
+        self._swap_models(lstm_model, scaler, arima_params, sarima_params, version)
+    
+    def _swap_models(self, lstm_model, scaler, arima_params, sarima_params, version):
+        """Kullanılan modelleri tek seferde değiştirir"""
+        with self.model_lock:
+            self.lstm_model = lstm_model
+            self.scaler = scaler
+            self.arima_params = arima_params
+            self.sarima_params = sarima_params
+            self.model_version = version
+            self.models_loaded = True
+    
+    def _current_models(self):
+        """
+        Tahminde kullanılacak modelleri tutarlı bir küme olarak döndürür
+        
+        Başka bir işçi (veya işlem) modelleri yeniden eğitip kaydettiyse
+        önce diskten yeniden yükler.
+        
+        Returns:
+            tuple: (lstm_model, scaler, arima_params, sarima_params) - model yoksa None
+        """
+        version = self._read_model_version()
+        if version is not None and version != self.model_version:
+            self._load_models()
+        
+        with self.model_lock:
+            if not self.models_loaded:
+                return None
+            return self.lstm_model, self.scaler, self.arima_params, self.sarima_params
+    
+    def models_available(self):
+        """Tahmin için eğitilmiş model olup olmadığını döndürür (başka işçide eğitilenler dahil)"""
+        return self._current_models() is not None
+    
+    def _read_model_version(self):
+        """Diskteki model kümesinin sürümünü okur (sürüm dosyası yoksa None)"""
+        try:
+            with open(os.path.join(self.model_dir, 'income_models.version')) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+    
+    def _save_models(self, lstm_model, scaler, arima_params, sarima_params):
+        """
+        Modelleri diske kaydeder ve yeni sürümü döndürür
+        
+        Her dosya önce geçici adla yazılıp yerine taşınır; sürüm dosyası en
+        son yazıldığından diğer işçiler yarım kaydedilmiş bir kümeyi yüklemez.
+        """
+        os.makedirs(self.model_dir, exist_ok=True)
+        prefix = f".tmp-{os.getpid()}-{threading.get_ident()}-"
+        
+        def write(filename, save):
+            path = os.path.join(self.model_dir, filename)
+            # Geçici dosya adı asıl uzantıyla biter (Keras biçimi uzantıdan belirlenir)
+            tmp_path = os.path.join(self.model_dir, prefix + filename)
+            save(tmp_path)
+            os.replace(tmp_path, path)
+        
+        def dump(value):
+            def save(path):
+                with open(path, 'wb') as f:
+                    pickle.dump(value, f)
+            return save
+        
+        def write_text(text):
+            def save(path):
+                with open(path, 'w') as f:
+                    f.write(text)
+            return save
+        
+        version = f"{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}-{os.urandom(4).hex()}"
+        
+        write('income_lstm_model.h5', lstm_model.save)
+        write('income_scaler.pkl', dump(scaler))
+        write('arima_params.pkl', dump(arima_params))
+        write('sarima_params.pkl', dump(sarima_params))
+        write('income_models.version', write_text(version))
+        
+        return version
     
     def _create_lstm_model(self, input_shape):
         """LSTM ağı mimarisini oluşturur"""
@@ -94,13 +194,15 @@ class IncomePredictionService:
         """LSTM girdisini modele uygun şekilde yeniden şekillendirir"""
         return np.reshape(data, (data.shape[0], time_steps, 1))
     
-    def train_models(self, income_data):
+    def train_models(self, income_data, should_stop=None):
         """
         Gelir tahmin modellerini eğitir
         
         Args:
             income_data (dict): Aylık gelir verilerini içeren sözlük
                                {'2023-01': 5000, '2023-02': 5500, ...}
+            should_stop (callable): Her epoch sonunda çağrılır; True dönerse
+                                    LSTM eğitimi erken durdurulur (opsiyonel)
         
         Returns:
             dict: Eğitim sonuçları ve model performans metrikleri
@@ -118,8 +220,8 @@ class IncomePredictionService:
         
         # LSTM için veriyi ölçekle
         income_values = df['income'].values.reshape(-1, 1)
-        self.scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = self.scaler.fit_transform(income_values)
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        scaled_data = scaler.fit_transform(income_values)
         
         # Eğitim ve test verilerini ayır
         train_size = int(len(scaled_data) * 0.8)
@@ -134,16 +236,36 @@ class IncomePredictionService:
         X_train = self._reshape_lstm_input(X_train, time_steps)
         X_test = self._reshape_lstm_input(X_test, time_steps)
         
-        # LSTM modelini oluştur ve eğit
-        self.lstm_model = self._create_lstm_model((X_train.shape[1], 1))
-        history = self.lstm_model.fit(
+        # LSTM modelini oluştur ve eğit (kullanılan modele eğitim bitip
+        # kaydedilene kadar dokunulmaz)
+        lstm_model = self._create_lstm_model((X_train.shape[1], 1))
+        
+        # İptal veya süre aşımında eğitimi epoch sonunda durdur
+        callbacks = []
+        if should_stop is not None:
+            def _stop_if_requested(epoch, logs):
+                if should_stop():
+                    lstm_model.stop_training = True
+            
+            callbacks.append(tf.keras.callbacks.LambdaCallback(on_epoch_end=_stop_if_requested))
+        
+        history = lstm_model.fit(
             X_train, y_train,
             epochs=100,
             batch_size=32,
             validation_data=(X_test, y_test),
+            callbacks=callbacks,
             verbose=0
         )
         
+        # Eğitim yarıda kesildiyse yarım model atılır; kullanılan modeller değişmedi
+        if should_stop is not None and should_stop():
+            return {
+                "status": "cancelled",
+                "message": "Model eğitimi tamamlanmadan durduruldu",
+                "metrics": {}
+            }
+        
         # ARIMA için veriyi hazırla
         arima_df = df.set_index('date')['income']
         
@@ -162,10 +284,10 @@ class IncomePredictionService:
                 suppress_warnings=True,
                 stepwise=True
             )
-            self.arima_params = auto_model.get_params()
+            arima_params = auto_model.get_params()
         except:
             # Auto ARIMA kullanılamıyorsa basit bir model kullan
-            self.arima_params = {'order': (1, 1, 1)}
+            arima_params = {'order': (1, 1, 1)}
         
         # SARIMA parametrelerini belirle
         try:
@@ -182,31 +304,19 @@ class IncomePredictionService:
                 suppress_warnings=True,
                 stepwise=True
             )
-            self.sarima_params = auto_model_seasonal.get_params()
+            sarima_params = auto_model_seasonal.get_params()
         except:
             # Auto SARIMA kullanılamıyorsa basit bir mevsimsel model kullan
-            self.sarima_params = {'order': (1, 1, 1), 'seasonal_order': (1, 1, 1, 12)}
-        
-        # Modelleri kaydet
-        os.makedirs(self.model_dir, exist_ok=True)
+            sarima_params = {'order': (1, 1, 1), 'seasonal_order': (1, 1, 1, 12)}
         
-        self.lstm_model.save(os.path.join(self.model_dir, 'income_lstm_model.h5'))
-        
-        with open(os.path.join(self.model_dir, 'income_scaler.pkl'), 'wb') as f:
-            pickle.dump(self.scaler, f)
-        
-        with open(os.path.join(self.model_dir, 'arima_params.pkl'), 'wb') as f:
-            pickle.dump(self.arima_params, f)
-        
-        with open(os.path.join(self.model_dir, 'sarima_params.pkl'), 'wb') as f:
-            pickle.dump(self.sarima_params, f)
-        
-        self.models_loaded = True
+        # Modelleri kaydet, ardından kullanılan modelleri tek seferde değiştir
+        version = self._save_models(lstm_model, scaler, arima_params, sarima_params)
+        self._swap_models(lstm_model, scaler, arima_params, sarima_params, version)
         
         # Model performansını değerlendir
-        lstm_predictions = self.lstm_model.predict(X_test)
-        lstm_predictions = self.scaler.inverse_transform(lstm_predictions)
-        lstm_mse = np.mean((lstm_predictions - self.scaler.inverse_transform(y_test.reshape(-1, 1)))**2)
+        lstm_predictions = lstm_model.predict(X_test)
+        lstm_predictions = scaler.inverse_transform(lstm_predictions)
+        lstm_mse = np.mean((lstm_predictions - scaler.inverse_transform(y_test.reshape(-1, 1)))**2)
         
         return {
             "status": "success",
@@ -214,13 +324,13 @@ class IncomePredictionService:
             "metrics": {
                 "lstm_mse": float(lstm_mse),
                 "lstm_rmse": float(np.sqrt(lstm_mse)),
-                "arima_order": self.arima_params.get('order', (0, 0, 0)),
-                "sarima_order": self.sarima_params.get('order', (0, 0, 0)),
-                "sarima_seasonal_order": self.sarima_params.get('seasonal_order', (0, 0, 0, 0))
+                "arima_order": arima_params.get('order', (0, 0, 0)),
+                "sarima_order": sarima_params.get('order', (0, 0, 0)),
+                "sarima_seasonal_order": sarima_params.get('seasonal_order', (0, 0, 0, 0))
             }
         }
     
-    def predict_future_income(self, income_data, months=6):
+    def predict_future_income(self, income_data, months=6, include_chart=False, user_id=None):
         """
         Gelecek aylardaki geliri tahmin eder
         
@@ -228,17 +338,24 @@ class IncomePredictionService:
             income_data (dict): Aylık gelir verilerini içeren sözlük
                               {'2023-01': 5000, '2023-02': 5500, ...}
             months (int): Kaç ay ilerisi için tahmin yapılacağı
+            include_chart (bool): Tahmin grafiğini de üretip yanıta ekler
+            user_id: Tahminin sahibi (grafiği sadece bu kullanıcı alabilir)
         
         Returns:
-            dict: Tahmin sonuçları ve performans metrikleri
+            dict: Tahmin sonuçları, tahmin kimliği (forecast_id) ve
+                  istenmişse Base64 kodlu grafik
         """
-        if not self.models_loaded:
+        models = self._current_models()
+        if models is None:
             return {
                 "status": "error",
-                "message": "Modeller yüklenmedi. Önce modelleri eğitin.",
+                "message": "Modeller yüklenmedi. Önce `flask train-income-models` ile modelleri eğitin.",
                 "predictions": {}
             }
         
+        # Tahmin boyunca aynı model kümesi kullanılır (eğitim bu arada modelleri değiştirebilir)
+        lstm_model, scaler, arima_params, sarima_params = models
+        
         # Veriyi düzenle
         df = pd.DataFrame(list(income_data.items()), columns=['date', 'income'])
         df['date'] = pd.to_datetime(df['date'])
@@ -247,7 +364,7 @@ class IncomePredictionService:
         # LSTM tahmini için
         time_steps = min(12, len(df) - 1)
         income_values = df['income'].values.reshape(-1, 1)
-        scaled_data = self.scaler.transform(income_values)
+        scaled_data = scaler.transform(income_values)
         
         # LSTM için son veriyi hazırla
         X_last = scaled_data[-time_steps:].reshape(1, time_steps, 1)
@@ -258,14 +375,14 @@ class IncomePredictionService:
         
         for i in range(months):
             # Mevcut dizi ile bir sonraki değeri tahmin et
-            lstm_pred = self.lstm_model.predict(curr_sequence.reshape(1, time_steps, 1))[0][0]
+            lstm_pred = lstm_model.predict(curr_sequence.reshape(1, time_steps, 1))[0][0]
             lstm_predictions.append(lstm_pred)
             
             # Tahmin edilen değeri diziye ekle ve dizinin başındaki değeri kaldır
             curr_sequence = np.append(curr_sequence[1:], [[lstm_pred]], axis=0)
         
         # LSTM tahminlerini gerçek değerlere dönüştür
-        lstm_predictions = self.scaler.inverse_transform(np.array(lstm_predictions).reshape(-1, 1))
+        lstm_predictions = scaler.inverse_transform(np.array(lstm_predictions).reshape(-1, 1))
         
         # ARIMA ve SARIMA için veriyi hazırla
         arima_df = df.set_index('date')['income']
@@ -273,7 +390,7 @@ class IncomePredictionService:
         # ARIMA modeli ile tahmin
         arima_model = ARIMA(
             arima_df,
-            order=self.arima_params.get('order', (1, 1, 1))
+            order=arima_params.get('order', (1, 1, 1))
         )
         arima_results = arima_model.fit()
         arima_predictions = arima_results.forecast(steps=months)
@@ -281,8 +398,8 @@ class IncomePredictionService:
         # SARIMA modeli ile tahmin
         sarima_model = SARIMAX(
             arima_df,
-            order=self.sarima_params.get('order', (1, 1, 1)),
-            seasonal_order=self.sarima_params.get('seasonal_order', (1, 1, 1, 12))
+            order=sarima_params.get('order', (1, 1, 1)),
+            seasonal_order=sarima_params.get('seasonal_order', (1, 1, 1, 12))
         )
         sarima_results = sarima_model.fit(disp=False)
         sarima_predictions = sarima_results.forecast(steps=months)
@@ -305,57 +422,131 @@ class IncomePredictionService:
             'ensemble': [float(val) for val in ensemble_predictions]
         }
         
-        # Tahmin grafiği oluştur
-        self._create_prediction_chart(df, future_dates, predictions)
+        # Grafik sadece istendiğinde çizilir; sonradan get_prediction_chart ile
+        # üretilebilmesi için tahmin içeriği özetiyle saklanır
+        history = {
+            'dates': [d.strftime('%Y-%m') for d in df['date']],
+            'income': [float(val) for val in df['income']]
+        }
+        forecast_id = self._store_forecast(history, predictions, user_id)
         
-        return {
+        result = {
             "status": "success",
             "message": f"Gelecek {months} ay için gelir tahmini yapıldı",
+            "forecast_id": forecast_id,
             "predictions": predictions
         }
+        
+        if include_chart:
+            result["chart"] = self.get_prediction_chart(forecast_id, user_id)
+        
+        return result
+    
+    def get_prediction_chart(self, forecast_id, user_id=None):
+        """
+        Daha önce yapılmış bir tahminin grafiğini döndürür
+        
+        Grafik ilk istekte çizilir ve aynı tahmin içeriği için önbellekten
+        döndürülür.
+        
+        Args:
+            forecast_id (str): predict_future_income tarafından döndürülen tahmin kimliği
+            user_id: İsteyen kullanıcı (tahmin başka bir kullanıcınınsa grafik döndürülmez)
+            
+        Returns:
+            str: Base64 kodlu PNG grafik verisi (tahmin bulunamazsa veya
+                 kullanıcıya ait değilse None)
+        """
+        key = self._forecast_key(forecast_id, user_id)
+        
+        chart_data = self.forecast_cache.get(f"{key}:chart")
+        if chart_data is not None:
+            return chart_data
+        
+        forecast = self.forecast_cache.get(key)
+        if forecast is None:
+            return None
+        
+        chart_data = self._create_prediction_chart(
+            forecast['history'], forecast['predictions']
+        )
+        self.forecast_cache.set(f"{key}:chart", chart_data, ttl=self.forecast_ttl)
+        
+        return chart_data
     
-    def _create_prediction_chart(self, historical_df, future_dates, predictions):
+    def _store_forecast(self, history, predictions, user_id=None):
+        """Tahmini sahibi ve içerik özetiyle saklar ve tahmin kimliğini döndürür"""
+        payload = json.dumps(
+            {'user_id': user_id, 'history': history, 'predictions': predictions},
+            sort_keys=True, separators=(',', ':'), default=str
+        )
+        forecast_id = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+        
+        self.forecast_cache.set(self._forecast_key(forecast_id, user_id), {
+            'history': history,
+            'predictions': predictions
+        }, ttl=self.forecast_ttl)
+        
+        return forecast_id
+    
+    def _forecast_key(self, forecast_id, user_id):
+        """Tahmin önbellek anahtarı; sahibini içerdiği için başka kullanıcı aynı kimlikle okuyamaz"""
+        owner = 'public' if user_id is None else f"user:{user_id}"
+        return f"income-forecast:{owner}:{forecast_id}"
+    
+    def _create_prediction_chart(self, history, predictions):
         """
         Tahmin grafikleri oluşturur ve Base64 formatında döndürür
         
+        matplotlib sadece grafik istendiğinde yüklenir ve etkileşimsiz Agg
+        arka ucu ile çizim yapılır.
+        
         Args:
-            historical_df (DataFrame): Geçmiş gelir verileri
-            future_dates (list): Tahmin edilecek ayların tarihleri
+            history (dict): Geçmiş gelir verileri {'dates': [...], 'income': [...]}
             predictions (dict): Tahmin sonuçları
             
         Returns:
             str: Base64 kodlu görüntü verisi
         """
-        plt.figure(figsize=(12, 6))
+        import io
+        import base64
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        
+        historical_dates = pd.to_datetime(history['dates'])
+        future_dates = pd.to_datetime(predictions['dates'])
+        
+        fig = Figure(figsize=(12, 6))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
         
         # Geçmiş verileri çiz
-        plt.plot(historical_df['date'], historical_df['income'], 
+        ax.plot(historical_dates, history['income'], 
                 label='Geçmiş Gelir', color='blue', marker='o')
         
         # Tahmin edilen verileri çiz
-        plt.plot(future_dates, predictions['lstm'], 
+        ax.plot(future_dates, predictions['lstm'], 
                 label='LSTM Tahmini', color='red', linestyle='--')
-        plt.plot(future_dates, predictions['arima'], 
+        ax.plot(future_dates, predictions['arima'], 
                 label='ARIMA Tahmini', color='green', linestyle='--')
-        plt.plot(future_dates, predictions['sarima'], 
+        ax.plot(future_dates, predictions['sarima'], 
                 label='SARIMA Tahmini', color='purple', linestyle='--')
-        plt.plot(future_dates, predictions['ensemble'], 
+        ax.plot(future_dates, predictions['ensemble'], 
                 label='Ensemble Tahmini', color='black', linestyle='-', linewidth=2)
         
         # Grafik başlığı ve etiketleri
-        plt.title('Gelir Tahmini')
-        plt.xlabel('Tarih')
-        plt.ylabel('Gelir (TL)')
-        plt.legend()
-        plt.grid(True)
+        ax.set_title('Gelir Tahmini')
+        ax.set_xlabel('Tarih')
+        ax.set_ylabel('Gelir (TL)')
+        ax.legend()
+        ax.grid(True)
         
         # Grafik dosyasını hafızada oluştur
         buf = io.BytesIO()
-        plt.savefig(buf, format='png')
+        fig.savefig(buf, format='png')
         buf.seek(0)
         
         # Base64 formatına dönüştür
         chart_data = base64.b64encode(buf.getvalue()).decode('utf-8')
-        plt.close()
         
-        return chart_data 
\ No newline at end of file
+        return chart_data
@@ -0,0 +1,252 @@
+import os
+import pickle
+import datetime
+import threading
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+class PeerSegmentationService:
+    """
+    Kullanıcıları finansal sağlık metriklerine göre benzer işletme
+    segmentlerine ayıran servis.
+
+    Model tüm kullanıcı tabanı üzerinde parça parça (MiniBatchKMeans ve
+    StandardScaler partial_fit ile) eğitilir. Merkezler, ölçekleme
+    parametreleri ve segment istatistikleri diske kaydedilir; tek bir
+    kullanıcının segmenti en yakın merkez aranarak bulunur. Akran
+    karşılaştırmaları ("size benzer işletmeler ...") istek anında değil,
+    eğitimde hesaplanan segment istatistiklerinden gelir.
+
+    Model dosyası kod paketinin dışında, PEER_SEGMENTATION_DIR (varsayılan:
+    backend/artifacts) dizininde tutulur. Dosya değiştiğinde (başka bir
+    işçide veya CLI ile yeniden eğitimde) model bir sonraki kullanımda
+    yeniden yüklenir.
+    """
+
+    # analyze_financial_health metriklerinden kullanılan özellikler ve kırpma aralıkları
+    FEATURES = [
+        ('cashflow_ratio', 0.0, 5.0),
+        ('savings_ratio', 0.0, 1.0),
+        ('emergency_fund_months', -12.0, 24.0),
+        ('income_growth', -1.0, 3.0),
+    ]
+
+    PROFILES = ['growth_seeker', 'stability_seeker', 'security_seeker']
+
+    def __init__(self, model_dir=None, n_clusters=12, batch_size=4096, random_state=42):
+        """
+        Args:
+            model_dir (str): Model dosyasının saklanacağı dizin (varsayılan:
+                PEER_SEGMENTATION_DIR ortam değişkeni veya backend/artifacts)
+            n_clusters (int): Segment sayısı
+            batch_size (int): MiniBatchKMeans mini-batch boyutu
+            random_state (int): Tekrarlanabilir eğitim için tohum
+        """
+        model_dir = model_dir or os.environ.get('PEER_SEGMENTATION_DIR', 'artifacts')
+        self.model_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), model_dir)
+        self.model_path = os.path.join(self.model_dir, 'peer_segmentation.pkl')
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.random_state = random_state
+
+        self.model = None
+        self._model_mtime = None
+        self._load_lock = threading.Lock()
+        self._load_model()
+
+    @property
+    def model_loaded(self):
+        return self._current_model() is not None
+
+    def _current_model(self):
+        """Model dosyası değiştiyse yeniden yükler ve güncel modeli döndürür"""
+        try:
+            mtime = os.stat(self.model_path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        if mtime != self._model_mtime:
+            self._load_model()
+
+        return self.model
+
+    def _load_model(self):
+        """Kaydedilmiş segmentasyon modelini yükler"""
+        with self._load_lock:
+            try:
+                mtime = os.stat(self.model_path).st_mtime_ns
+                with open(self.model_path, 'rb') as f:
+                    model = pickle.load(f)
+            except (FileNotFoundError, OSError, pickle.UnpicklingError, EOFError):
+                self.model, self._model_mtime = None, None
+                return
+
+            # Farklı özelliklerle eğitilmiş eski model kullanılamaz
+            if model.get('feature_names') != [name for name, _, _ in self.FEATURES]:
+                model = None
+
+            self.model, self._model_mtime = model, mtime
+
+    def build_features(self, metrics):
+        """
+        Metrik dizilerinden (kullanıcı x özellik) matrisini oluşturur
+
+        Sonsuz ve aşırı değerler kırpılır (ör. gideri olmayan kullanıcının
+        nakit akışı oranı sonsuzdur).
+
+        Args:
+            metrics (dict): Metrik adı -> değer dizisi (analyze_financial_health_batch çıktısı)
+
+        Returns:
+            ndarray: (kullanıcı x özellik) matrisi
+        """
+        columns = []
+        for name, lower, upper in self.FEATURES:
+            values = np.atleast_1d(np.asarray(metrics[name], dtype=np.float64))
+            values = np.nan_to_num(values, nan=0.0, posinf=upper, neginf=lower)
+            columns.append(np.clip(values, lower, upper))
+
+        return np.column_stack(columns)
+
+    def train(self, chunk_factory, epochs=3):
+        """
+        Modeli parça parça eğitir ve kaydeder
+
+        Args:
+            chunk_factory (callable): Her çağrıda (özellikler, kural profilleri)
+                parçaları üreten yeni bir yineleyici döndürür
+            epochs (int): Kümeleme için veri üzerinden geçiş sayısı
+
+        Returns:
+            dict: Eğitim özeti
+        """
+        # 1. geçiş: ölçekleme parametreleri
+        scaler = StandardScaler()
+        n_samples = 0
+        for features, _ in chunk_factory():
+            scaler.partial_fit(features)
+            n_samples += len(features)
+
+        if n_samples < self.n_clusters:
+            return {'status': 'error', 'message': 'Segmentasyon için yeterli kullanıcı yok'}
+
+        # 2. geçiş: kümeleme
+        kmeans = MiniBatchKMeans(
+            n_clusters=self.n_clusters, batch_size=self.batch_size,
+            random_state=self.random_state, n_init=3
+        )
+        for _ in range(epochs):
+            for features, _ in chunk_factory():
+                scaled = scaler.transform(features)
+                # İlk parça küme sayısından küçükse partial_fit başlatılamaz
+                if len(scaled) >= self.n_clusters or hasattr(kmeans, 'cluster_centers_'):
+                    kmeans.partial_fit(scaled)
+
+        if not hasattr(kmeans, 'cluster_centers_'):
+            raise ValueError(
+                f"Kümeleme başlatılamadı: hiçbir parça segment sayısı ({self.n_clusters}) "
+                f"kadar kullanıcı içermiyor, parça boyutunu artırın"
+            )
+
+        centroids = kmeans.cluster_centers_
+        mean = scaler.mean_
+        scale = scaler.scale_
+
+        # 3. geçiş: segment istatistikleri
+        counts = np.zeros(self.n_clusters)
+        sums = np.zeros((self.n_clusters, len(self.FEATURES)))
+        profile_counts = np.zeros((self.n_clusters, len(self.PROFILES)))
+        for features, profiles in chunk_factory():
+            clusters = self._nearest_centroid((features - mean) / scale, centroids)
+            counts += np.bincount(clusters, minlength=self.n_clusters)
+            for j in range(len(self.FEATURES)):
+                sums[:, j] += np.bincount(clusters, weights=features[:, j], minlength=self.n_clusters)
+
+            profiles = np.asarray(profiles)
+            profile_codes = np.select([profiles == profile for profile in self.PROFILES], range(len(self.PROFILES)))
+            np.add.at(profile_counts, (clusters, profile_codes), 1)
+
+        safe_counts = np.maximum(counts, 1)[:, None]
+        cluster_means = sums / safe_counts
+
+        self.model = {
+            'feature_names': [name for name, _, _ in self.FEATURES],
+            'mean': mean,
+            'scale': scale,
+            'centroids': centroids,
+            'cluster_sizes': counts.astype(int),
+            'cluster_means': cluster_means,
+            # Segmentin profili: segmentteki kural tabanlı profillerin çoğunluğu
+            'cluster_profiles': [self.PROFILES[i] for i in profile_counts.argmax(axis=1)],
+            'n_samples': n_samples,
+            'trained_at': datetime.datetime.now().isoformat()
+        }
+
+        # Geçici dosyaya yazılıp yerine taşınır; diğer işçiler yarım dosya okumaz
+        os.makedirs(self.model_dir, exist_ok=True)
+        tmp_path = os.path.join(self.model_dir, f".tmp-{os.getpid()}-{threading.get_ident()}-peer_segmentation.pkl")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self.model, f)
+        os.replace(tmp_path, self.model_path)
+        self._model_mtime = os.stat(self.model_path).st_mtime_ns
+
+        return {
+            'status': 'success',
+            'n_samples': n_samples,
+            'n_clusters': self.n_clusters,
+            'cluster_sizes': self.model['cluster_sizes'].tolist()
+        }
+
+    def assign_segments(self, features):
+        """
+        Kullanıcıları en yakın segment merkezine atar
+
+        Args:
+            features (ndarray): build_features çıktısı
+
+        Returns:
+            ndarray: Segment numaraları (model yoksa -1)
+        """
+        features = np.atleast_2d(features)
+        model = self._current_model()
+        if model is None:
+            return np.full(len(features), -1)
+
+        scaled = (features - model['mean']) / model['scale']
+        return self._nearest_centroid(scaled, model['centroids'])
+
+    def segment_profiles(self, segments):
+        """Segment numaralarının finansal profil adlarını döndürür"""
+        return np.asarray(self.model['cluster_profiles'], dtype=object)[segments]
+
+    def peer_benchmarks(self, segment):
+        """
+        Segmentin önceden hesaplanmış akran istatistiklerini döndürür
+
+        Args:
+            segment (int): Segment numarası
+
+        Returns:
+            dict: Akran karşılaştırmaları (model yoksa None)
+        """
+        model = self._current_model()
+        if model is None or segment < 0 or segment >= len(model['cluster_sizes']):
+            return None
+
+        means = dict(zip(model['feature_names'], model['cluster_means'][segment].tolist()))
+
+        return {
+            'segment': int(segment),
+            'peer_count': int(model['cluster_sizes'][segment]),
+            'profile': model['cluster_profiles'][segment],
+            'averages': means,
+            'message': f"Size benzer işletmeler gelirlerinin ortalama %{means['savings_ratio'] * 100:.1f}'ini "
+                       f"tasarruf ediyor ve {means['emergency_fund_months']:.1f} aylık acil durum fonu tutuyor."
+        }
+
+    def _nearest_centroid(self, scaled, centroids):
+        """Her satır için en yakın merkezin numarası"""
+        # |x - c|^2 = |x|^2 - 2 x.c + |c|^2 ; |x|^2 satır için sabit olduğundan atlanır
+        distances = (centroids ** 2).sum(axis=1) - 2 * scaled @ centroids.T
+        return distances.argmin(axis=1)
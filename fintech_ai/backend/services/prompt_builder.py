@@ -0,0 +1,170 @@
+import re
+import json
+
+try:
+    import tiktoken
+except ImportError:  # opsiyonel: yoksa token sayısı karakter sayısından tahmin edilir
+    tiktoken = None
+
+class PromptBuilder:
+    """
+    AI yanıt servisi için kısa ve kararlı sıralı mesaj listesi oluşturan sınıf.
+
+    İşlevler:
+    - Sabit sistem mesajı boşlukları sıkıştırılmış olarak ilk sırada ve her
+      istekte birebir aynı gönderilir (sağlayıcı tarafı prompt önbelleği için)
+    - Finansal veri girintisiz, anahtarları sıralı JSON olarak gönderilir;
+      sayılar kuruşa yuvarlanır, harcama kategorileri en yüksek N kategoriyle
+      sınırlanır (kalanlar "Diğer" altında toplanır)
+    - Her istekte değişen alanlar (zaman, güncellenme bilgisi) en sona,
+      kullanıcı mesajının hemen önüne yazılır
+    - İstek başına giriş token sayısını ölçer
+    """
+
+    # Her istekte değişen alanlar (kararlı önekten çıkarılıp sona yazılır)
+    VOLATILE_FIELDS = ('current_month', 'last_updated', 'last_expense_time')
+
+    OTHER_CATEGORY = 'Diğer'
+
+    # Mesaj başına sohbet biçimi ek yükü (OpenAI sohbet biçimi için yaklaşık değer)
+    TOKENS_PER_MESSAGE = 4
+
+    def __init__(self, system_message, max_categories=8, model='gpt-3.5-turbo'):
+        """
+        Args:
+            system_message (str): Sabit sistem mesajı
+            max_categories (int): Gönderilecek en fazla harcama kategorisi sayısı
+            model (str): Token sayımında kullanılacak modelin adı
+        """
+        self.system_message = self.compact_text(system_message)
+        self.max_categories = max_categories
+        self.encoding = self._load_encoding(model)
+
+    def build(self, message, financial_data=None, current_time=None):
+        """
+        API'ye gönderilecek mesaj listesini oluşturur
+
+        Args:
+            message (str): Kullanıcı mesajı
+            financial_data (dict): Kullanıcının finansal verileri (opsiyonel)
+            current_time (str): Yanıtta kullanılacak güncel zaman (ör. "14:05:09")
+
+        Returns:
+            list: Sohbet mesajları (sabit sistem mesajı, finansal veri, değişken alanlar, kullanıcı mesajı)
+        """
+        messages = [{"role": "system", "content": self.system_message}]
+
+        volatile = {}
+        if financial_data:
+            stable = {key: value for key, value in financial_data.items() if key not in self.VOLATILE_FIELDS}
+            volatile = {key: financial_data[key] for key in self.VOLATILE_FIELDS if key in financial_data}
+
+            messages.append({
+                "role": "system",
+                "content": "Kullanıcının finansal verileri (JSON). Yanıtını bu verilerle kişiselleştir ve "
+                           "verilerin güncel olduğunu belirt:\n" + self.encode_financial_data(stable)
+            })
+
+        if current_time:
+            volatile['current_time'] = current_time
+        if volatile:
+            messages.append({
+                "role": "system",
+                "content": "Güncel bilgiler (yanıtında şu anki zamanı kullan): " + self._dumps(volatile)
+            })
+
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def encode_financial_data(self, financial_data):
+        """
+        Finansal veriyi kısa ve kararlı biçimde JSON'a dönüştürür
+
+        Args:
+            financial_data (dict): Finansal veri
+
+        Returns:
+            str: Girintisiz, anahtarları sıralı JSON
+        """
+        data = dict(financial_data)
+        if isinstance(data.get('expense_categories'), dict):
+            data['expense_categories'] = self.top_categories(data['expense_categories'])
+        return self._dumps(data)
+
+    def top_categories(self, categories):
+        """
+        En yüksek harcamalı N kategoriyi döndürür; kalanlar "Diğer" altında toplanır
+
+        Args:
+            categories (dict): Kategori -> tutar
+
+        Returns:
+            dict: En yüksek tutarlı kategoriler (ve gerekirse "Diğer")
+        """
+        ranked = sorted(categories.items(), key=lambda item: (-(item[1] or 0), item[0]))
+        if len(ranked) <= self.max_categories:
+            return dict(ranked)
+
+        top = dict(ranked[:self.max_categories - 1])
+        rest = sum(amount or 0 for _, amount in ranked[self.max_categories - 1:])
+        top[self.OTHER_CATEGORY] = top.get(self.OTHER_CATEGORY, 0) + rest
+        return top
+
+    def count_tokens(self, messages):
+        """
+        Mesaj listesinin giriş token sayısını hesaplar
+
+        tiktoken kuruluysa modelin kodlamasıyla sayar, değilse karakter
+        sayısının dörtte biriyle tahmin eder.
+
+        Args:
+            messages (list): Sohbet mesajları
+
+        Returns:
+            int: Token sayısı
+        """
+        total = 0
+        for item in messages:
+            content = item.get('content') or ''
+            if self.encoding is not None:
+                total += len(self.encoding.encode(content))
+            else:
+                total += (len(content) + 3) // 4
+            total += self.TOKENS_PER_MESSAGE
+        return total
+
+    @staticmethod
+    def compact_text(text):
+        """Satır başı girintilerini ve fazla boşlukları kaldırır"""
+        lines = [re.sub(r'\s+', ' ', line).strip() for line in text.strip().splitlines()]
+        return '\n'.join(line for line in lines if line)
+
+    def _dumps(self, value):
+        return json.dumps(self._round(value), ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+    def _round(self, value):
+        """Ondalık sayıları kuruşa yuvarlar; tam sayıları tam sayı olarak yazar"""
+        if isinstance(value, bool) or value is None:
+            return value
+        if isinstance(value, float):
+            value = round(value, 2)
+            return int(value) if value.is_integer() else value
+        if isinstance(value, dict):
+            return {str(key): self._round(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._round(item) for item in value]
+        return value
+
+    @staticmethod
+    def _load_encoding(model):
+        if tiktoken is None:
+            return None
+        try:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                return tiktoken.get_encoding('cl100k_base')
+        except Exception as e:
+            # Kodlama dosyası indirilemezse (ör. ağ erişimi yok) tahmine dönülür
+            print(f"tiktoken kodlaması yüklenemedi, token sayısı tahmin edilecek: {str(e)}")
+            return None
@@ -0,0 +1,287 @@
+import re
+import time
+import zlib
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+
+class HashedNgramEmbedder:
+    """
+    Mesajları çevrimdışı, modelsiz vektörlere dönüştüren gömme sınıfı.
+
+    Özellikler kelimenin eklerinden arındırılmış kaba yalın hali, kelime
+    başları (Türkçe ekleri büyük ölçüde atar) ve kelime içi karakter
+    n-gramlarıdır; hepsi sabit
+    boyutlu bir vektöre işaretli olarak hashlenir. Soru kalıbı kelimeleri
+    ("ne", "kadar", "nasıl" ...) düşük ağırlık alır; böylece benzerliği
+    "harcama", "gelir", "vergi" gibi içerik kelimeleri belirler.
+
+    Benzer vektörlü sorular dönem ("bu ay" / "geçen ay"), harcama kategorisi
+    ("market" / "kira") veya olumsuzluk ("harcadım" / "harcamamalıyım")
+    bakımından farklı olabilir; bu ayırt edici terimler key_terms() ile
+    ayrıca çıkarılır ve önbellek sadece birebir aynı olduklarında eşleşir.
+    """
+
+    # Soru kalıpları ve bağlaçlar: anlamı belirlemeyen sık kelimeler
+    STOPWORDS = {
+        'bu', 'şu', 'o', 'ne', 'kadar', 'nasıl', 'mi', 'mı', 'mu', 'mü', 've', 'ile', 'için',
+        'de', 'da', 'ki', 'bir', 'benim', 'ben', 'bana', 'beni', 'acaba', 'lütfen', 'var',
+        'yok', 'mıyım', 'miyim', 'midir', 'mıdır', 'neler', 'nedir', 'hangi', 'en', 'çok',
+        'olan', 'olarak', 'gibi', 'göre', 'sen', 'bize', 'biz'
+    }
+
+    # Sık çekim ekleri (uzundan kısaya); kelimenin yalın hali için sondan atılır
+    SUFFIXES = (
+        'larımız', 'lerimiz', 'larım', 'lerim', 'ları', 'leri', 'lar', 'ler',
+        'ımız', 'imiz', 'umuz', 'ümüz', 'ım', 'im', 'um', 'üm', 'ın', 'in', 'un', 'ün',
+        'ki', 'dan', 'den', 'tan', 'ten', 'da', 'de', 'ta', 'te',
+        'ya', 'ye', 'sı', 'si', 'su', 'sü', 'yı', 'yi', 'a', 'e', 'ı', 'i', 'u', 'ü', 'm'
+    )
+
+    # Dönem belirten kelimeler (aynı anlamdakiler aynı terime eşlenir)
+    PERIOD_TERMS = {
+        'bu': 'bu', 'geçen': 'önceki', 'önceki': 'önceki', 'geçtiğimiz': 'önceki',
+        'gelecek': 'sonraki', 'önümüzdeki': 'sonraki', 'sonraki': 'sonraki',
+        'gün': 'gün', 'bugün': 'bugün', 'dün': 'dün', 'yarın': 'yarın', 'hafta': 'hafta',
+        'ay': 'ay', 'yıl': 'yıl', 'sene': 'yıl', 'ocak': 'ocak', 'şubat': 'şubat', 'mart': 'mart',
+        'nisan': 'nisan', 'mayıs': 'mayıs', 'haziran': 'haziran', 'temmuz': 'temmuz',
+        'ağustos': 'ağustos', 'eylül': 'eylül', 'ekim': 'ekim', 'kasım': 'kasım', 'aralık': 'aralık'
+    }
+
+    # Harcama kategorileri ve kalemleri
+    CATEGORY_TERMS = (
+        'market', 'kira', 'fatura', 'ulaşım', 'eğlence', 'sağlık', 'eğitim', 'giyim', 'yemek',
+        'restoran', 'alışveriş', 'akaryakıt', 'benzin', 'elektrik', 'doğalgaz', 'internet',
+        'telefon', 'aidat', 'sigorta', 'abonelik', 'kredi', 'kart', 'tatil', 'emeklilik'
+    )
+
+    # Fiil olumsuzluk ekleri ("harcamadım", "ödememeliyim", "aşmıyor" ...)
+    NEGATION_PATTERN = re.compile(
+        r'(mamal|memel|madı|medi|mayacak|meyecek|mamış|memiş|m[ıiuü]yor|maz|mez)'
+    )
+
+    def __init__(self, dim=1024, stem_lengths=(3, 5), ngram=3, stopword_weight=0.1,
+                 stem_weight=1.0, ngram_weight=0.1, lemma_weight=2.0):
+        """
+        Args:
+            dim (int): Vektör boyutu
+            stem_lengths (tuple): Kök özelliği olarak alınan kelime başı uzunlukları
+            ngram (int): Karakter n-gram uzunluğu
+            stopword_weight (float): Soru kalıbı kelimelerinin ağırlık çarpanı
+            stem_weight (float): Kök özelliklerinin ağırlığı
+            ngram_weight (float): Karakter n-gramlarının ağırlığı
+            lemma_weight (float): Yalın hal özelliğinin ağırlığı
+        """
+        self.dim = dim
+        self.stem_lengths = stem_lengths
+        self.ngram = ngram
+        self.stopword_weight = stopword_weight
+        self.stem_weight = stem_weight
+        self.ngram_weight = ngram_weight
+        self.lemma_weight = lemma_weight
+
+        self._period_lemmas = {self.lemma(word): term for word, term in self.PERIOD_TERMS.items()}
+        self._category_lemmas = {self.lemma(word) for word in self.CATEGORY_TERMS}
+
+    def tokenize(self, text):
+        """Türkçe küçük harfe çevirip kelimelere ayırır"""
+        text = unicodedata.normalize('NFC', str(text))
+        # str.lower() Türkçe I/İ harflerini doğru çevirmez
+        text = text.replace('I', 'ı').replace('İ', 'i').lower()
+        return re.findall(r'\w+', text)
+
+    def lemma(self, word, max_strips=3):
+        """Kelimenin sonundaki çekim eklerini kaba biçimde atar ('ayki' -> 'ay')"""
+        for _ in range(max_strips):
+            for suffix in self.SUFFIXES:
+                if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+                    word = word[:-len(suffix)]
+                    break
+            else:
+                break
+        return word
+
+    def key_terms(self, text):
+        """
+        Sorunun anlamını değiştiren dönem, kategori ve olumsuzluk terimlerini çıkarır
+
+        Returns:
+            frozenset: Ayırt edici terimler (iki soru ancak bu kümeler aynıysa eşleşebilir)
+        """
+        terms = set()
+        for word in self.tokenize(text):
+            if word == 'değil' or self.NEGATION_PATTERN.search(word):
+                terms.add('!olumsuz')
+
+            lemma = self.lemma(word)
+            if word in self.PERIOD_TERMS:
+                terms.add(f"d:{self.PERIOD_TERMS[word]}")
+            elif lemma in self._period_lemmas:
+                terms.add(f"d:{self._period_lemmas[lemma]}")
+            elif lemma in self._category_lemmas:
+                terms.add(f"k:{lemma}")
+
+        return frozenset(terms)
+
+    def embed(self, text):
+        """
+        Metni birim uzunlukta vektöre dönüştürür
+
+        Returns:
+            ndarray: (dim,) float32 vektör (boş metinde sıfır vektör)
+        """
+        vector = np.zeros(self.dim, dtype=np.float32)
+
+        for word in self.tokenize(text):
+            scale = self.stopword_weight if word in self.STOPWORDS else 1.0
+
+            for length in self.stem_lengths:
+                if len(word) >= length:
+                    self._add(vector, f"s:{word[:length]}", scale * self.stem_weight)
+            self._add(vector, f"l:{self.lemma(word)}", scale * self.lemma_weight)
+
+            padded = f"<{word}>"
+            for start in range(len(padded) - self.ngram + 1):
+                self._add(vector, f"g:{padded[start:start + self.ngram]}", scale * self.ngram_weight)
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _add(self, vector, feature, weight):
+        # crc32 süreçler arasında kararlıdır (Python hash() her süreçte farklıdır)
+        code = zlib.crc32(feature.encode('utf-8'))
+        sign = 1.0 if code & 1 else -1.0
+        vector[(code >> 1) % self.dim] += sign * weight
+
+class _VectorIndex:
+    """Tek bir kapsamın (kullanıcı + finansal veri sürümü) vektör dizini"""
+
+    __slots__ = ('vectors', 'responses', 'key_terms', 'created_at', 'size', 'next_slot')
+
+    def __init__(self, dim, initial_capacity=4):
+        # Çoğu kullanıcının birkaç sorusu olduğundan dizin küçük başlar ve gerektikçe büyür
+        self.vectors = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self.responses = []
+        self.key_terms = []
+        self.created_at = np.zeros(initial_capacity)
+        self.size = 0
+        self.next_slot = 0
+
+    def add(self, vector, response, key_terms, max_entries):
+        """Yanıtı ekler; dizin doluysa en eski yanıtın yerine yazar"""
+        if self.size < max_entries and self.size == len(self.vectors):
+            capacity = min(max_entries, 2 * len(self.vectors))
+            self.vectors = np.resize(self.vectors, (capacity, self.vectors.shape[1]))
+            self.created_at = np.resize(self.created_at, capacity)
+
+        slot = self.next_slot
+        self.vectors[slot] = vector
+        self.created_at[slot] = time.time()
+        if slot < len(self.responses):
+            self.responses[slot] = response
+            self.key_terms[slot] = key_terms
+        else:
+            self.responses.append(response)
+            self.key_terms.append(key_terms)
+
+        self.size = min(self.size + 1, max_entries)
+        self.next_slot = (slot + 1) % max_entries
+
+class SemanticCache:
+    """
+    Anlamca benzer sorulara önbellekten yanıt veren önbellek katmanı.
+
+    Her kapsam (kullanıcı kimliği ve finansal verinin özeti) için ayrı bir
+    bellek içi vektör dizini tutulur; finansal veri değişince kapsam da
+    değiştiği için eski yanıtlar hiç karşılaştırılmaz. Sorgu vektörü dizindeki
+    tüm vektörlerle tek bir matris çarpımında karşılaştırılır; dönem,
+    kategori ve olumsuzluk terimleri aynı olan en yakın yanıt benzerlik
+    eşiğini geçerse döndürülür.
+    """
+
+    def __init__(self, embedder=None, threshold=0.57, ttl=900, max_scopes=2000, entries_per_scope=64):
+        """
+        Args:
+            embedder: Gömme nesnesi (varsayılan: HashedNgramEmbedder)
+            threshold (float): Önbellekten yanıt için gereken en düşük kosinüs benzerliği
+                (benchmarks/semantic_cache_benchmark.py ile yanlış isabet vermeyecek şekilde ayarlandı)
+            ttl (int): Yanıtların geçerlilik süresi (saniye)
+            max_scopes (int): Bellekte tutulan en fazla kapsam (LRU)
+            entries_per_scope (int): Kapsam başına en fazla yanıt (en eskisinin yerine yazılır)
+        """
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_scopes = max_scopes
+        self.entries_per_scope = entries_per_scope
+
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, scope, message, vector=None):
+        """
+        Kapsamdaki en benzer sorunun yanıtını arar
+
+        Args:
+            scope (str): Kullanıcı ve finansal veri sürümünü belirten kapsam
+            message (str): Kullanıcı mesajı
+            vector (ndarray): Önceden hesaplanmış gömme (opsiyonel)
+
+        Returns:
+            tuple: (yanıt, benzerlik); eşik geçilmezse (None, en yüksek benzerlik),
+                ayırt edici terimleri uyan yanıt yoksa (None, -1.0)
+        """
+        if vector is None:
+            vector = self.embedder.embed(message)
+        key_terms = self.embedder.key_terms(message)
+
+        with self._lock:
+            index = self._indexes.get(scope)
+            if index is None or index.size == 0:
+                return None, 0.0
+
+            self._indexes.move_to_end(scope)
+
+            similarities = index.vectors[:index.size] @ vector
+            # Süresi dolmuş yanıtlar eşleşmez
+            similarities[index.created_at[:index.size] <= time.time() - self.ttl] = -1.0
+            # Dönemi, kategorisi veya olumsuzluğu farklı sorular ne kadar benzese de eşleşmez
+            for slot, terms in enumerate(index.key_terms[:index.size]):
+                if terms != key_terms:
+                    similarities[slot] = -1.0
+
+            best = int(similarities.argmax())
+            similarity = float(similarities[best])
+            if similarity >= self.threshold:
+                return index.responses[best], similarity
+
+            return None, similarity
+
+    def store(self, scope, message, response, vector=None):
+        """
+        Yanıtı kapsamın dizinine ekler
+
+        Args:
+            scope (str): Kullanıcı ve finansal veri sürümünü belirten kapsam
+            message (str): Kullanıcı mesajı
+            response (str): AI yanıtı
+            vector (ndarray): Önceden hesaplanmış gömme (opsiyonel)
+        """
+        if vector is None:
+            vector = self.embedder.embed(message)
+        key_terms = self.embedder.key_terms(message)
+
+        with self._lock:
+            index = self._indexes.get(scope)
+            if index is None:
+                index = _VectorIndex(self.embedder.dim)
+                self._indexes[scope] = index
+                while len(self._indexes) > self.max_scopes:
+                    self._indexes.popitem(last=False)
+            self._indexes.move_to_end(scope)
+
+            index.add(vector, response, key_terms, self.entries_per_scope)
+
+    def __len__(self):
+        return len(self._indexes)
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+class InProcessLRUBackend:
+    """
+    İşlem içi, boyutu sınırlı LRU önbellek arka ucu (opsiyonel TTL ile).
+
+    Not: Her işlemin kendi önbelleği vardır; birden fazla gunicorn işçisinde
+    bir işçide artırılan sürüm diğerlerini etkilemez. Çok işçili kurulumda
+    RedisBackend kullanılmalıdır.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value, expires_at = self._entries.get(key, (0, None))
+            self._entries[key] = (value + 1, expires_at)
+            self._entries.move_to_end(key)
+            return value + 1
+
+    def __len__(self):
+        return len(self._entries)
+
+class RedisBackend:
+    """
+    Redis uyumlu önbellek arka ucu (değerler JSON olarak saklanır).
+
+    Redis protokolünü konuşan herhangi bir istemci verilebilir (ör. yerel
+    geliştirmede fakeredis veya yerel bir Redis/KeyDB sunucusu).
+    """
+
+    def __init__(self, url=None, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+
+    def get(self, key):
+        value = self.client.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, json.dumps(value, ensure_ascii=False), ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key):
+        return int(self.client.incr(key))
+
+def create_cache_backend(url=None, max_entries=10000):
+    """
+    URL'ye göre önbellek arka ucunu oluşturur
+
+    Args:
+        url (str): 'redis://...' ise RedisBackend, boş veya 'memory://' ise
+            InProcessLRUBackend (varsayılan: SNAPSHOT_CACHE_URL çevre değişkeni)
+        max_entries (int): İşlem içi önbelleğin kapasitesi
+
+    Returns:
+        Önbellek arka ucu
+    """
+    url = url if url is not None else os.environ.get('SNAPSHOT_CACHE_URL', '')
+
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url)
+
+    return InProcessLRUBackend(max_entries=max_entries)
+
+class SnapshotCache:
+    """
+    Kullanıcı başına hesaplanmış sonuçları (anlık görüntüleri) sürüm damgasıyla
+    saklayan önbellek.
+
+    Her kullanıcının bir sürüm sayacı vardır ve anahtar bu sürümü içerir.
+    İzlenen modellerde (işlemler, bütçeler, hedefler vb.) yapılan yazma işlemi
+    commit edildiğinde kullanıcının sürümü artırılır; böylece eski anlık
+    görüntü bir daha okunmaz ve veri değişene kadar okumalar tek bir önbellek
+    isabeti olur. Eski sürümlerin girdileri LRU/TTL ile temizlenir.
+    """
+
+    def __init__(self, namespace, backend=None, ttl=3600):
+        """
+        Args:
+            namespace (str): Anahtar ön eki (ör. 'financial-health')
+            backend: Önbellek arka ucu (varsayılan: create_cache_backend())
+            ttl (int): Anlık görüntülerin en uzun saklanma süresi (saniye)
+        """
+        self.namespace = namespace
+        self.backend = backend if backend is not None else create_cache_backend()
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        self._watched = set()
+        self._session_key = f'snapshot_cache:{namespace}'
+
+    def version(self, user_id):
+        """Kullanıcının güncel veri sürümü"""
+        return int(self.backend.get(self._version_key(user_id)) or 0)
+
+    def invalidate(self, user_id):
+        """Kullanıcının sürümünü artırarak anlık görüntüsünü geçersiz kılar"""
+        return self.backend.incr(self._version_key(user_id))
+
+    def get_or_compute(self, user_id, compute, scope=None):
+        """
+        Kullanıcının güncel anlık görüntüsünü döndürür; yoksa hesaplayıp saklar
+
+        Args:
+            user_id: Kullanıcı kimliği
+            compute (callable): Anlık görüntüyü hesaplayan fonksiyon (None dönerse saklanmaz)
+            scope (str): Anahtara eklenen ek kapsam (ör. günün tarihi)
+
+        Returns:
+            Anlık görüntü
+        """
+        key = self.snapshot_key(user_id, self.version(user_id), scope)
+
+        snapshot = self.backend.get(key)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        snapshot = compute()
+        if snapshot is not None:
+            self.backend.set(key, snapshot, ttl=self.ttl)
+
+        return snapshot
+
+    def snapshot_key(self, user_id, version, scope=None):
+        """Kullanıcının verilen sürümdeki anlık görüntüsünün anahtarı"""
+        key = f'{self.namespace}:snapshot:{user_id}:{version}'
+        if scope is not None:
+            key = f'{key}:{scope}'
+        return key
+
+    def will_invalidate(self, session, user_id):
+        """
+        Oturumda flush edilmiş ve commit'te kullanıcının sürümünü artıracak
+        bir değişiklik olup olmadığını döndürür
+        """
+        return user_id in session.info.get(self._session_key, ())
+
+    def stats(self):
+        """Önbellek isabet istatistikleri"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def watch(self, model, user_id_attr='user_id'):
+        """
+        Modeldeki eklemelerde, güncellemelerde ve silmelerde ilgili kullanıcının
+        sürümünü commit sonrasında artırır
+
+        Sürüm commit'ten önce artırılsaydı, aradaki bir okuma eski veriyi yeni
+        sürümle önbelleğe yazabilirdi; bu yüzden değişen kullanıcılar oturumda
+        biriktirilir ve commit başarılı olunca artırılır.
+
+        Args:
+            model: SQLAlchemy model sınıfı
+            user_id_attr (str): Modelde kullanıcı kimliğini tutan alan
+        """
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session, object_session
+
+        if not self._watched:
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+        if model in self._watched:
+            return
+        self._watched.add(model)
+
+        def record_change(mapper, connection, target):
+            session = object_session(target)
+            user_id = getattr(target, user_id_attr, None)
+            if session is not None and user_id is not None:
+                session.info.setdefault(self._session_key, set()).add(user_id)
+
+        for event_name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(model, event_name, record_change)
+
+    def _after_commit(self, session):
+        for user_id in session.info.pop(self._session_key, ()):
+            self.invalidate(user_id)
+
+    def _after_rollback(self, session):
+        session.info.pop(self._session_key, None)
+
+    def _version_key(self, user_id):
+        # JWT kimliği metin, model alanı tamsayı olabilir; anahtarlar metinle eşlenir
+        return f'{self.namespace}:version:{user_id}'
@@ -1,7 +1,9 @@
+import re
 import datetime
 import numpy as np
 from sklearn.linear_model import LinearRegression
 import pandas as pd
+from utils.date_utils import next_month_keys
 
 class TaxEstimationService:
     """
@@ -25,6 +27,9 @@ class TaxEstimationService:
             {'min': 880000, 'max': float('inf'), 'rate': 0.40},
         ]
         
+        # Dilim tabloları (alt sınırlar, oranlar ve alt sınıra kadar birikmiş vergi)
+        self._build_bracket_tables()
+        
         # KDV oranları
         self.vat_rates = {
             'standard': 0.18,  # Standart oran
@@ -41,6 +46,69 @@ class TaxEstimationService:
             'Sigorta': 0.8,           # %80 indirilebilir
             'Emeklilik Katkısı': 0.7  # %70 indirilebilir
         }
+        
+        # KDV'ye tabi olmayan gider kategorileri (KDV matrahına dahil edilmez)
+        self.vat_exempt_categories = {'Bağışlar', 'Sigorta', 'Emeklilik Katkısı'}
+        
+        # İndirilebilir olmayan kategorileri benzer indirilebilir kategoriye eşlemek
+        # için anahtar kelimeler (liste sırası eşleşme önceliğidir)
+        self.deductible_category_keywords = [
+            ('İş Giderleri', ['iş', 'ofis', 'ekipman']),
+            ('Sağlık', ['sağlık', 'doktor', 'ilaç']),
+            ('Eğitim', ['eğitim', 'kurs', 'seminer']),
+            ('Bağışlar', ['bağış', 'yardım']),
+            ('Sigorta', ['sigorta']),
+            ('Emeklilik Katkısı', ['emeklilik', 'bireysel emeklilik']),
+        ]
+        self._build_category_index()
+    
+    def _build_bracket_tables(self):
+        """
+        income_tax_brackets üzerinden searchsorted ile kullanılacak dilim
+        tablolarını hazırlar (dilimler değiştirilirse tekrar çağrılmalıdır)
+        """
+        self.bracket_lower = np.array([b['min'] for b in self.income_tax_brackets], dtype=np.float64)
+        self.bracket_upper = np.array([b['max'] for b in self.income_tax_brackets], dtype=np.float64)
+        self.bracket_rates = np.array([b['rate'] for b in self.income_tax_brackets], dtype=np.float64)
+        
+        # Her dilimin alt sınırına kadar ödenen toplam vergi
+        full_bracket_tax = (self.bracket_upper - self.bracket_lower)[:-1] * self.bracket_rates[:-1]
+        self.bracket_base_tax = np.concatenate(([0.0], np.cumsum(full_bracket_tax)))
+    
+    def calculate_income_tax_array(self, annual_incomes, deductions=0):
+        """
+        Birden fazla yıllık gelir için gelir vergisini tek seferde hesaplar
+        
+        Args:
+            annual_incomes (array): Yıllık brüt gelirler
+            deductions (float veya array): Vergi indirimleri (gelirlerle yayınlanabilir)
+        
+        Returns:
+            dict: 'taxable_income', 'total_tax', 'marginal_tax_rate',
+                  'effective_tax_rate', 'net_income' dizileri
+        """
+        annual_incomes = np.asarray(annual_incomes, dtype=np.float64)
+        deductions = np.asarray(deductions, dtype=np.float64)
+        
+        taxable_income = np.maximum(0, annual_incomes - deductions)
+        
+        # Gelirin düştüğü dilim: sınırdaki gelirin bir sonraki lirası üst dilimden vergilenir
+        bracket_index = np.searchsorted(self.bracket_lower, taxable_income, side='right') - 1
+        
+        total_tax = (self.bracket_base_tax[bracket_index]
+                     + (taxable_income - self.bracket_lower[bracket_index]) * self.bracket_rates[bracket_index])
+        
+        # Efektif vergi oranı brüt gelire göre
+        with np.errstate(divide='ignore', invalid='ignore'):
+            effective_tax_rate = np.where(annual_incomes > 0, total_tax / annual_incomes, 0.0)
+        
+        return {
+            'taxable_income': taxable_income,
+            'total_tax': total_tax,
+            'marginal_tax_rate': self.bracket_rates[bracket_index],
+            'effective_tax_rate': effective_tax_rate,
+            'net_income': annual_incomes - total_tax
+        }
     
     def calculate_income_tax(self, annual_income, deductions=0):
         """
@@ -53,51 +121,33 @@ class TaxEstimationService:
         Returns:
             dict: Vergi hesabı sonuçları
         """
-        # Vergiye tabi geliri hesapla
+        result = self.calculate_income_tax_array([annual_income], deductions)
+        
         taxable_income = max(0, annual_income - deductions)
+        total_tax = float(result['total_tax'][0])
         
-        # Vergi dilimleri üzerinden hesaplama
-        total_tax = 0
-        remaining_income = taxable_income
-        tax_brackets_applied = []
+        # Kullanılan dilimlerin dökümü
+        used_amounts = np.clip(taxable_income - self.bracket_lower, 0, self.bracket_upper - self.bracket_lower)
         
-        for bracket in self.income_tax_brackets:
-            if remaining_income <= 0:
+        tax_brackets_applied = []
+        for bracket, amount in zip(self.income_tax_brackets, used_amounts.tolist()):
+            if amount <= 0:
                 break
             
-            bracket_min = bracket['min']
-            bracket_max = bracket['max']
-            bracket_rate = bracket['rate']
-            
-            if remaining_income > bracket_max - bracket_min:
-                # Bu dilimin tamamı kullanılıyor
-                bracket_tax = (bracket_max - bracket_min) * bracket_rate
-                bracket_amount = bracket_max - bracket_min
-                remaining_income -= bracket_amount
-            else:
-                # Bu dilimin bir kısmı kullanılıyor
-                bracket_tax = remaining_income * bracket_rate
-                bracket_amount = remaining_income
-                remaining_income = 0
-            
-            total_tax += bracket_tax
-            
             tax_brackets_applied.append({
-                'bracket': f"{bracket_min} - {bracket_max}",
-                'rate': bracket_rate,
-                'amount': bracket_amount,
-                'tax': bracket_tax
+                'bracket': f"{bracket['min']} - {bracket['max']}",
+                'rate': bracket['rate'],
+                'amount': amount,
+                'tax': amount * bracket['rate']
             })
         
-        # Efektif vergi oranı
-        effective_tax_rate = total_tax / annual_income if annual_income > 0 else 0
-        
         return {
             'annual_income': annual_income,
             'deductions': deductions,
             'taxable_income': taxable_income,
             'total_tax': total_tax,
-            'effective_tax_rate': effective_tax_rate,
+            'effective_tax_rate': float(result['effective_tax_rate'][0]),
+            'marginal_tax_rate': float(result['marginal_tax_rate'][0]),
             'tax_brackets_applied': tax_brackets_applied,
             'net_income': annual_income - total_tax
         }
@@ -121,6 +171,10 @@ class TaxEstimationService:
         }
         
         for transaction in transactions:
+            # KDV'ye tabi olmayan giderler (bağış, sigorta, emeklilik katkısı) atlanır
+            if transaction.get('category') in self.vat_exempt_categories:
+                continue
+            
             # İşlem tutarı
             amount = transaction.get('amount', 0)
             
@@ -177,34 +231,190 @@ class TaxEstimationService:
             'deductions_by_category': deductions_by_category
         }
     
-    def estimate_annual_tax(self, income_data, expenses_data, tax_year=None):
+    def expenses_to_columns(self, expenses):
+        """
+        Gider listesini veya DataFrame'ini paralel dizilere dönüştürür
+        
+        Args:
+            expenses (list veya DataFrame): Gider nesneleri listesi ya da
+                amount, category, vat_rate_type sütunlu DataFrame
+        
+        Returns:
+            tuple: (tutarlar, kategoriler, KDV oranı türleri)
+        """
+        if isinstance(expenses, pd.DataFrame):
+            amounts = expenses['amount'].to_numpy(dtype=np.float64) if 'amount' in expenses else np.zeros(len(expenses))
+            categories = self._column_with_default(expenses, 'category', 'Diğer')
+            vat_rate_types = self._column_with_default(expenses, 'vat_rate_type', 'standard')
+            if categories is None:
+                categories = np.full(len(expenses), 'Diğer', dtype=object)
+            return amounts, categories, vat_rate_types
+        
+        amounts = np.fromiter((expense.get('amount', 0) for expense in expenses), dtype=np.float64, count=len(expenses))
+        # None değerler DataFrame yolundaki gibi varsayılanla doldurulur
+        categories = [self._value_or_default(expense.get('category'), 'Diğer') for expense in expenses]
+        vat_rate_types = [self._value_or_default(expense.get('vat_rate_type'), 'standard') for expense in expenses]
+        
+        return amounts, categories, vat_rate_types
+    
+    def _column_with_default(self, df, column, default):
+        """DataFrame sütununu eksik değerleri varsayılanla doldurarak döndürür (sütun yoksa None)"""
+        if column not in df:
+            return None
+        
+        values = df[column]
+        if values.isna().any():
+            if isinstance(values.dtype, pd.CategoricalDtype) and default not in values.cat.categories:
+                values = values.cat.add_categories([default])
+            values = values.fillna(default)
+        
+        return values
+    
+    def _value_or_default(self, value, default):
+        return default if value is None else value
+    
+    def _factorize(self, values, default):
+        """
+        Değerleri np.bincount için kodlara çevirir (ilk görülme sırasıyla)
+        
+        pd.factorize eksik değerlere (None/NaN) -1 kodu verir ve np.bincount
+        negatif kodla hata verir; bu değerler varsayılan değerin koduna sayılır.
+        
+        Returns:
+            tuple: (kodlar, benzersiz değerler listesi)
+        """
+        codes, uniques = pd.factorize(self._as_factorizable(values))
+        uniques = list(uniques)
+        
+        missing = codes < 0
+        if missing.any():
+            if default in uniques:
+                default_code = uniques.index(default)
+            else:
+                default_code = len(uniques)
+                uniques.append(default)
+            codes = np.where(missing, default_code, codes)
+        
+        return codes, uniques
+    
+    def _as_factorizable(self, values):
+        """pd.factorize için Series/dizi döndürür (Series ve kategorik sütunlar kopyalanmaz)"""
+        if isinstance(values, (pd.Series, pd.Categorical, np.ndarray)):
+            return values
+        return np.asarray(values, dtype=object)
+    
+    def calculate_vat_columnar(self, amounts, vat_rate_types=None, categories=None):
+        """
+        calculate_vat'ın paralel diziler üzerinde çalışan karşılığı
+        
+        Args:
+            amounts (array): İşlem tutarları
+            vat_rate_types (array): KDV oranı türleri (varsayılan: hepsi 'standard')
+            categories (array): Gider kategorileri; verilirse KDV'ye tabi olmayan
+                                kategorilerin tutarları matraha dahil edilmez
+        
+        Returns:
+            dict: calculate_vat ile aynı yapıda KDV hesabı sonuçları
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        
+        if categories is not None:
+            codes, unique_categories = self._factorize(categories, 'Diğer')
+            exempt = np.array([category in self.vat_exempt_categories for category in unique_categories], dtype=bool)
+            if exempt.any():
+                amounts = np.where(exempt[codes], 0.0, amounts)
+        
+        vat_by_rate = {rate_type: 0 for rate_type in ('standard', 'reduced', 'special')}
+        
+        if vat_rate_types is None:
+            vat_by_rate['standard'] = float(amounts.sum() * self.vat_rates['standard'])
+            return {
+                'total_vat': vat_by_rate['standard'],
+                'total_amount': float(amounts.sum()),
+                'vat_by_rate': vat_by_rate
+            }
+        
+        # Oran türlerini kodlara çevir ve her tür için toplam tutarı tek geçişte hesapla
+        codes, rate_types = self._factorize(vat_rate_types, 'standard')
+        amount_by_type = np.bincount(codes, weights=amounts, minlength=len(rate_types))
+        
+        # Tanımsız türler standart oranla vergilendirilir
+        rates = np.array([self.vat_rates.get(rate_type, self.vat_rates['standard']) for rate_type in rate_types])
+        vat_by_type = amount_by_type * rates
+        
+        for rate_type, vat_amount in zip(rate_types, vat_by_type.tolist()):
+            vat_by_rate[rate_type] = vat_by_rate.get(rate_type, 0) + vat_amount
+        
+        return {
+            'total_vat': float(vat_by_type.sum()),
+            'total_amount': float(amounts.sum()),
+            'vat_by_rate': vat_by_rate
+        }
+    
+    def calculate_deductions_columnar(self, amounts, categories):
+        """
+        calculate_deductions'ın paralel diziler üzerinde çalışan karşılığı
+        
+        Args:
+            amounts (array): Gider tutarları
+            categories (array): Gider kategorileri
+        
+        Returns:
+            dict: calculate_deductions ile aynı yapıda vergi indirimi sonuçları
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        
+        # Kategoriler ilk görülme sırasıyla kodlanır (sözlük sırası korunur)
+        codes, unique_categories = self._factorize(categories, 'Diğer')
+        amount_by_category = np.bincount(codes, weights=amounts, minlength=len(unique_categories))
+        
+        deductions_by_category = {}
+        for category, amount in zip(unique_categories, amount_by_category.tolist()):
+            if category in self.tax_deductible_categories:
+                deductions_by_category[category] = amount * self.tax_deductible_categories[category]
+        
+        return {
+            'total_deductible': sum(deductions_by_category.values()),
+            'deductions_by_category': deductions_by_category
+        }
+    
+    def estimate_annual_tax(self, income_data=None, expenses_data=None, tax_year=None, position=None):
         """
         Yıllık vergi tahmini yapar
         
         Args:
             income_data (dict): Aylık gelir verileri
-            expenses_data (dict): Aylık gider verileri
+            expenses_data (list veya DataFrame): Gider nesneleri
             tax_year (int): Vergi yılı (varsayılan: mevcut yıl)
+            position (dict): Önceden hesaplanmış vergi pozisyonu (TaxPositionService.to_dict);
+                             verilirse gelir ve gider verileri taranmaz
         
         Returns:
             dict: Vergi tahmini sonuçları
         """
         # Vergi yılını belirle
         if tax_year is None:
-            tax_year = datetime.datetime.now().year
-        
-        # Yıllık gelir ve giderleri hesapla
-        annual_income = sum(income_data.values())
-        
-        # Gider kategorilerine göre vergi indirimlerini hesapla
-        deductions_result = self.calculate_deductions(expenses_data)
-        total_deductions = deductions_result['total_deductible']
+            tax_year = position['tax_year'] if position else datetime.datetime.now().year
+        
+        if position is not None:
+            annual_income = position['total_income']
+            deductions_result = self.calculate_deductions_from_totals(position['category_amounts'])
+            vat_result = self.calculate_vat_from_totals(position['vat_amounts'])
+        else:
+            # Yıllık gelir ve giderleri hesapla
+            annual_income = sum(income_data.values())
+            
+            # Giderler bir kez sütunlara çevrilir; indirim ve KDV aynı dizilerden hesaplanır
+            amounts, categories, vat_rate_types = self.expenses_to_columns(expenses_data)
+            
+            # Gider kategorilerine göre vergi indirimlerini hesapla
+            deductions_result = self.calculate_deductions_columnar(amounts, categories)
+            
+            # Tahmini KDV hesabı
+            vat_result = self.calculate_vat_columnar(amounts, vat_rate_types, categories)
         
         # Gelir vergisi hesabı
-        income_tax_result = self.calculate_income_tax(annual_income, total_deductions)
-        
-        # Tahmini KDV hesabı
-        vat_result = self.calculate_vat(expenses_data)
+        income_tax_result = self.calculate_income_tax(annual_income, deductions_result['total_deductible'])
         
         return {
             'tax_year': tax_year,
@@ -215,6 +425,230 @@ class TaxEstimationService:
             'total_tax_liability': income_tax_result['total_tax'] + vat_result['total_vat']
         }
     
+    def calculate_deductions_from_totals(self, category_amounts):
+        """
+        Kategori bazlı gider toplamlarından vergi indirimlerini hesaplar
+        
+        Args:
+            category_amounts (dict): Kategori -> toplam gider tutarı
+        
+        Returns:
+            dict: calculate_deductions ile aynı yapıda vergi indirimi sonuçları
+        """
+        deductions_by_category = {
+            category: amount * self.tax_deductible_categories[category]
+            for category, amount in category_amounts.items()
+            if category in self.tax_deductible_categories
+        }
+        
+        return {
+            'total_deductible': sum(deductions_by_category.values()),
+            'deductions_by_category': deductions_by_category
+        }
+    
+    def calculate_vat_from_totals(self, vat_amounts):
+        """
+        KDV oranı türü bazlı tutar toplamlarından KDV hesaplar
+        
+        Args:
+            vat_amounts (dict): KDV oranı türü -> toplam tutar
+        
+        Returns:
+            dict: calculate_vat ile aynı yapıda KDV hesabı sonuçları
+        """
+        vat_by_rate = {rate_type: 0 for rate_type in ('standard', 'reduced', 'special')}
+        
+        for rate_type, amount in vat_amounts.items():
+            vat_rate = self.vat_rates.get(rate_type, self.vat_rates['standard'])
+            vat_by_rate[rate_type] = vat_by_rate.get(rate_type, 0) + amount * vat_rate
+        
+        return {
+            'total_vat': sum(vat_by_rate.values()),
+            'total_amount': sum(vat_amounts.values()),
+            'vat_by_rate': vat_by_rate
+        }
+    
+    def sweep_tax_scenarios(self, income_data, expenses_data, deduction_grid=None,
+                            income_shifts=None, vat_mixes=None, max_grid_points=1000000):
+        """
+        Vergi senaryolarından oluşan bir ızgarayı tek seferde değerlendirir
+        
+        Karar eksenleri indirilebilir kategorilere kaydırılan harcama
+        tutarlarıdır: tutar, mevcut indirilebilir olmayan harcamalardan
+        (ör. Market) kategoriye taşınır, toplam harcama değişmez. KDV'ye tabi
+        olmayan bir kategoriye (ör. Emeklilik Katkısı) kaydırılan tutar KDV
+        matrahından (standart oranla) düşer. Kaydırılan toplam, indirilebilir
+        olmayan harcamaları aşan senaryolar uygulanamaz sayılır.
+        
+        Gelir kaydırmaları ve KDV oranı dağılımları karar değil koşul
+        eksenleridir: her koşul için vergiyi en çok düşüren (toplam harcama
+        sabit olduğundan net nakdi en yüksek) kaydırma ayrı raporlanır.
+        
+        Args:
+            income_data (dict): Aylık gelir verileri
+            expenses_data (list): Gider nesneleri listesi
+            deduction_grid (dict): Kategori -> kaydırılacak harcama tutarları listesi
+            income_shifts (list): Yıllık gelire eklenecek/çıkarılacak tutarlar
+            vat_mixes (list): KDV oranı dağılımları [{'standard': 0.7, 'reduced': 0.3}, ...]
+            max_grid_points (int): Izgaradaki en fazla senaryo sayısı
+        
+        Returns:
+            dict: Eksenler, mevcut durum, vergi ve net nakit yüzeyleri, uygulanabilirlik
+                  yüzeyi ve koşul başına en iyi kaydırma ('optimal' listesi)
+        """
+        deduction_grid = deduction_grid or {}
+        
+        for category, amounts in deduction_grid.items():
+            if category not in self.tax_deductible_categories:
+                raise ValueError(f"Vergi indirimine tabi olmayan kategori: {category}")
+            if any(float(amount) < 0 for amount in amounts):
+                raise ValueError(f"Kaydırılan harcama tutarları negatif olamaz: {category}")
+        
+        for mix in vat_mixes or []:
+            unknown = set(mix) - set(self.vat_rates)
+            if unknown:
+                raise ValueError(f"Geçersiz KDV oranı türü: {', '.join(sorted(unknown))}")
+            shares = [float(share) for share in mix.values()]
+            if any(share < 0 for share in shares) or abs(sum(shares) - 1.0) > 1e-6:
+                raise ValueError(f"KDV oranı dağılımındaki paylar negatif olmamalı ve toplamı 1 olmalıdır: {mix}")
+        
+        # Eksenler: (ad, değerler); önce karar eksenleri, sonra koşul eksenleri
+        axes = [(category, np.asarray(amounts, dtype=np.float64)) for category, amounts in deduction_grid.items()]
+        axes.append(('income_shift', np.asarray(income_shifts if income_shifts is not None else [0], dtype=np.float64)))
+        if vat_mixes:
+            axes.append(('vat_mix', np.arange(len(vat_mixes))))
+        
+        shape = tuple(len(values) for _, values in axes)
+        grid_points = int(np.prod(shape))
+        if grid_points == 0 or grid_points > max_grid_points:
+            raise ValueError(f"Senaryo sayısı 1 ile {max_grid_points} arasında olmalıdır (istenen: {grid_points})")
+        
+        def along_axis(axis, values):
+            """Değerleri ızgaranın ilgili eksenine yerleştirir (yayınlama için)"""
+            view_shape = [1] * len(shape)
+            view_shape[axis] = len(values)
+            return values.reshape(view_shape)
+        
+        # Mevcut durum
+        baseline = self.estimate_annual_tax(income_data, expenses_data)
+        annual_income = baseline['annual_income']
+        base_deductions = baseline['deductions']['total_deductible']
+        base_vat = baseline['vat']['total_vat']
+        base_vat_amount = baseline['vat']['total_amount']
+        
+        amounts, categories, _ = self.expenses_to_columns(expenses_data)
+        base_spending = float(amounts.sum())
+        
+        # Kaydırılabilecek harcama: indirilebilir olmayan kategorilerdeki giderler
+        codes, unique_categories = self._factorize(categories, 'Diğer')
+        amount_by_category = np.bincount(codes, weights=amounts, minlength=len(unique_categories))
+        shiftable = float(sum(
+            amount for category, amount in zip(unique_categories, amount_by_category.tolist())
+            if category not in self.tax_deductible_categories
+        ))
+        
+        # Senaryo başına ek indirim, toplam kaydırma ve KDV matrahından çıkan tutar
+        extra_deductions = np.zeros(shape)
+        shifted = np.zeros(shape)
+        removed_vat_amount = np.zeros(shape)
+        for axis, (category, shift_amounts) in enumerate(axes[:len(deduction_grid)]):
+            extra_deductions = extra_deductions + along_axis(axis, shift_amounts * self.tax_deductible_categories[category])
+            shifted = shifted + along_axis(axis, shift_amounts)
+            if category in self.vat_exempt_categories:
+                removed_vat_amount = removed_vat_amount + along_axis(axis, shift_amounts)
+        
+        feasible = np.broadcast_to(shifted <= shiftable + 1e-9, shape)
+        
+        income_axis = len(deduction_grid)
+        scenario_income = annual_income + along_axis(income_axis, axes[income_axis][1])
+        
+        income_tax = self.calculate_income_tax_array(
+            np.broadcast_to(scenario_income, shape), base_deductions + extra_deductions
+        )['total_tax']
+        
+        if vat_mixes:
+            # Tüm KDV matrahı seçilen oran dağılımıyla vergilendirilir
+            mix_rates = np.array([
+                sum(share * self.vat_rates[rate_type] for rate_type, share in mix.items())
+                for mix in vat_mixes
+            ])
+            vat = (base_vat_amount - removed_vat_amount) * along_axis(income_axis + 1, mix_rates)
+        else:
+            # Mevcut giderler kendi oranlarında; KDV'siz kategoriye kayan tutar standart oranla düşer
+            vat = base_vat - removed_vat_amount * self.vat_rates['standard']
+        
+        vat = np.broadcast_to(vat, shape)
+        total_tax = income_tax + vat
+        saving = baseline['total_tax_liability'] - total_tax
+        
+        # Vergiler ve harcamalar düşüldükten sonra kalan nakit (toplam harcama kaydırmayla değişmez)
+        base_net_cash = annual_income - base_spending - baseline['total_tax_liability']
+        net_cash = scenario_income - base_spending - total_tax
+        
+        # Her koşul (gelir kaydırma x KDV dağılımı) için yalnızca karar eksenleri üzerinde arama
+        decision_shape = shape[:income_axis]
+        condition_shape = shape[income_axis:]
+        n_conditions = int(np.prod(condition_shape))
+        decision_tax = np.where(feasible, total_tax, np.inf).reshape(-1, n_conditions)
+        
+        # Koşulun kaydırmasız vergisi (tasarruf bu değere göre)
+        no_shift_income_tax = self.calculate_income_tax_array(
+            np.broadcast_to(scenario_income, shape)[(0,) * income_axis], base_deductions
+        )['total_tax']
+        if vat_mixes:
+            no_shift_vat = base_vat_amount * mix_rates[None, :]
+        else:
+            no_shift_vat = np.full(condition_shape, base_vat)
+        no_shift_tax = np.broadcast_to(no_shift_income_tax + no_shift_vat, condition_shape).reshape(-1)
+        
+        optimal = []
+        for condition, decision in enumerate(np.argmin(decision_tax, axis=0).tolist()):
+            condition_index = np.unravel_index(condition, condition_shape)
+            condition_values = {}
+            for (name, values), index in zip(axes[income_axis:], condition_index):
+                condition_values[name] = vat_mixes[index] if name == 'vat_mix' else float(values[index])
+            
+            if not np.isfinite(decision_tax[decision, condition]):
+                # Izgarada bu koşul için uygulanabilir kaydırma yok
+                optimal.append({'condition': condition_values, 'index': None, 'scenario': None})
+                continue
+            
+            index = tuple(np.unravel_index(decision, decision_shape)) + tuple(condition_index)
+            optimal.append({
+                'condition': condition_values,
+                'index': [int(i) for i in index],
+                'scenario': {name: float(values[i]) for (name, values), i in zip(axes[:income_axis], index)},
+                'income_tax': float(income_tax[index]),
+                'vat': float(vat[index]),
+                'total_tax_liability': float(total_tax[index]),
+                'saving': float(no_shift_tax[condition] - total_tax[index]),
+                'net_cash': float(net_cash[index]),
+                'net_cash_change': float(net_cash[index] - base_net_cash)
+            })
+        
+        return {
+            'axes': [
+                {'name': name, 'values': vat_mixes if name == 'vat_mix' else values.tolist()}
+                for name, values in axes
+            ],
+            'baseline': {
+                'annual_income': annual_income,
+                'total_deductible': base_deductions,
+                'income_tax': baseline['income_tax']['total_tax'],
+                'vat': base_vat,
+                'total_tax_liability': baseline['total_tax_liability'],
+                'net_cash': base_net_cash,
+                'shiftable_spending': shiftable
+            },
+            'income_tax': income_tax.tolist(),
+            'vat': vat.tolist(),
+            'total_tax_liability': total_tax.tolist(),
+            'saving': saving.tolist(),
+            'net_cash': np.broadcast_to(net_cash, shape).tolist(),
+            'feasible': feasible.tolist(),
+            'optimal': optimal
+        }
+    
     def forecast_tax_liability(self, historical_income, historical_expenses, months_ahead=12):
         """
         Geçmiş veriler üzerinden gelecek vergi yükümlülüğünü tahmin eder
@@ -236,8 +670,8 @@ class TaxEstimationService:
         expense_values = [historical_expenses[month] for month in expense_months]
         
         # Basit doğrusal regresyon ile tahmin
-        X_income = np.array(range(len(income_months))).reshape(-1, 1)
-        X_expense = np.array(range(len(expense_months))).reshape(-1, 1)
+        X_income = np.arange(len(income_months)).reshape(-1, 1)
+        X_expense = np.arange(len(expense_months)).reshape(-1, 1)
         
         # Gelir modeli
         income_model = LinearRegression()
@@ -247,47 +681,108 @@ class TaxEstimationService:
         expense_model = LinearRegression()
         expense_model.fit(X_expense, expense_values)
         
-        # Gelecek aylar için tahminler
-        future_months = []
-        future_income = []
-        future_expenses = []
-        future_taxes = []
+        # Tüm ufuklar için tek seferde tahmin
+        steps = np.arange(months_ahead).reshape(-1, 1)
+        future_income = income_model.predict(len(income_months) + steps)
+        future_expenses = expense_model.predict(len(expense_months) + steps)
         
+        # Takvim ayları
         last_month = max(income_months[-1], expense_months[-1])
-        last_date = datetime.datetime.strptime(last_month, '%Y-%m')
+        future_months = next_month_keys(last_month, months_ahead)
         
-        for i in range(1, months_ahead + 1):
-            future_date = last_date + datetime.timedelta(days=30*i)
-            future_month = future_date.strftime('%Y-%m')
-            future_months.append(future_month)
-            
-            # Gelir tahmini
-            future_income_value = income_model.predict([[len(income_months) + i - 1]])[0]
-            future_income.append(future_income_value)
-            
-            # Gider tahmini
-            future_expense_value = expense_model.predict([[len(expense_months) + i - 1]])[0]
-            future_expenses.append(future_expense_value)
-            
-            # Vergi tahmini (basitleştirilmiş)
-            income_tax = future_income_value * 0.25  # Ortalama bir oran
-            future_taxes.append(income_tax)
+        # Aylık vergi: aylık gelir yıllığa çevrilip dilimlerden vergilendirilir
+        future_taxes = self.calculate_income_tax_array(future_income * 12)['total_tax'] / 12
         
         return {
             'months': future_months,
+            'income': future_income.tolist(),
+            'expenses': future_expenses.tolist(),
+            'taxes': future_taxes.tolist(),
+            'total_estimated_tax': float(future_taxes.sum())
+        }
+    
+    def forecast_tax_liability_batch(self, income, expense, months, months_ahead=12,
+                                     income_mask=None, expense_mask=None):
+        """
+        Tüm kullanıcıların gelecek vergi yükümlülüğünü tek seferde tahmin eder
+        
+        Her kullanıcı satırı için forecast_tax_liability ile aynı doğrusal
+        regresyon kapalı formda (en küçük kareler) hesaplanır. Verisi olmayan
+        aylar atlanır; x ekseni kullanıcının verisi olan ayların sırasıdır.
+        
+        Args:
+            income (ndarray): (kullanıcı x ay) aylık gelir matrisi
+            expense (ndarray): (kullanıcı x ay) aylık gider matrisi
+            months (list): Matris sütunlarının ay anahtarları ('2023-01', ...)
+            months_ahead (int): Kaç ay ilerisi için tahmin yapılacağı
+            income_mask (ndarray): Gelir verisi bulunan hücreler (varsayılan: tümü)
+            expense_mask (ndarray): Gider verisi bulunan hücreler (varsayılan: tümü)
+        
+        Returns:
+            dict: 'months' ve (kullanıcı x ufuk) 'income', 'expenses', 'taxes'
+                  matrisleri ile kullanıcı başına 'total_estimated_tax'
+        """
+        income = np.asarray(income, dtype=np.float64)
+        expense = np.asarray(expense, dtype=np.float64)
+        
+        if income_mask is None:
+            income_mask = np.ones(income.shape, dtype=bool)
+        if expense_mask is None:
+            expense_mask = np.ones(expense.shape, dtype=bool)
+        
+        future_income = self._linear_forecast_rows(income, income_mask, months_ahead)
+        future_expenses = self._linear_forecast_rows(expense, expense_mask, months_ahead)
+        
+        future_taxes = self.calculate_income_tax_array(future_income * 12)['total_tax'] / 12
+        
+        return {
+            'months': next_month_keys(months[-1], months_ahead),
             'income': future_income,
             'expenses': future_expenses,
             'taxes': future_taxes,
-            'total_estimated_tax': sum(future_taxes)
+            'total_estimated_tax': future_taxes.sum(axis=1)
         }
     
+    def _linear_forecast_rows(self, values, mask, months_ahead):
+        """
+        Her satıra kapalı formda doğrusal regresyon uydurur ve sonraki
+        `months_ahead` değeri tahmin eder (tek veri noktası: sabit, hiç yok: 0)
+        """
+        # Her hücrenin satırdaki veri sırası (x), veri sayısı ve ortalamalar
+        x = np.cumsum(mask, axis=1) - 1
+        count = mask.sum(axis=1)
+        safe_count = np.maximum(count, 1)
+        
+        x_mean = np.where(mask, x, 0).sum(axis=1) / safe_count
+        y_mean = np.where(mask, values, 0).sum(axis=1) / safe_count
+        
+        x_centered = np.where(mask, x - x_mean[:, None], 0)
+        y_centered = np.where(mask, values - y_mean[:, None], 0)
+        
+        sxx = (x_centered ** 2).sum(axis=1)
+        sxy = (x_centered * y_centered).sum(axis=1)
+        slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+        intercept = y_mean - slope * x_mean
+        
+        future_x = count[:, None] + np.arange(months_ahead)
+        return intercept[:, None] + slope[:, None] * future_x
+    
+    def _expense_amounts_by_category(self, expenses_data):
+        """Gider tutarlarını kategori bazında toplar (ilk görülme sırasıyla)"""
+        amounts, categories, _ = self.expenses_to_columns(expenses_data)
+        
+        codes, unique_categories = self._factorize(categories, 'Diğer')
+        totals = np.bincount(codes, weights=amounts, minlength=len(unique_categories))
+        
+        return dict(zip(unique_categories, totals.tolist()))
+    
     def suggest_tax_savings(self, income_data, expenses_data):
         """
         Vergi tasarrufu önerileri sunar
         
         Args:
             income_data (dict): Aylık gelir verileri
-            expenses_data (dict): Aylık gider verileri
+            expenses_data (list veya DataFrame): Gider nesneleri
         
         Returns:
             list: Vergi tasarrufu önerileri
@@ -312,12 +807,11 @@ class TaxEstimationService:
                     'implementation_difficulty': 'Orta'
                 })
         
-        # Gider kategorileri kontrolü
+        # Gider kategorileri kontrolü (her kategori için bir kez, toplam tutarla)
+        amounts_by_category = self._expense_amounts_by_category(expenses_data)
+        
         deduction_potential = 0
-        for expense in expenses_data:
-            category = expense.get('category', 'Diğer')
-            amount = expense.get('amount', 0)
-            
+        for category, amount in amounts_by_category.items():
             if category not in self.tax_deductible_categories:
                 # Bu gider vergi indirimine tabi değil
                 similar_deductible = self._find_similar_deductible_category(category)
@@ -328,7 +822,8 @@ class TaxEstimationService:
                         'title': f'Gider Yeniden Kategorilendirme: {category}',
                         'description': f'"{category}" giderlerinizi "{similar_deductible}" olarak kategorilendirmeyi düşünün.',
                         'saving_potential': 'Düşük-Orta',
-                        'implementation_difficulty': 'Kolay'
+                        'implementation_difficulty': 'Kolay',
+                        'amount': amount
                     })
                     deduction_potential += amount * self.tax_deductible_categories[similar_deductible]
         
@@ -361,8 +856,7 @@ class TaxEstimationService:
             })
         
         # Emeklilik katkısı önerisi
-        retirement_expenses = [e for e in expenses_data if e.get('category') == 'Emeklilik Katkısı']
-        retirement_total = sum(e.get('amount', 0) for e in retirement_expenses)
+        retirement_total = amounts_by_category.get('Emeklilik Katkısı', 0)
         
         if retirement_total < annual_income * 0.1:  # Gelirin %10'undan az emeklilik katkısı
             suggestions.append({
@@ -375,6 +869,26 @@ class TaxEstimationService:
         
         return suggestions
     
+    def _build_category_index(self):
+        """
+        Tüm anahtar kelimeler için tek bir derlenmiş düzenli ifade hazırlar
+        (anahtar kelimeler değiştirilirse tekrar çağrılmalıdır)
+        """
+        keywords = []
+        self._keyword_priority = {}
+        for priority, (_, category_keywords) in enumerate(self.deductible_category_keywords):
+            for keyword in category_keywords:
+                if keyword not in self._keyword_priority:
+                    self._keyword_priority[keyword] = priority
+                    keywords.append(keyword)
+        
+        # İleriye bakış (lookahead) ile her konumdaki eşleşme bulunur; iç içe geçen
+        # anahtar kelimeler (ör. 'bağış' içindeki 'iş') kaçırılmaz. Aynı konumda
+        # öncelikli kategorinin kelimesi önce denenir.
+        pattern = '|'.join(re.escape(keyword) for keyword in keywords)
+        self._category_pattern = re.compile(f'(?=({pattern}))')
+        self._similar_category_cache = {}
+    
     def _find_similar_deductible_category(self, category):
         """
         Vergi indirimine tabi olmayan bir kategori için benzer indirilebilir kategori önerir
@@ -385,20 +899,19 @@ class TaxEstimationService:
         Returns:
             str: Benzer indirilebilir kategori (veya None)
         """
-        # Basit bir benzerlik algoritması - gerçek uygulamada daha gelişmiş olabilir
-        category_lower = category.lower()
-        
-        if 'iş' in category_lower or 'ofis' in category_lower or 'ekipman' in category_lower:
-            return 'İş Giderleri'
-        elif 'sağlık' in category_lower or 'doktor' in category_lower or 'ilaç' in category_lower:
-            return 'Sağlık'
-        elif 'eğitim' in category_lower or 'kurs' in category_lower or 'seminer' in category_lower:
-            return 'Eğitim'
-        elif 'bağış' in category_lower or 'yardım' in category_lower:
-            return 'Bağışlar'
-        elif 'sigorta' in category_lower:
-            return 'Sigorta'
-        elif 'emeklilik' in category_lower or 'bireysel emeklilik' in category_lower:
-            return 'Emeklilik Katkısı'
-        
-        return None 
\ No newline at end of file
+        if category in self._similar_category_cache:
+            return self._similar_category_cache[category]
+        
+        # Eşleşen kelimeler arasından en öncelikli kategori seçilir
+        priorities = [
+            self._keyword_priority[match.group(1)]
+            for match in self._category_pattern.finditer(category.lower())
+        ]
+        similar = self.deductible_category_keywords[min(priorities)][0] if priorities else None
+        
+        # Kullanıcı tanımlı kategoriler sınırsız büyümesin
+        if len(self._similar_category_cache) >= 10000:
+            self._similar_category_cache.clear()
+        self._similar_category_cache[category] = similar
+        
+        return similar
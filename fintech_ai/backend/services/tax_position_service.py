@@ -0,0 +1,369 @@
+import json
+import datetime
+
+class TaxPositionService:
+    """
+    Kullanıcıların vergi yılı pozisyonlarını (yıl başından beri gelir,
+    kategori bazlı gider ve KDV matrahı toplamları) tutan servis.
+
+    İşlevler:
+    - Yeni, güncellenen veya yeniden kategorilendirilen işlemlerle pozisyonu
+      artımlı güncelleme (sadece işlemin eski ve yeni katkısı uygulanır)
+    - Pozisyonları işlemlerden yeniden oluşturma
+    - Saklanan pozisyonları işlemlerle doğrulama
+
+    Not: Tutarlar Plaid işaret kuralını izler; negatif tutar gelir, pozitif
+    tutar giderdir. İşlemlerde KDV oranı türü tutulmadığı için giderler
+    'standard' KDV matrahına yazılır; KDV'ye tabi olmayan kategoriler
+    (bağış, sigorta, emeklilik katkısı) matraha yazılmaz.
+    """
+
+    def __init__(self, default_vat_rate_type='standard', vat_exempt_categories=None):
+        """
+        Args:
+            default_vat_rate_type (str): Giderlerin yazıldığı KDV oranı türü
+            vat_exempt_categories (set): KDV matrahına yazılmayan kategoriler
+                (varsayılan: TaxEstimationService'teki liste)
+        """
+        self.default_vat_rate_type = default_vat_rate_type
+
+        if vat_exempt_categories is None:
+            from services.tax_estimation_service import TaxEstimationService
+            vat_exempt_categories = TaxEstimationService().vat_exempt_categories
+        self.vat_exempt_categories = set(vat_exempt_categories)
+
+    def expense_category(self, transaction):
+        """İşlemin vergi hesabında kullanılan kategorisi (kullanıcı seçimi önceliklidir)"""
+        return transaction.custom_category or transaction.category_id or 'Diğer'
+
+    def snapshot(self, transaction):
+        """İşlemin güncellemeden önceki vergi katkısını belirleyen alanlar"""
+        return {
+            'date': transaction.date,
+            'amount': transaction.amount,
+            'category': self.expense_category(transaction)
+        }
+
+    def apply_transaction(self, transaction, previous=None):
+        """
+        Tek bir işlemi kullanıcının vergi pozisyonuna uygular (commit etmez)
+
+        Args:
+            transaction (Transaction): Yeni veya güncellenmiş işlem
+            previous (dict): İşlem güncelleniyorsa snapshot() ile alınan önceki hali
+        """
+        self.apply_transactions(transaction.user_id, [(transaction, previous)])
+
+    def apply_transactions(self, user_id, changes):
+        """
+        İşlem değişikliklerini vergi pozisyonlarına uygular (commit etmez)
+
+        Her (kullanıcı, yıl) pozisyonu bir kez yüklenir; değişiklik başına
+        sadece eski katkı çıkarılıp yeni katkı eklenir.
+
+        Args:
+            user_id: Kullanıcı kimliği
+            changes (list): (işlem, önceki hali veya None) çiftleri
+        """
+        positions = {}
+
+        for transaction, previous in changes:
+            if previous is not None:
+                self._apply(positions, user_id, previous['date'], previous['amount'], previous['category'], -1)
+
+            self._apply(
+                positions, user_id, transaction.date, transaction.amount,
+                self.expense_category(transaction), 1
+            )
+
+        for position, totals in positions.values():
+            self._store_totals(position, totals)
+
+    def get_position(self, user_id, tax_year=None):
+        """
+        Kullanıcının vergi yılı pozisyonunu döndürür
+
+        Returns:
+            dict: to_dict() çıktısı (pozisyon yoksa None)
+        """
+        from models.tax_position import TaxPosition
+
+        tax_year = tax_year or datetime.datetime.now().year
+        position = TaxPosition.query.filter_by(user_id=user_id, tax_year=tax_year).first()
+
+        return self.to_dict(position) if position else None
+
+    def needs_rebuild(self, user_id, tax_year):
+        """
+        Pozisyonun işlemlerden yeniden oluşturulması gerekip gerekmediğini döndürür
+
+        Pozisyon yoksa veya artımlı güncellemeyle, kullanıcının o yıla ait
+        işlemleri zaten kayıtlıyken oluşturulmuşsa (ör. pozisyonlar devreye
+        alınmadan önceki işlemler) ve hiç yeniden oluşturulmamışsa, saklanan
+        toplamlar eski işlemleri içermez.
+
+        Args:
+            user_id: Kullanıcı kimliği
+            tax_year (int): Vergi yılı
+
+        Returns:
+            bool: Yeniden oluşturma gerekiyorsa True
+        """
+        from app import db
+        from sqlalchemy import func
+        from models.tax_position import TaxPosition
+        from models.transaction import Transaction
+
+        position = TaxPosition.query.filter_by(user_id=user_id, tax_year=tax_year).first()
+        if position is None:
+            return True
+        if position.rebuilt_at is not None:
+            return False
+
+        earliest = db.session.query(func.min(Transaction.created_at)).filter(
+            Transaction.user_id == user_id,
+            Transaction.date >= datetime.date(tax_year, 1, 1),
+            Transaction.date <= datetime.date(tax_year, 12, 31)
+        ).scalar()
+
+        return earliest is not None and earliest < position.created_at
+
+    def to_dict(self, position):
+        """Pozisyonu TaxEstimationService.estimate_annual_tax'ın beklediği sözlüğe dönüştürür"""
+        return {
+            'user_id': position.user_id,
+            'tax_year': position.tax_year,
+            'total_income': position.total_income,
+            'total_expense': position.total_expense,
+            'category_amounts': json.loads(position.category_amounts or '{}'),
+            'vat_amounts': json.loads(position.vat_amounts or '{}'),
+            'transaction_count': position.transaction_count,
+            'rebuilt_at': position.rebuilt_at.isoformat() if position.rebuilt_at else None,
+            'updated_at': position.updated_at.isoformat() if position.updated_at else None
+        }
+
+    def compute_totals(self, user_id=None, tax_year=None):
+        """
+        Vergi pozisyonu toplamlarını işlemlerden SQL'de gruplayarak hesaplar
+
+        Returns:
+            dict: (user_id, tax_year) -> toplamlar
+        """
+        from sqlalchemy import case, func
+        from app import db
+        from models.transaction import Transaction
+
+        year = func.extract('year', Transaction.date)
+        category = func.coalesce(Transaction.custom_category, Transaction.category_id, 'Diğer')
+
+        query = db.session.query(
+            Transaction.user_id,
+            year,
+            category,
+            func.sum(case((Transaction.amount < 0, -Transaction.amount), else_=0)),
+            func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)),
+            func.count(Transaction.id)
+        )
+        if user_id is not None:
+            query = query.filter(Transaction.user_id == user_id)
+        if tax_year is not None:
+            query = query.filter(
+                Transaction.date >= datetime.date(tax_year, 1, 1),
+                Transaction.date <= datetime.date(tax_year, 12, 31)
+            )
+
+        totals = {}
+        for row_user_id, row_year, row_category, income, expense, count in query.group_by(
+            Transaction.user_id, year, category
+        ).all():
+            key = (row_user_id, int(row_year))
+            position_totals = totals.setdefault(key, self._empty_totals())
+
+            position_totals['total_income'] += income or 0
+            position_totals['transaction_count'] += count
+            if expense:
+                position_totals['total_expense'] += expense
+                position_totals['category_amounts'][row_category] = (
+                    position_totals['category_amounts'].get(row_category, 0) + expense
+                )
+                if row_category not in self.vat_exempt_categories:
+                    position_totals['vat_amounts'][self.default_vat_rate_type] = (
+                        position_totals['vat_amounts'].get(self.default_vat_rate_type, 0) + expense
+                    )
+
+        return totals
+
+    def rebuild(self, user_id=None, tax_year=None):
+        """
+        Vergi pozisyonlarını işlemlerden yeniden oluşturur ve kaydeder
+
+        Args:
+            user_id: Verilirse sadece bu kullanıcı
+            tax_year (int): Verilirse sadece bu yıl
+
+        Returns:
+            int: Yazılan pozisyon sayısı
+        """
+        from app import db
+        from models.tax_position import TaxPosition
+
+        totals = self.compute_totals(user_id, tax_year)
+
+        query = TaxPosition.query.with_for_update()
+        if user_id is not None:
+            query = query.filter(TaxPosition.user_id == user_id)
+        if tax_year is not None:
+            query = query.filter(TaxPosition.tax_year == tax_year)
+
+        existing = {(position.user_id, position.tax_year): position for position in query.all()}
+
+        rebuilt_at = datetime.datetime.now()
+        for key, position_totals in totals.items():
+            position = existing.pop(key, None)
+            if position is None:
+                position = TaxPosition(user_id=key[0], tax_year=key[1])
+                db.session.add(position)
+            self._store_totals(position, position_totals)
+            position.rebuilt_at = rebuilt_at
+
+        # İşlemi kalmayan pozisyonlar silinir
+        for position in existing.values():
+            db.session.delete(position)
+
+        db.session.commit()
+
+        return len(totals)
+
+    def verify(self, user_id=None, tax_year=None, tolerance=0.01):
+        """
+        Saklanan pozisyonları işlemlerden hesaplanan toplamlarla karşılaştırır
+
+        Args:
+            user_id: Verilirse sadece bu kullanıcı
+            tax_year (int): Verilirse sadece bu yıl
+            tolerance (float): Kabul edilen tutar farkı (TL)
+
+        Returns:
+            list: Uyuşmayan pozisyonlar [{'user_id', 'tax_year', 'differences'}]
+        """
+        from models.tax_position import TaxPosition
+
+        expected = self.compute_totals(user_id, tax_year)
+
+        query = TaxPosition.query
+        if user_id is not None:
+            query = query.filter(TaxPosition.user_id == user_id)
+        if tax_year is not None:
+            query = query.filter(TaxPosition.tax_year == tax_year)
+
+        stored = {
+            (position.user_id, position.tax_year): self._totals_from_position(position)
+            for position in query.all()
+        }
+
+        mismatches = []
+        for key in sorted(expected.keys() | stored.keys()):
+            differences = self._compare_totals(
+                expected.get(key, self._empty_totals()), stored.get(key, self._empty_totals()), tolerance
+            )
+            if differences:
+                mismatches.append({'user_id': key[0], 'tax_year': key[1], 'differences': differences})
+
+        return mismatches
+
+    def _apply(self, positions, user_id, date, amount, category, sign):
+        """Bir işlem katkısını (sign=1 ekle, -1 çıkar) ilgili yılın toplamlarına uygular"""
+        key = date.year
+        if key not in positions:
+            position = self._load_or_create(user_id, key)
+            positions[key] = (position, self._totals_from_position(position))
+
+        totals = positions[key][1]
+        totals['transaction_count'] += sign
+
+        if amount < 0:
+            totals['total_income'] += sign * -amount
+        elif amount > 0:
+            totals['total_expense'] += sign * amount
+            self._add_to_bucket(totals['category_amounts'], category, sign * amount)
+            if category not in self.vat_exempt_categories:
+                self._add_to_bucket(totals['vat_amounts'], self.default_vat_rate_type, sign * amount)
+
+    def _add_to_bucket(self, buckets, key, amount):
+        """Sözlükteki toplamı günceller; sıfırlanan anahtarı kaldırır"""
+        value = buckets.get(key, 0) + amount
+        if abs(value) < 1e-9:
+            buckets.pop(key, None)
+        else:
+            buckets[key] = value
+
+    def _load_or_create(self, user_id, tax_year):
+        """
+        Pozisyonu satır kilidiyle yükler, yoksa oluşturur
+
+        Kilit commit'e kadar tutulur; aynı pozisyonu güncelleyen eş zamanlı
+        istekler (farklı işçilerde bile) JSON toplamlarını sırayla okuyup
+        yazar ve birbirinin değişikliğini ezmez.
+        """
+        from sqlalchemy.exc import IntegrityError
+        from app import db
+        from models.tax_position import TaxPosition
+
+        query = TaxPosition.query.filter_by(
+            user_id=user_id, tax_year=tax_year
+        ).with_for_update().populate_existing()
+        position = query.first()
+        if position is None:
+            position = TaxPosition(user_id=user_id, tax_year=tax_year)
+            try:
+                with db.session.begin_nested():
+                    db.session.add(position)
+            except IntegrityError:
+                # Başka bir istek pozisyonu aynı anda oluşturdu; onun satırı kilitlenip kullanılır
+                position = query.one()
+
+        return position
+
+    def _empty_totals(self):
+        return {
+            'total_income': 0.0,
+            'total_expense': 0.0,
+            'category_amounts': {},
+            'vat_amounts': {},
+            'transaction_count': 0
+        }
+
+    def _totals_from_position(self, position):
+        """Model satırını düzenlenebilir toplamlar sözlüğüne çevirir"""
+        return {
+            'total_income': position.total_income or 0.0,
+            'total_expense': position.total_expense or 0.0,
+            'category_amounts': json.loads(position.category_amounts or '{}'),
+            'vat_amounts': json.loads(position.vat_amounts or '{}'),
+            'transaction_count': position.transaction_count or 0
+        }
+
+    def _store_totals(self, position, totals):
+        """Toplamları model satırına yazar"""
+        position.total_income = totals['total_income']
+        position.total_expense = totals['total_expense']
+        position.category_amounts = json.dumps(totals['category_amounts'], ensure_ascii=False)
+        position.vat_amounts = json.dumps(totals['vat_amounts'], ensure_ascii=False)
+        position.transaction_count = totals['transaction_count']
+
+    def _compare_totals(self, expected, stored, tolerance):
+        """İki toplamlar sözlüğü arasındaki toleransı aşan farkları döndürür"""
+        differences = {}
+
+        for field in ('total_income', 'total_expense', 'transaction_count'):
+            if abs(expected[field] - stored[field]) > tolerance:
+                differences[field] = {'expected': expected[field], 'stored': stored[field]}
+
+        for field in ('category_amounts', 'vat_amounts'):
+            for key in expected[field].keys() | stored[field].keys():
+                expected_value = expected[field].get(key, 0)
+                stored_value = stored[field].get(key, 0)
+                if abs(expected_value - stored_value) > tolerance:
+                    differences[f"{field}.{key}"] = {'expected': expected_value, 'stored': stored_value}
+
+        return differences
@@ -0,0 +1,97 @@
+import time
+import threading
+
+class CircuitBreaker:
+    """
+    Art arda hata veren bir dış servise yapılan çağrıları geçici olarak kesen devre kesici.
+
+    Durumlar:
+    - closed: Çağrılara izin verilir; art arda hata sayısı eşiğe ulaşınca devre açılır
+    - open: Çağrı yapılmaz (çağıran hemen yedek yola geçer); reset_timeout
+      sonunda devre yarı açık duruma geçer
+    - half_open: Tek bir deneme çağrısına izin verilir; başarılı olursa devre
+      kapanır, hata verirse tekrar açılır
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        """
+        Args:
+            failure_threshold (int): Devreyi açan art arda hata sayısı
+            reset_timeout (float): Devrenin açık kalacağı süre (saniye)
+            clock (callable): Zaman kaynağı (saniye)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_progress = False
+        self._trial_started = 0.0
+        self._times_opened = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow(self):
+        """
+        Çağrı yapılıp yapılamayacağını döndürür
+
+        Returns:
+            bool: Çağrı yapılabilirse True (yarı açık durumda sadece bir deneme)
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            # Sonucu kaydedilmeyen deneme (ör. iptal edilen akış) reset_timeout sonra yenilenir
+            if state == self.HALF_OPEN and (
+                not self._trial_in_progress or self._clock() - self._trial_started >= self.reset_timeout
+            ):
+                self._trial_in_progress = True
+                self._trial_started = self._clock()
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        """Başarılı çağrıyı kaydeder; devre kapanır"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        """Hatalı çağrıyı kaydeder; eşik aşılırsa veya deneme çağrısı hata verirse devre açılır"""
+        with self._lock:
+            self._failures += 1
+            # Devre açıkken sonuçlanan eski çağrıların hataları açık kalma süresini uzatmaz
+            if self._trial_in_progress or (self._state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_in_progress = False
+
+    def stats(self):
+        """Durum, art arda hata, açılma ve reddedilen çağrı sayıları"""
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                'times_opened': self._times_opened,
+                'rejected_calls': self._rejected
+            }
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
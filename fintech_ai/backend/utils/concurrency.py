@@ -0,0 +1,100 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Paralel sorgular için ortak iş parçacığı havuzunun üst sınırı; havuz ayrıca
+# veritabanı bağlantı havuzunun kapasitesinden (pool_size + max_overflow) büyük olamaz
+MAX_PARALLEL_QUERIES = int(os.environ.get('MAX_PARALLEL_QUERIES', 8))
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+# Havuzda çalışan veya yer ayrılmış iş sayısı
+_in_flight = 0
+
+def _db_pool_capacity():
+    """Veritabanı bağlantı havuzunun kapasitesi (bilinmiyorsa None)"""
+    try:
+        from app import db
+        pool = db.engine.pool
+        size = pool.size()
+        overflow = getattr(pool, '_max_overflow', 0)
+    except Exception:
+        # Uygulama bağlamı yok veya havuz boyutu sınırlı değil (SQLite, NullPool)
+        return None
+
+    # max_overflow=-1 sınırsız taşma demektir
+    return None if overflow < 0 else size + overflow
+
+def _get_executor():
+    global _executor, _executor_workers
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                capacity = _db_pool_capacity()
+                _executor_workers = max(1, min(MAX_PARALLEL_QUERIES, capacity or MAX_PARALLEL_QUERIES))
+                _executor = ThreadPoolExecutor(
+                    max_workers=_executor_workers, thread_name_prefix='parallel-query'
+                )
+    return _executor
+
+def _reserve(count):
+    """Havuzda count iş için boş iş parçacığı varsa yer ayırır"""
+    global _in_flight
+    with _executor_lock:
+        if _in_flight + count > _executor_workers:
+            return False
+        _in_flight += count
+        return True
+
+def _release():
+    global _in_flight
+    with _executor_lock:
+        _in_flight -= 1
+
+def run_parallel(tasks, timeout=None):
+    """
+    Birbirinden bağımsız okuma işlerini paralel çalıştırır ve sonuçları toplar
+
+    Her iş kendi Flask uygulama bağlamında çalışır; Flask-SQLAlchemy oturumu
+    uygulama bağlamına bağlı olduğundan her iş havuzdan ayrı bir bağlantı
+    kullanır ve bağlam kapanınca bağlantı havuza döner. Bu yüzden işler ORM
+    nesnesi yerine düz veri (sözlük, liste, sayı) döndürmelidir.
+
+    Havuz tüm istek iş parçacıklarınca paylaşılır. Havuzda işlerin hepsine
+    yetecek boş iş parçacığı yoksa işler kuyrukta beklemek yerine çağıran
+    iş parçacığında sırayla çalıştırılır (yoğunlukta sıralı çalışmadan
+    yavaş olmaz).
+
+    Args:
+        tasks (dict): İş adı -> argümansız fonksiyon
+        timeout (float): Her sonucun en fazla beklenme süresi (saniye)
+
+    Returns:
+        dict: İş adı -> sonuç (bir iş hata verirse hata yeniden fırlatılır)
+    """
+    from flask import current_app, has_app_context
+
+    if len(tasks) <= 1:
+        return {name: task() for name, task in tasks.items()}
+
+    executor = _get_executor()
+    if not _reserve(len(tasks)):
+        return {name: task() for name, task in tasks.items()}
+
+    app = current_app._get_current_object() if has_app_context() else None
+
+    futures = {name: executor.submit(_run_in_app_context, app, task) for name, task in tasks.items()}
+
+    return {name: future.result(timeout=timeout) for name, future in futures.items()}
+
+def _run_in_app_context(app, task):
+    try:
+        if app is None:
+            return task()
+
+        with app.app_context():
+            return task()
+    finally:
+        _release()
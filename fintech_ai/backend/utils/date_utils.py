@@ -0,0 +1,32 @@
+import calendar
+import datetime
+
+def add_months(value, months):
+    """
+    Tarihe takvim ayı ekler (ayın günü hedef ayın son gününe sınırlanır)
+
+    Args:
+        value (date): Başlangıç tarihi
+        months (int): Eklenecek ay sayısı (negatif olabilir)
+
+    Returns:
+        date: Yeni tarih (datetime verilirse datetime döner)
+    """
+    month_index = value.year * 12 + value.month - 1 + months
+    year, month = divmod(month_index, 12)
+    day = min(value.day, calendar.monthrange(year, month + 1)[1])
+    return value.replace(year=year, month=month + 1, day=day)
+
+def next_month_keys(month_key, count):
+    """
+    'YYYY-MM' biçimindeki aydan sonraki ayların anahtarlarını döndürür
+
+    Args:
+        month_key (str): Başlangıç ayı ('2023-11')
+        count (int): Kaç ay üretileceği
+
+    Returns:
+        list: ['2023-12', '2024-01', ...]
+    """
+    start = datetime.datetime.strptime(month_key, '%Y-%m').date()
+    return [add_months(start, i).strftime('%Y-%m') for i in range(1, count + 1)]
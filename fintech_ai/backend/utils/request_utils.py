@@ -0,0 +1,31 @@
+def parse_bool(value, default=False):
+    """
+    İstek gövdesindeki mantıksal değeri ayrıştırır
+
+    JSON'da true/false yerine metin ("false", "0", "hayır") veya sayı
+    gönderen istemciler için bool() yeterli değildir: bool("false") True'dur.
+
+    Args:
+        value: Gövdedeki değer (bool, sayı, metin veya None)
+        default (bool): Değer yoksa veya tanınmıyorsa kullanılacak sonuç
+
+    Returns:
+        bool: Ayrıştırılan değer
+    """
+    if value is None:
+        return default
+
+    if isinstance(value, bool):
+        return value
+
+    if isinstance(value, (int, float)):
+        return value != 0
+
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in ('1', 'true', 'yes', 'on', 'evet'):
+            return True
+        if normalized in ('0', 'false', 'no', 'off', 'hayır', ''):
+            return False
+
+    return default
@@ -25,9 +25,10 @@ const getHeaders = () => {
  * Kullanıcı mesajına yapay zeka yanıtı alır
  * 
  * @param {string} message - Kullanıcı mesajı
+ * @param {boolean} forceRefresh - Sunucu önbelleğini atlayıp yeni yanıt iste
  * @returns {Promise<string>} - AI yanıtı
  */
-export const getAIResponse = async (message) => {
+export const getAIResponse = async (message, forceRefresh = false) => {
   try {
     // Önbelleği engellemek için zaman damgası ekle
     const timestamp = new Date().getTime();
@@ -43,7 +44,7 @@ export const getAIResponse = async (message) => {
         body: JSON.stringify({ 
           message,
           timestamp, // Zaman damgasını body'ye de ekle
-          force_refresh: true // Her zaman yeni yanıt iste
+          force_refresh: forceRefresh // Sunucu, aynı veride aynı soruya önbellekten yanıt verir
         }),
         cache: 'no-store' // Fetch API'nin önbelleği kullanmamasını sağla
       });
@@ -54,7 +55,7 @@ export const getAIResponse = async (message) => {
       if (!response.ok) {
         console.error('Kimlik doğrulamalı API yanıtında sorun:', await response.text());
         // Token olmadan public endpoint'i kullan, simulasyon yapmak yerine
-        return getPublicAIResponse(message);
+        return getPublicAIResponse(message, forceRefresh);
       }
       
       // Yanıtı döndür
@@ -63,21 +64,83 @@ export const getAIResponse = async (message) => {
     } else {
       // Kimlik doğrulaması olmadan public API endpoint'ini kullan
       console.log('Public API yanıtı isteniyor:', message);
-      return getPublicAIResponse(message);
+      return getPublicAIResponse(message, forceRefresh);
     }
   } catch (error) {
     console.error('AI yanıtı alınırken hata oluştu:', error);
-    return getPublicAIResponse(message); // Hata durumunda public endpoint'i dene
+    return getPublicAIResponse(message, forceRefresh); // Hata durumunda public endpoint'i dene
   }
 };
 
+/**
+ * Yapay zeka yanıtını sunucudan geldikçe (Server-Sent Events) parça parça alır
+ * 
+ * @param {string} message - Kullanıcı mesajı
+ * @param {function} onToken - Her yeni parçada çağrılır (parça, o ana kadarki yanıt)
+ * @param {object} options - { forceRefresh, signal } (signal: iptal için AbortController.signal)
+ * @returns {Promise<string>} - Tam AI yanıtı
+ */
+export const streamAIResponse = async (message, onToken, { forceRefresh = false, signal } = {}) => {
+  // Akış desteklenmiyorsa veya oturum yoksa tek seferlik yanıta dön
+  if (!localStorage.getItem('token') || typeof ReadableStream === 'undefined') {
+    const response = await getAIResponse(message, forceRefresh);
+    onToken && onToken(response, response);
+    return response;
+  }
+  
+  const response = await fetch(`${baseUrl}/api/advice/ai-response/stream`, {
+    method: 'POST',
+    headers: { ...getHeaders(), 'Accept': 'text/event-stream' },
+    body: JSON.stringify({ message, force_refresh: forceRefresh }),
+    cache: 'no-store',
+    signal
+  });
+  
+  if (!response.ok || !response.body) {
+    console.error('Akışlı API yanıtında sorun:', response.status);
+    return getAIResponse(message, forceRefresh);
+  }
+  
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder('utf-8');
+  let buffer = '';
+  let fullResponse = '';
+  
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    
+    buffer += decoder.decode(value, { stream: true });
+    
+    // SSE mesajları boş satırla ayrılır
+    const events = buffer.split('\n\n');
+    buffer = events.pop();
+    
+    for (const event of events) {
+      const dataLine = event.split('\n').find((line) => line.startsWith('data: '));
+      if (!dataLine) continue;
+      
+      const data = JSON.parse(dataLine.slice(6));
+      if (data.token !== undefined) {
+        fullResponse += data.token;
+        onToken && onToken(data.token, fullResponse);
+      } else if (data.response !== undefined) {
+        fullResponse = data.response;
+      }
+    }
+  }
+  
+  return fullResponse;
+};
+
 /**
  * Kimlik doğrulaması olmadan public API endpoint'ini kullanarak AI yanıtı alır
  * 
  * @param {string} message - Kullanıcı mesajı 
+ * @param {boolean} forceRefresh - Sunucu önbelleğini atlayıp yeni yanıt iste
  * @returns {Promise<string>} - AI yanıtı
  */
-const getPublicAIResponse = async (message) => {
+const getPublicAIResponse = async (message, forceRefresh = false) => {
   try {
     // Önbelleği engellemek için zaman damgası ekle
     const timestamp = new Date().getTime();
@@ -94,7 +157,7 @@ const getPublicAIResponse = async (message) => {
       body: JSON.stringify({ 
         message,
         timestamp,
-        force_refresh: true // Her zaman yeni yanıt iste
+        force_refresh: forceRefresh
       }),
       cache: 'no-store'
     });
@@ -154,7 +217,8 @@ const simulateLocalAIResponse = async (message, forceRefresh = false) => {
 };
 
 const aiService = {
-  getAIResponse
+  getAIResponse,
+  streamAIResponse
 };
 
 export default aiService; 
\ No newline at end of file